@@ -0,0 +1,81 @@
+# coding: utf-8
+
+# Throughput of many small code execution jobs:
+#   serial: one Sandbox.run_code_execution() after the other (how the pipelines run today)
+#   bulk:   Sandbox.run_samples() in every execution mode
+#
+# Usage: python -m benchmarks.bulk_benchmark --jobs 200 --cases 16 [--memory rusage]
+
+import time
+import random
+import argparse
+from src.sandbox import Sandbox
+
+
+FUNCTIONS = {
+    "serialize_input": "def serialize_input(i):\n    nums, target = i\n    return f'{nums}\\n{target}'\n",
+    "deserialize_input": "def deserialize_input(s):\n    nums, target = s.strip().split('\\n')\n    return eval(nums), int(target)\n",
+    "serialize_output": "def serialize_output(o):\n    return str(o)\n",
+    "deserialize_output": "def deserialize_output(s):\n    return eval(s)\n",
+    "generate_test_case_input": "def generate_test_case_input():\n    return [1, 2], 3\n",
+    "entry_point": "twoSum",
+}
+
+SOLUTION = """class Solution:
+    def twoSum(self, nums: List[int], target: int) -> List[int]:
+        seen = {}
+        for i, x in enumerate(nums):
+            if target - x in seen:
+                return [seen[target - x], i]
+            seen[x] = i
+"""
+
+def make_sample(case_count, size):
+    test_cases = list()
+    for _ in range(case_count):
+        nums = random.sample(range(10**6), size)
+        i, j = sorted(random.sample(range(size), 2))
+        test_cases += [{"input": f"{nums}\n{nums[i]+nums[j]}", "output": str([i, j])}]
+    return {"timeout": 30, "solution": SOLUTION, "functions": FUNCTIONS, "test_cases": test_cases}
+
+def serial(sample, job_count):
+    sandbox = Sandbox()
+    for _ in range(job_count):
+        assert sandbox.run_code_execution(sample)[0] == "pass"
+
+def bulk(mode, sample, job_count):
+    sandbox = Sandbox(mode=mode)
+    try:
+        jobs = ((index, "execution", sample) for index in range(job_count))
+        for _, result in sandbox.run_samples(jobs):
+            assert result[0] == "pass"
+    finally:
+        if sandbox.pool is not None:
+            sandbox.pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--cases", type=int, default=16)
+    parser.add_argument("--size", type=int, default=100)
+    parser.add_argument("--memory", default=None, help="memory backend (default tracemalloc, which traces the whole job)")
+    args = parser.parse_args()
+
+    random.seed(42)
+    sample = make_sample(args.cases, args.size)
+    if args.memory:
+        sample['memory'] = args.memory
+    runs = [
+        ("serial", lambda: serial(sample, args.jobs)),
+        ("spawn", lambda: bulk("spawn", sample, args.jobs)),
+        ("zygote", lambda: bulk("zygote", sample, args.jobs)),
+        ("pool", lambda: bulk("pool", sample, args.jobs)),
+    ]
+
+    print(f"{'executor':>8} {'total (s)':>10} {'jobs/s':>10}")
+    for name, function in runs:
+        start = time.monotonic()
+        function()
+        total = time.monotonic() - start
+        print(f"{name:>8} {total:>10.3f} {args.jobs/total:>10.1f}")
@@ -0,0 +1,100 @@
+# coding: utf-8
+
+# Per-case transfer cost of a test suite between the parent and a sandbox child:
+#   manager: one Manager proxy append per case (the previous result transport)
+#   pipe:    Channel, single length-prefixed pipe message
+#   shm:     Channel, shared memory buffer
+#
+# Usage: python -m benchmarks.channel_benchmark --counts 64 1000 --size 1048576
+
+import time
+import argparse
+from multiprocessing import Manager, Process, Pipe
+from src.sandbox import Channel
+
+
+def make_cases(count, size):
+    cases = list()
+    for index in range(count):
+        token = f"{index},"
+        cases += [{"input": token * (size // len(token)), "output": token}]
+    return cases
+
+def manager_child(count, size, start, results):
+    cases = make_cases(count, size)
+    start.append(time.monotonic())
+    for case in cases:
+        results.append(case)
+
+def channel_child(count, size, conn):
+    cases = make_cases(count, size)
+    Channel.send(conn, (time.monotonic(), cases))
+    conn.close()
+
+def upload_child(conn):
+    start, cases = Channel.recv(conn)
+    conn.send((time.monotonic(), len(cases)))
+    conn.close()
+
+def manager_download(count, size):
+    with Manager() as manager:
+        start, results = manager.list(), manager.list()
+        p = Process(target=manager_child, args=(count, size, start, results))
+        p.start()
+        p.join()
+        cases = list(results)
+        end = time.monotonic()
+        assert len(cases) == count
+        return end - start[0]
+
+def channel_download(count, size):
+    Channel.prepare()
+    reader, writer = Pipe(duplex=False)
+    p = Process(target=channel_child, args=(count, size, writer))
+    p.start()
+    writer.close()
+    start, cases = Channel.recv(reader)
+    end = time.monotonic()
+    p.join()
+    assert len(cases) == count
+    return end - start
+
+def channel_upload(count, size):
+    Channel.prepare()
+    cases = make_cases(count, size)
+    parent_conn, child_conn = Pipe()
+    p = Process(target=upload_child, args=(child_conn,))
+    p.start()
+    child_conn.close()
+    start = time.monotonic()
+    Channel.send(parent_conn, (start, cases))
+    end, received = parent_conn.recv()
+    p.join()
+    assert received == count
+    return end - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--counts", type=int, nargs="+", default=[64, 1000])
+    parser.add_argument("--size", type=int, default=2**20)
+    parser.add_argument("--skip_manager", action="store_true")
+    args = parser.parse_args()
+
+    threshold = Channel.threshold
+    print(f"{'cases':>6} {'transport':>10} {'direction':>10} {'total (s)':>10} {'per case (ms)':>14}")
+    for count in args.counts:
+        runs = list()
+        if not args.skip_manager:
+            runs += [("manager", "download", None, manager_download)]
+        runs += [
+            ("pipe", "download", float("inf"), channel_download),
+            ("shm", "download", 0, channel_download),
+            ("pipe", "upload", float("inf"), channel_upload),
+            ("shm", "upload", 0, channel_upload),
+        ]
+        for transport, direction, channel_threshold, function in runs:
+            Channel.threshold = threshold if channel_threshold is None else channel_threshold
+            total = function(count, args.size)
+            print(f"{count:>6} {transport:>10} {direction:>10} {total:>10.3f} {total/count*10**3:>14.3f}")
+        Channel.threshold = threshold
@@ -5,25 +5,11 @@
 
 import os
 import json
-import time
 import argparse
-import requests
 from tqdm import tqdm
 from datasets import load_dataset, Dataset
-
-def retry(func):
-    def wrap(*args, **kwargs):
-        for i in range(3):
-            try:
-                result = func(*args, **kwargs)
-                return result
-            except Exception as e:
-                sleep_time = 1.5**(i)
-                print("🟡", end=" ", flush=True)
-                time.sleep(sleep_time)
-        print("🟠", end=" ", flush=True)
-        return None
-    return wrap
+from src.graphql_transport import GraphQLTransport
+from src.response_cache import ResponseCache
 
 def create_headers(leetcode_cookie, leetcode_crsf_token):
     headers = {
@@ -45,13 +31,9 @@ def create_headers(leetcode_cookie, leetcode_crsf_token):
     } 
     return headers
 
-@retry
 def retrieval(payload):
-    response = requests.request("GET", url, headers=leetcode_headers, data=payload)
-    response_json = response.json()
-    if not response_json['data'][next(iter(response_json['data']))]:
-        raise LookupError("Null Response")
-    return response_json
+    # None after the transport's retries
+    return transport.query(payload)
     
 def prompt_retrieval(titleSlug):
     prompt_payload = json.dumps({
@@ -64,12 +46,15 @@ def prompt_retrieval(titleSlug):
 
 parser = argparse.ArgumentParser()
 parser.add_argument('--language', default="python3") 
+parser.add_argument("--offline", action="store_true", help="serve GraphQL queries from the response cache only")
 args = parser.parse_args()
 
 url = "https://leetcode.com/graphql/"
 leetcode_cookie = os.getenv("LEETCODE_COOKIE")
 leetcode_crsf_token = os.getenv("LEETCODE_CRSF_TOKEN")        
 leetcode_headers = create_headers(leetcode_cookie, leetcode_crsf_token)
+cache = ResponseCache(offline=args.offline)
+transport = GraphQLTransport(leetcode_headers, url=url, cache=cache)
 
 ds = load_dataset("Elfsong/venus", args.language)
 dl = ds['train'].to_list()
@@ -82,6 +67,7 @@ for instance in tqdm(dl):
         code_prompts[ll['langSlug']] = ll['code']
     instance['code_prompt'] = code_prompts[args.language]
     new_dl += [instance]
+print(f"[+] Prompt cache: {cache.stats()}")
 
 ds = Dataset.from_list(new_dl)
 ds.push_to_hub("Elfsong/venus_v2", args.language)
\ No newline at end of file
@@ -4,6 +4,7 @@
 # Date: 2024 / 09 / 14
 
 import os
+import sys
 import time
 import json
 import uuid
@@ -16,11 +17,16 @@ from tqdm import tqdm
 import src.prompts as prompts
 from datasets import Dataset, load_dataset
 from datasets import get_dataset_config_names
-from src.utils import OpenAIClient, retry, vital_retry
+from src.utils import OpenAIClient
+from src.crawler import TokenBucket, SolutionCrawler, IncompleteCrawl
+from src.graphql_transport import GraphQLTransport, CircuitOpen
+from src.response_cache import ResponseCache
+from src.crawl_journal import CrawlJournal
+from src.question_catalog import QuestionCatalog
 
 
 class LeetCodeOperation:
-    def __init__(self, lang, mode) -> None:
+    def __init__(self, lang, mode, rate=8.0, concurrency=8, offline=False) -> None:
         self.lang = lang
         self.mode = mode
         self.instances = list()
@@ -39,6 +45,18 @@ class LeetCodeOperation:
         self.lang_code = self.lang_code_mapping[self.lang]
         self.leetcode_headers = self.create_headers(self.leetcode_cookie, self.leetcode_crsf_token)
         
+        # Every query shares one connection pool, one request rate budget and one response cache
+        self.limiter = TokenBucket(rate, burst=max(1, int(rate/2)))
+        self.cache = ResponseCache(offline=offline)
+        self.transport = GraphQLTransport(self.leetcode_headers, url=self.url, limiter=self.limiter, cache=self.cache, pool_size=concurrency)
+        self.crawler = SolutionCrawler(self.transport, concurrency=concurrency)
+        
+        # Finished buckets and instances survive a crash until they are uploaded
+        self.journal = CrawlJournal(self.lang)
+        
+        # Every question with its content and code prompts, fetched once and then refreshed with new questions only
+        self.catalog = QuestionCatalog()
+        
         if self.mode == "submit":
             self.client = OpenAIClient("gpt-4o", model_token=self.model_token)
         
@@ -71,52 +89,45 @@ class LeetCodeOperation:
         return headers
     
     def runtime_range(self, instance):
-        instance['rt_list'] = list()
         question_id =  instance['question_id']
-        question_name = instance['name']
-        rt_count = len(instance['runtimeDistribution']['distribution'])
-        print(f"[+] Runtime Solutions [{rt_count}]")
+        buckets = [rt for rt, pl in instance['runtimeDistribution']['distribution']]
+        print(f"[+] Runtime Solutions [{len(buckets)}]")
+        
+        done = self.journal.buckets(question_id, "runtime")
+        if done:
+            print(f"[+] Resuming after [{len(done)}] finished buckets")
+        
+        start_time, request_count = time.time(), self.crawler.stats['requests']
+        pages = self.crawler.crawl(
+            buckets, lambda rt, index: self.runtime_payload(question_id, self.lang, index, rt), "codeWithRuntime", self.sample_num,
+            done=done, on_bucket=lambda rt, codes: self.journal.record_bucket(question_id, "runtime", rt, codes)
+        )
+        instance['rt_list'] = [{"code": code, "runtime": rt} for rt, codes in zip(buckets, pages) for code in codes]
         
-        for rt, pl in instance['runtimeDistribution']['distribution']:
-            print(f"[{rt} ms]", end=" ", flush=True)
-            for index in range(self.sample_num):
-                time.sleep(0.3)
-                response = self.runtime_retrieval(question_id=question_id, lang=self.lang, index=index, runtime=rt)
-                if response and response['data']['codeWithRuntime']:
-                    instance['rt_list'] += [{
-                        "code": response['data']['codeWithRuntime']['code'],
-                        "runtime": rt
-                    }]
-                    if not response['data']['codeWithRuntime']['hasNext']: break
-                else:
-                    break
         rt_list_len = len(instance['rt_list'])
-        print(f"\n🟢 [{rt_list_len}] runtime solutions.")
+        request_rate = (self.crawler.stats['requests'] - request_count) / max(time.time() - start_time, 1e-3)
+        print(f"🟢 [{rt_list_len}] runtime solutions. [{request_rate:.1f}] requests/s")
         instance['rt_solution_count'] = rt_list_len
     
     def memory_range(self, instance):
-        instance['mm_list'] = list()
         question_id =  instance['question_id']
-        question_name = instance['name']
-        mm_count = len(instance['memoryDistribution']['distribution'])
-        print(f"[+] Memory Solutions [{mm_count}]")
+        buckets = [mm for mm, pl in instance['memoryDistribution']['distribution']]
+        print(f"[+] Memory Solutions [{len(buckets)}]")
+        
+        done = self.journal.buckets(question_id, "memory")
+        if done:
+            print(f"[+] Resuming after [{len(done)}] finished buckets")
+        
+        start_time, request_count = time.time(), self.crawler.stats['requests']
+        pages = self.crawler.crawl(
+            buckets, lambda mm, index: self.memory_payload(question_id, self.lang, index, mm), "codeWithMemory", self.sample_num,
+            done=done, on_bucket=lambda mm, codes: self.journal.record_bucket(question_id, "memory", mm, codes)
+        )
+        instance['mm_list'] = [{"code": code, "memory": mm} for mm, codes in zip(buckets, pages) for code in codes]
         
-        for mm, pl in instance['memoryDistribution']['distribution']:
-            print(f'[{mm} kb]', end=" ", flush=True)
-            for index in range(self.sample_num):
-                time.sleep(0.3)
-                response = self.memory_retrieval(question_id=question_id, lang=self.lang, index=index, memory=mm)
-                if response and response['data']['codeWithMemory']:
-                    
-                    instance['mm_list'] += [{
-                        "code": response['data']['codeWithMemory']['code'],
-                        "memory": mm
-                    }]
-                    if not response['data']['codeWithMemory']['hasNext']: break
-                else:
-                    break
         mm_list_len = len(instance['mm_list'])
-        print(f"\n🟢 [{mm_list_len}] memory solutions.")
+        request_rate = (self.crawler.stats['requests'] - request_count) / max(time.time() - start_time, 1e-3)
+        print(f"🟢 [{mm_list_len}] memory solutions. [{request_rate:.1f}] requests/s")
         instance['mm_solution_count'] = mm_list_len
     
     def construct_instance(self, question):
@@ -130,21 +141,19 @@ class LeetCodeOperation:
                 'topics': [topic['slug'] for topic in question['topicTags']],
             }
             
-            # Code Prompts
-            code_prompts = {}
-            prompts = self.prompt_retrieval(question['titleSlug'])
-            for code_snippet in prompts['data']['question']['codeSnippets']:
-                code_prompts[code_snippet['langSlug']] = code_snippet['code']
+            # Code Prompts (from the catalog, the editor data only for a question listed without them)
+            code_prompts = QuestionCatalog.code_prompts(question)
+            if self.lang not in code_prompts:
+                editor_data = self.prompt_retrieval(question['titleSlug'])
+                code_prompts = QuestionCatalog.code_prompts(editor_data['data']['question'])
             instance['code_prompt'] = code_prompts[self.lang]
                 
             # Submission Discribution
-            time.sleep(1)
             submissions = self.submission_retrieval(questionSlug=question['titleSlug'], lang=self.lang_code)
             if not submissions: 
                 print(f"[-] Can't found any submission 🟡")
                 return None
             
-            time.sleep(1)
             submission_details = self.submission_detail_retrieval(submission_id=submissions[0]['id'])
             if not submission_details:
                 print(f"[-] Can't retrieve the submission detail 🔴")
@@ -167,13 +176,17 @@ class LeetCodeOperation:
             return instance
         except json.decoder.JSONDecodeError as e:
             print("[-] construct_instance: JSONDecodeError", e)
+        except IncompleteCrawl as e:
+            # Not recorded as finished: the next run resumes from the journaled buckets
+            print(f"[-] {e}, to be resumed 🟡")
+            return None
         except Exception as e:
             print("[-] construct_instance: Error", e)
             traceback.print_exc()
             return None
         
-    def runtime_retrieval(self, question_id, lang, index, runtime):
-        runtime_payload = json.dumps({
+    def runtime_payload(self, question_id, lang, index, runtime):
+        return json.dumps({
             "query": "\n    query codeWithRuntime($questionId: Int!, $lang: String!, $runtime: Int!, $skip: Int!) {\n  codeWithRuntime(\n    questionId: $questionId\n    lang: $lang\n    runtime: $runtime\n    skip: $skip\n  ) {\n    code\n    hasPrevious\n    hasNext\n  }\n}\n    ",
             "variables": {
                 "questionId": question_id,
@@ -182,12 +195,9 @@ class LeetCodeOperation:
                 "runtime": runtime
             }
         })
-        
-        response = self.retrieval(runtime_payload)
-        return response
 
-    def memory_retrieval(self, question_id, lang, index, memory):
-        memory_payload = json.dumps({
+    def memory_payload(self, question_id, lang, index, memory):
+        return json.dumps({
             "query": """query codeWithMemory($questionId: Int!, $lang: String!, $memory: Int!, $skip: Int!) {codeWithMemory(questionId: $questionId\nlang: $lang\nmemory: $memory\nskip: $skip) {code\nhasPrevious\nhasNext\n}}""",
             "variables": {
                 "questionId": question_id,
@@ -196,9 +206,6 @@ class LeetCodeOperation:
                 "memory": memory
             }
         })
-        
-        response = self.retrieval(memory_payload)
-        return response
     
     def question_retrieval(self, start=0, range_=5000):
         question_payload = json.dumps({
@@ -209,9 +216,41 @@ class LeetCodeOperation:
         })
         
         response = self.retrieval(question_payload)
+        if not response:
+            return None
         return response['data']['problemsetQuestionList']['questions']
     
-    @vital_retry
+    def question_id_retrieval(self, start=0, range_=1000):
+        # The same listing as question_retrieval, ids only: (total, [(questionId, titleSlug)])
+        question_id_payload = json.dumps({
+            "query": "query problemsetQuestionIds($categorySlug: String, $limit: Int, $skip: Int, $filters: QuestionListFilterInput) {problemsetQuestionList: questionList(categorySlug: $categorySlug\nlimit: $limit\nskip: $skip\nfilters: $filters\n) {total: totalNum\nquestions: data {questionId\ntitleSlug}}}",
+            "variables": {
+                "categorySlug": "algorithms", "skip": start, "limit": range_, "filters": {}
+            }
+        })
+        
+        response = self.retrieval(question_id_payload)
+        if not response:
+            return None
+        question_list = response['data']['problemsetQuestionList']
+        return question_list['total'], [(int(question['questionId']), question['titleSlug']) for question in question_list['questions']]
+    
+    def refresh_catalog(self):
+        """
+        Returns False if the pipelines cannot run: the breaker opened, so every query would fail until the cooldown ends.
+        """
+        try:
+            new_count = self.catalog.refresh(self.question_id_retrieval, self.question_retrieval)
+            print(f"[+] Question catalog: [{len(self.catalog)}] questions, [{new_count}] new 🟢")
+        except LookupError as e:
+            if not len(self.catalog):
+                raise
+            print(f"[-] Question catalog not refreshed ({e}), using [{len(self.catalog)}] stored questions 🟡")
+        except CircuitOpen as e:
+            print(f"[-] Question catalog not refreshed: {e} 🔴")
+            return False
+        return True
+    
     def prompt_retrieval(self, titleSlug):
         prompt_payload = json.dumps({
             "query": "query questionEditorData($titleSlug: String!) {question(titleSlug: $titleSlug) {questionId\nquestionFrontendId\ncodeSnippets {lang\nlangSlug\ncode\n}}}",
@@ -220,37 +259,29 @@ class LeetCodeOperation:
         response = self.retrieval(prompt_payload)
         return response
 
-    @vital_retry
     def submission_retrieval(self, questionSlug, lang):
         submission_payload = json.dumps({
             "query": "query submissionList($offset: Int!, $limit: Int!, $lastKey: String, $questionSlug: String!, $lang: Int, $status: Int) {questionSubmissionList(offset: $offset\nlimit: $limit\nlastKey: $lastKey\nquestionSlug: $questionSlug\nlang: $lang\nstatus: $status\n) {submissions {id\ntitleSlug\nstatus\nstatusDisplay\nruntime\nmemory\n}}}",
             "variables": {"questionSlug": questionSlug, "status": 10, "lang": lang, "offset": 0, "limit": 1, "lastKey": None}
         })
         response_json = self.retrieval(submission_payload)
-        if not response_json['data']['questionSubmissionList']:
-            # return None
-            raise LookupError("Null Response")
+        if not response_json:
+            return None
         return response_json['data']['questionSubmissionList']['submissions']
     
-    @vital_retry
     def submission_detail_retrieval(self, submission_id):
         submission_detail_payload = json.dumps({
             "query": "query submissionDetails($submissionId: Int!) {submissionDetails(submissionId: $submissionId) {runtime\nruntimeDistribution\nmemory\nmemoryDistribution\ncode\n}}",
             "variables": {"submissionId": submission_id}
         })
         response_json = self.retrieval(submission_detail_payload)
-        if not response_json['data']['submissionDetails']:
-            # return None
-            raise LookupError("Null Response")
+        if not response_json:
+            return None
         return response_json['data']['submissionDetails']
         
-    @retry
     def retrieval(self, payload):
-        response = requests.request("GET", self.url, headers=self.leetcode_headers, data=payload)
-        response_json = response.json()
-        if not response_json['data'][next(iter(response_json['data']))]:
-            raise LookupError("Null Response")
-        return response_json
+        # None after the transport's retries
+        return self.transport.query(payload)
     
     def get_subsets(self):
         configs = get_dataset_config_names("Elfsong/venus_temp")
@@ -287,7 +318,7 @@ class LeetCodeOperation:
     
     def submit_pipeline(self, start, range_):
         instance_count = 0
-        question_list = self.question_retrieval(start, range_)
+        question_list = self.catalog.questions(start, range_)
 
         for question in question_list:           
             print(f"====================== [{self.lang}] Question:", question['frontendQuestionId'], question['questionId'], "https://leetcode.com/problems/"+question['titleSlug'])
@@ -319,10 +350,9 @@ class LeetCodeOperation:
         return instance_count
                     
     def retrieval_pipeline(self, start, range_, sample_num):
-        instances  = list()
         instance_count = 0
         self.sample_num = sample_num
-        question_list = self.question_retrieval(start, range_)
+        question_list = self.catalog.questions(start, range_)
         
         for index, question in enumerate(question_list):
             question_id = int(question['questionId'])
@@ -334,12 +364,17 @@ class LeetCodeOperation:
             if question_id in self.existing_question_ids: 
                 print(f"[+] Found [{question_id}] in [Venus] datasets, skipped 😃")
                 continue
+            elif question_id in self.journal.instances:
+                print(f"[+] Found [{question_id}] in the journal, skipped 😃")
+                continue
             else:
                 print(f"[+] [{question_id}] Retrieval Mode 🚀")
                 instance = self.construct_instance(question)
                 if instance:
-                    instances += [instance]
+                    self.journal.record_instance(instance)
         
+        # The upload shard: every finished instance in the journal, including those of an earlier crashed run
+        instances = self.journal.pending()
         if instances:
             print(f"====================== Uploading {len(instances)} instances to HF 🎉")
             ds = Dataset.from_pandas(pd.DataFrame(data=instances))
@@ -350,6 +385,9 @@ class LeetCodeOperation:
                 try:
                     ds.push_to_hub("Elfsong/venus_temp", f"{self.lang}-{ds_name}")
                     print("Dataset successfully pushed to hub 🎉")
+                    uploaded = [instance['question_id'] for instance in instances]
+                    self.journal.compact(uploaded)
+                    self.existing_question_ids.update(uploaded)
                     break
                 except Exception as e:
                     print(f"Failed to push dataset to hub (Attempt {attempt + 1}/{max_retries}): {e} 😕")
@@ -419,10 +457,15 @@ if __name__ == "__main__":
     parser.add_argument("--end", type=int, default=300)
     parser.add_argument("--batch", type=int, default=10)
     parser.add_argument("--sample_num", type=int, default=2)
+    parser.add_argument("--rate", type=float, default=8.0, help="requests per second")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--offline", action="store_true", help="serve GraphQL queries from the response cache only")
     args = parser.parse_args()
 
-    leetcode_client = LeetCodeOperation(lang=args.language, mode=args.mode)
+    leetcode_client = LeetCodeOperation(lang=args.language, mode=args.mode, rate=args.rate, concurrency=args.concurrency, offline=args.offline)
     instance_count = 0
+    if args.mode in ["submit", "statistic", "retrieval"] and not leetcode_client.refresh_catalog():
+        sys.exit(1)
     for i in tqdm(range(args.start, args.end)):
         if args.mode in ["submit", "statistic"]:
             instance_count += leetcode_client.submit_pipeline(i*args.batch, args.batch)
@@ -435,4 +478,8 @@ if __name__ == "__main__":
             print(f"Unknown Mode: {args.mode}")
     
     print(instance_count)
+    for query_name, query_stats in leetcode_client.transport.stats().items():
+        print(f"[+] {query_name}: {query_stats['requests']} requests, {query_stats['ok']} ok, {query_stats['null']} null, {query_stats['null_allowed']} allowed null, {query_stats['throttled']} throttled, {query_stats['errors']} errors, p50 {query_stats['p50_ms']:.0f} ms, p95 {query_stats['p95_ms']:.0f} ms")
+    for query_name, cache_stats in leetcode_client.cache.stats().items():
+        print(f"[+] {query_name}: {cache_stats.get('hits', 0)} cache hits, {cache_stats.get('misses', 0)} misses")
 
@@ -4,24 +4,58 @@
 
 import random
 from src.sandbox import Sandbox
+from src.result_store import ResultStore
 from datasets import load_dataset
 
 
 class SolutionEvaluator:
-    def __init__(self):
+    def __init__(self, store=None):
         self.sandbox = Sandbox()
+        self.store = store if store is not None else ResultStore()
         self.ds = load_dataset("Elfsong/venus_case", "python3")
+
+    @staticmethod
+    def settings(sample):
+        # Everything but the solution and the test suite, which are keyed separately
+        return {key: value for key, value in sample.items() if key not in ["solution", "test_cases", "functions"]}
         
-    def evaluate(self, solution, test_cases, functions):               
+    def evaluate(self, solution, test_cases, functions, adaptive_timeout=None):               
         sample = {
             "timeout": 120, 
+            "adaptive_timeout": adaptive_timeout,
             "solution": solution,
             "functions": functions,
             "test_cases": test_cases,
         }
-        results = self.sandbox.run_code_execution(sample)
-        if results[0] == 'pass' and len(results) == 3:
-            return results
+        key = ResultStore.key("execution", solution, ResultStore.suite_key(test_cases, functions), self.settings(sample))
+        results = self.store.get("execution", key)
+        if results is None:
+            results = self.sandbox.run_code_execution(sample)
+            self.store.put("execution", key, results)
+        return self.parse(results)
+
+    def evaluate_batch(self, solutions, test_cases, functions, measure=None, adaptive_timeout=None):
+        problem = {
+            "timeout": 120, 
+            "adaptive_timeout": adaptive_timeout,
+            "functions": functions,
+            "test_cases": test_cases,
+            "measure": measure,
+        }
+        # Only the solutions without a stored result go to the sandbox
+        suite, settings = ResultStore.suite_key(test_cases, functions), self.settings(problem)
+        keys = [ResultStore.key("execution", solution, suite, settings) for solution in solutions]
+        stored = self.store.get_many("execution", keys)
+        missing = [index for index, key in enumerate(keys) if key not in stored]
+        if missing:
+            results = self.sandbox.run_code_execution_batch(problem, [solutions[index] for index in missing])
+            stored.update((keys[index], result) for index, result in zip(missing, results))
+            self.store.put_many("execution", [(keys[index], result) for index, result in zip(missing, results)])
+        return [self.parse(stored[key]) for key in keys]
+
+    def parse(self, results):
+        if results[0] == 'pass':
+            return results[:3]
         else:
             return results[0], None, None
 
@@ -35,14 +69,18 @@ class SolutionEvaluator:
                 code = solution['code']
                 if 'stdin' not in code and 'Solution' in code:
                     solution_candidates += [code]
-            solution_candidates = random.sample(solution_candidates, 12)
+            # Seeded per problem, so that a re-run samples the same (stored) solutions
+            solution_candidates = random.Random(instance['question_id']).sample(solution_candidates, min(12, len(solution_candidates)))
 
-            for s_index, solution in enumerate(solution_candidates):
-                status, rt, mm = self.evaluate(solution, instance['test_cases'], instance['test_case_functions'])
+            evaluations = self.evaluate_batch(solution_candidates, instance['test_cases'], instance['test_case_functions'], adaptive_timeout=instance.get('adaptive_timeout'))
+            for s_index, (status, rt, mm) in enumerate(evaluations):
                 if status == 'pass':
                     print(f"[{s_index+1}/{len(solution_candidates)}] Passed 🟢 [{str(round(rt, 4))} ms]\t[{str(round(mm, 2))} kb]")
                 else:
                     print(f"[{s_index+1}/{len(solution_candidates)}] Failed 🔴[{status}]")
+
+        stats = self.store.stats()
+        print(f"[+] Result store hit rate: {stats['hit_rate']} ({stats['hits']} hits, {stats['misses']} misses)")
     
 if __name__ == "__main__":
     evaluator = SolutionEvaluator()
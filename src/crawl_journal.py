@@ -0,0 +1,114 @@
+# coding: utf-8
+
+# Append-only checkpoint journal of a retrieval crawl, so that a crash or an expired cookie costs at most the bucket
+# in flight instead of a whole batch of problems.
+#
+# One JSON record per line, flushed and fsynced as soon as it is written:
+#   {"type": "bucket", "question_id": ..., "kind": "runtime" | "memory", "bucket": ..., "codes": [...]}
+#   {"type": "instance", "question_id": ..., "instance": {...}}
+# Buckets without codes are not recorded, so that a resumed crawl retrieves them again rather than taking a bucket
+# emptied by throttling or an expired cookie for a finished one. A torn last line (a crash mid-write) is cut off when the journal is opened again. The finished instances form the next
+# upload shard; once it is uploaded, compaction drops the records of its questions by rewriting the journal aside and
+# renaming it over the old one.
+
+from collections import defaultdict
+from typing import Dict, List
+import threading
+import json
+import os
+
+
+class CrawlJournal(object):
+    """
+    Usage:
+        journal = CrawlJournal("python3")
+        done = journal.buckets(question_id, "runtime")        # {bucket: codes} finished before a crash
+        journal.record_bucket(question_id, "runtime", bucket, codes)
+        journal.record_instance(instance)
+        shard = journal.pending()                             # finished instances not uploaded yet: the upload shard
+        journal.compact(question_ids)                         # after uploading them
+    """
+
+    def __init__(self, name, directory=None):
+        directory = directory or os.getenv("VENUS_JOURNAL") or os.path.join(os.path.expanduser("~"), ".cache", "venus", "journal")
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{name}.jsonl")
+        self.lock = threading.Lock()
+
+        self.bucket_records = defaultdict(dict)
+        self.instances = dict()
+        records, size = self.load()
+        for record in records:
+            self.apply(record)
+        if os.path.exists(self.path) and os.path.getsize(self.path) > size:
+            # Torn write of the last record: appending after it would corrupt the next one
+            os.truncate(self.path, size)
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def load(self):
+        """
+        Returns the complete records and the size in bytes they take.
+        """
+        records, size = list(), 0
+        if not os.path.exists(self.path):
+            return records, size
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("Torn record")
+                    records.append(json.loads(line))
+                except ValueError as e:
+                    break
+                size += len(line)
+        return records, size
+
+    def apply(self, record):
+        if record['type'] == "bucket":
+            self.bucket_records[record['question_id'], record['kind']][record['bucket']] = record['codes']
+        elif record['type'] == "instance":
+            self.instances[record['question_id']] = record['instance']
+
+    def append(self, record):
+        with self.lock:
+            self.file.write(json.dumps(record) + "\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.apply(record)
+
+    def buckets(self, question_id, kind) -> Dict:
+        with self.lock:
+            return dict(self.bucket_records.get((question_id, kind), dict()))
+
+    def record_bucket(self, question_id, kind, bucket, codes):
+        if not codes:
+            return
+        self.append(dict(type="bucket", question_id=question_id, kind=kind, bucket=bucket, codes=codes))
+
+    def record_instance(self, instance):
+        self.append(dict(type="instance", question_id=instance['question_id'], instance=instance))
+
+    def pending(self) -> List[Dict]:
+        with self.lock:
+            return list(self.instances.values())
+
+    def compact(self, question_ids):
+        """
+        Drops every record of the given (uploaded) questions. Records of unfinished questions are kept.
+        """
+        question_ids = set(question_ids)
+        with self.lock:
+            self.file.close()
+            records = [record for record in self.load()[0] if record['question_id'] not in question_ids]
+            temporary = self.path + ".tmp"
+            with open(temporary, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, self.path)
+
+            self.bucket_records, self.instances = defaultdict(dict), dict()
+            for record in records:
+                self.apply(record)
+            self.file = open(self.path, "a", encoding="utf-8")
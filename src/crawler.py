@@ -0,0 +1,159 @@
+# coding: utf-8
+
+# Concurrent retrieval of the solutions behind LeetCode's runtime and memory distributions.
+#
+# Every distribution bucket is paged with `skip` until `hasNext` is false. Buckets are crawled concurrently under a
+# shared token bucket (requests per second) and a concurrency cap. Pages within a bucket stay sequential, and results
+# come back in bucket order, exactly as a serial crawl produces them. Throttling answers (HTTP 429, or null data, which
+# is how the endpoint usually throttles: a retry then succeeds) halve the request rate; successes bring it back up step by
+# step. Null data that persists over every retry leaves the rate alone, but counts towards the transport's breaker.
+#
+# Requests go through the shared GraphQLTransport (src/graphql_transport.py), which owns the limiter.
+
+from collections import Counter
+from typing import List, Optional
+import threading
+import asyncio
+import time
+
+
+class IncompleteCrawl(Exception):
+    """
+    Raised by SolutionCrawler.crawl when pages failed in some buckets. The buckets that did complete were reported.
+    """
+    def __init__(self, buckets):
+        super().__init__(f"{len(buckets)} buckets cut short by failed pages")
+        self.buckets = buckets
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket of `rate` requests per second with bursts of up to `burst` requests. The rate adapts
+    between `min_rate` and the configured rate: halved by slow_down(), raised by a twentieth by speed_up().
+    Shared by the concurrent crawler (acquire_async) and plain blocking queries (acquire).
+    """
+
+    def __init__(self, rate, burst=1, min_rate=0.2):
+        self.max_rate = self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Takes a token, possibly ahead of time. Returns how long to wait before using it.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def acquire(self):
+        time.sleep(self.reserve())
+
+    async def acquire_async(self):
+        await asyncio.sleep(self.reserve())
+
+    def slow_down(self):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def speed_up(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class SolutionCrawler(object):
+    """
+    Usage:
+        transport = GraphQLTransport(headers, limiter=TokenBucket(8, burst=4), pool_size=8)
+        crawler = SolutionCrawler(transport, concurrency=8)
+        pages = crawler.crawl(buckets, lambda bucket, index: payload, "codeWithRuntime", sample_num)
+        # pages[i]: the codes of buckets[i], in `skip` order; IncompleteCrawl if a page could not be retrieved
+    """
+
+    def __init__(self, transport, concurrency=8, max_retries=3):
+        self.transport = transport
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.stats = Counter()
+
+    def crawl(self, buckets, payload, field, sample_num, done=None, on_bucket=None) -> List[List[str]]:
+        """
+        Pages through every bucket: payload(bucket, index) is the GraphQL payload of page `index`, and `field` the key
+        of its result under 'data'. A bucket ends at sample_num pages, at hasNext false, or at a page that stayed null
+        after the first one. A first page that stayed null fails the bucket: a bucket of the distribution has solutions.
+
+        Buckets in `done` ({bucket: codes}, e.g. from a CrawlJournal) are not crawled again. on_bucket(bucket, codes) is
+        called for every bucket that completed. A bucket cut short by a failed page is not, and once every bucket is
+        done, IncompleteCrawl is raised: the caller must not take the result as complete, and crawls the remaining
+        buckets again next time.
+        """
+        pages = asyncio.run(self.crawl_async(buckets, payload, field, sample_num, done or dict(), on_bucket))
+        incomplete = [bucket for bucket, codes in zip(buckets, pages) if codes is None]
+        if incomplete:
+            raise IncompleteCrawl(incomplete)
+        return pages
+
+    async def crawl_async(self, buckets, payload, field, sample_num, done, on_bucket) -> List[List[str]]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*[
+            self.crawl_bucket(bucket, payload, field, sample_num, semaphore, on_bucket) if bucket not in done else
+            SolutionCrawler.finished(done[bucket])
+            for bucket in buckets
+        ])
+
+    @staticmethod
+    async def finished(codes) -> List[str]:
+        return codes
+
+    async def crawl_bucket(self, bucket, payload, field, sample_num, semaphore, on_bucket) -> Optional[List[str]]:
+        """
+        The codes of a bucket, or None if a page failed.
+        """
+        codes = list()
+        for index in range(sample_num):
+            async with semaphore:
+                data = await self.page(payload(bucket, index), field)
+            if data is None:
+                return None
+            if not data:
+                if index == 0:
+                    self.stats['failed'] += 1
+                    return None
+                break
+            codes.append(data['code'])
+            if not data['hasNext']:
+                break
+        if on_bucket is not None:
+            on_bucket(bucket, codes)
+        return codes
+
+    async def page(self, payload, field):
+        """
+        One page, an empty dict if it stayed null over max_retries attempts (end of the bucket), or None if it could
+        not be retrieved. HTTP failures are retried by the transport.
+        """
+        for attempt in range(self.max_retries):
+            self.stats['requests'] += 1
+            response = await self.transport.query_async(payload, allow_null=True)
+            data = response['data'][field] if response is not None else None
+            if data:
+                if attempt > 0:
+                    # The null data was throttling after all
+                    self.stats['throttled'] += 1
+                    self.transport.throttled()
+                return data
+            if response is None:
+                self.stats['failed'] += 1
+                return None
+
+            # Throttling or a bucket without solutions: only the retry tells
+            self.stats['empty'] += 1
+            await asyncio.sleep(self.transport.backoff(attempt))
+        self.transport.failed()
+        return dict()
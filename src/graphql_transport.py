@@ -0,0 +1,202 @@
+# coding: utf-8
+
+# The one client of LeetCode's GraphQL endpoint, shared by the crawling and formatting scripts.
+#
+# Queries go through a pooled keep-alive session (compressed responses), under an optional shared rate limiter (see
+# src/crawler.py). Failed attempts are retried with jittered exponential backoff. A run of failures (errors or null
+# data, which is what an expired cookie or a blocked client gets) opens a circuit breaker, so that a crawl stops early
+# instead of recording empty problems. Every query type (the GraphQL operation name) has its own latency counters. With a
+# ResponseCache (src/response_cache.py), cached responses are served without a request, and in offline mode only those.
+
+from collections import Counter, defaultdict, deque
+from typing import Dict, Optional
+import threading
+import requests
+import asyncio
+import random
+import json
+import time
+import re
+
+
+class CircuitOpen(Exception):
+    """
+    Raised instead of querying while the breaker is open.
+    """
+
+
+class GraphQLTransport(object):
+    """
+    Usage:
+        transport = GraphQLTransport(headers)
+        response = transport.query(payload)         # response JSON, or None after max_retries failed attempts
+        print(transport.stats())                    # per query type: requests, failures, latency
+
+    A response is a failure when its first field under 'data' is null, unless the query allows it (allow_null=True):
+    then the response is returned, but neither resets the breaker nor speeds up the limiter. The caller tells an empty
+    result from throttling, reports throttling with throttled() and null data that persisted over its retries with
+    failed(), which counts towards the breaker. Throttled requests (HTTP 429) are retried up to max_throttled times on
+    top of the max_retries attempts, since the limiter slows down in the meantime.
+
+    With a cache, a cached response is returned as is, and every response with data is stored. An offline cache never
+    lets a query through: a miss returns None.
+    """
+
+    url = "https://leetcode.com/graphql/"
+
+    def __init__(self, headers, url=None, method="GET", limiter=None, cache=None, pool_size=8, max_retries=3,
+                 max_throttled=10, timeout=30, base_delay=1.0, max_delay=30.0, breaker_threshold=10, breaker_cooldown=60):
+        self.url = url or GraphQLTransport.url
+        self.method = method
+        self.limiter = limiter
+        self.cache = cache
+        self.max_retries = max_retries
+        self.max_throttled = max_throttled
+        self.timeout = timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers['accept-encoding'] = "gzip, deflate"
+        # Per request, so that unset values (e.g. no cookie) are dropped
+        self.headers = headers
+
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.open_until = 0.0
+        self.counters = defaultdict(Counter)
+        # Recent latencies per query type, for the percentiles
+        self.latencies = defaultdict(lambda: deque(maxlen=512))
+
+    @staticmethod
+    def query_name(payload) -> str:
+        query = json.loads(payload).get("query", "") if isinstance(payload, str) else payload.get("query", "")
+        match = re.search(r"(?:query|mutation)\s+(\w+)", query)
+        return match.group(1) if match else "anonymous"
+
+    def query(self, payload, allow_null=False) -> Optional[Dict]:
+        name = GraphQLTransport.query_name(payload)
+        if self.cache is not None:
+            response = self.cache.get(name, payload)
+            if response is not None or self.cache.offline:
+                return response
+        attempts = Counter()
+        while attempts['failed'] < self.max_retries and attempts['throttled'] <= self.max_throttled:
+            self.check_breaker()
+            if self.limiter is not None:
+                self.limiter.acquire()
+            outcome, response, retry_after = self.attempt(name, payload, allow_null)
+            if response is not None:
+                return response
+            attempts['throttled' if outcome == "throttled" else 'failed'] += 1
+            time.sleep(self.backoff(sum(attempts.values()) - 1, retry_after))
+        return None
+
+    async def query_async(self, payload, allow_null=False) -> Optional[Dict]:
+        name = GraphQLTransport.query_name(payload)
+        if self.cache is not None:
+            response = self.cache.get(name, payload)
+            if response is not None or self.cache.offline:
+                return response
+        attempts = Counter()
+        while attempts['failed'] < self.max_retries and attempts['throttled'] <= self.max_throttled:
+            self.check_breaker()
+            if self.limiter is not None:
+                await self.limiter.acquire_async()
+            outcome, response, retry_after = await asyncio.to_thread(self.attempt, name, payload, allow_null)
+            if response is not None:
+                return response
+            attempts['throttled' if outcome == "throttled" else 'failed'] += 1
+            await asyncio.sleep(self.backoff(sum(attempts.values()) - 1, retry_after))
+        return None
+
+    def attempt(self, name, payload, allow_null):
+        """
+        One request. Returns (outcome, response JSON or None, Retry-After of a throttled request).
+        """
+        start_time = time.perf_counter()
+        outcome, response, retry_after = "error", None, None
+        try:
+            http_response = self.session.request(self.method, self.url, headers=self.headers, data=payload, timeout=self.timeout)
+            if http_response.status_code == 429:
+                outcome, retry_after = "throttled", http_response.headers.get("Retry-After")
+            elif http_response.status_code < 500:
+                response = http_response.json()
+                data = response['data']
+                if data[next(iter(data))] is None:
+                    outcome, response = ("null_allowed", response) if allow_null else ("null", None)
+                else:
+                    outcome = "ok"
+        except (requests.RequestException, ValueError, KeyError, TypeError, StopIteration) as e:
+            response = None
+
+        latency = (time.perf_counter() - start_time) * 10**3
+        with self.lock:
+            self.counters[name]['requests'] += 1
+            self.counters[name][outcome] += 1
+            self.counters[name]['total_ms'] += latency
+            self.latencies[name].append(latency)
+            if outcome == "ok":
+                self.failures = 0
+            elif outcome in ("error", "null"):
+                self.count_failure()
+        if outcome == "ok" and self.cache is not None:
+            self.cache.put(name, payload, response)
+        if self.limiter is not None:
+            if outcome == "ok":
+                self.limiter.speed_up()
+            elif outcome == "throttled":
+                self.limiter.slow_down()
+        return outcome, response, retry_after
+
+    def throttled(self):
+        """
+        Reported by a caller that found out that a null response was throttling.
+        """
+        if self.limiter is not None:
+            self.limiter.slow_down()
+
+    def failed(self):
+        """
+        Reported by a caller whose allowed null data persisted over every retry (e.g. an expired cookie).
+        """
+        with self.lock:
+            self.count_failure()
+
+    def count_failure(self):
+        # Under the lock
+        self.failures += 1
+        if self.failures >= self.breaker_threshold:
+            # Reopened by the first failure after the cooldown
+            self.open_until = time.monotonic() + self.breaker_cooldown
+
+    def check_breaker(self):
+        with self.lock:
+            remaining = self.open_until - time.monotonic()
+        if remaining > 0:
+            raise CircuitOpen(f"{self.failures} failed queries in a row, paused for another {remaining:.0f}s")
+
+    def backoff(self, attempt, retry_after=None) -> float:
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError) as e:
+            # Full jitter, so that concurrent retries do not come back in lockstep
+            return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def stats(self) -> Dict:
+        with self.lock:
+            stats = dict()
+            for name, counter in self.counters.items():
+                latencies = sorted(self.latencies[name])
+                stats[name] = dict(
+                    requests=counter['requests'], ok=counter['ok'], null=counter['null'], null_allowed=counter['null_allowed'],
+                    throttled=counter['throttled'], errors=counter['error'],
+                    mean_ms=counter['total_ms'] / counter['requests'],
+                    p50_ms=latencies[len(latencies) // 2], p95_ms=latencies[int(len(latencies) * 0.95)],
+                )
+            return stats
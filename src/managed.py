@@ -0,0 +1,716 @@
+# coding: utf-8
+
+# Managed-runtime backends (Java, JavaScript) of the sandbox.
+#
+# Starting a JVM or a node process costs more than most solutions, so each language keeps a few warm VM workers
+# running. A worker listens on a Unix socket and serves one job per connection: it loads the solution into a fresh
+# class loader (Java) or vm context (JavaScript), runs the test suite twice (a JIT warmup pass, then the timed
+# steady-state pass) and closes the connection. The sandbox child connects to the socket before its reliability guard,
+# so the test case functions stay in Python, as with the native backends.
+#
+# Request:  "<source bytes> <token bytes> <method> <return tree> <param tree>...\n" + source + tokens
+#           trees are dotted kinds ("list.list.int", "void"), tokens use the wire format of src/native.py
+# Response: "<call_ns> <output tokens>" per test case of the steady-state pass, then the status line
+#           "#<stats|error|compile> <escape> <compile_ns> <warmup_ns> <peak_bytes> <hex message or ->"
+# A worker that reports an escape (leaked threads or globals, a VM error) exits after the job.
+
+from typing import Dict
+import subprocess
+import itertools
+import threading
+import tempfile
+import atexit
+import select
+import signal
+import json
+import os
+import re
+
+try:
+    from src.utils import generate_hash
+    from src.native import NativeBuilder, Wire, SignatureException, CompileException
+except ImportError:
+    # Running from inside src/ (e.g. data_synthesis.py)
+    from utils import generate_hash
+    from native import NativeBuilder, Wire, SignatureException, CompileException
+
+
+JAVA_IMPORTS = """import java.util.*;
+import java.util.function.*;
+import java.util.stream.*;
+import java.math.*;
+"""
+
+JAVA_WORKER = r"""import java.io.*;
+import java.lang.reflect.*;
+import java.net.*;
+import java.nio.channels.*;
+import java.nio.charset.StandardCharsets;
+import java.util.*;
+import javax.tools.*;
+
+public class VenusWorker {
+    static class CompileError extends Exception {
+        CompileError(String message) { super(message); }
+    }
+
+    static class Tokens {
+        final String[] items;
+        int index = 0;
+        Tokens(String[] items) { this.items = items; }
+        String next() { return items[index++]; }
+    }
+
+    public static void main(String[] args) throws Exception {
+        ServerSocketChannel server = ServerSocketChannel.open(StandardProtocolFamily.UNIX);
+        server.bind(UnixDomainSocketAddress.of(args[0]));
+        System.out.println("ready");
+        System.out.flush();
+        // Nobody reads the pipes after the handshake
+        System.setOut(new PrintStream(OutputStream.nullOutputStream()));
+        System.setErr(new PrintStream(OutputStream.nullOutputStream()));
+        boolean escape = false;
+        while (!escape) {
+            try (SocketChannel channel = server.accept()) {
+                OutputStream out = Channels.newOutputStream(channel);
+                escape = serve(Channels.newInputStream(channel), out);
+                out.flush();
+            }
+        }
+        System.exit(0);
+    }
+
+    static boolean serve(InputStream in, OutputStream out) throws IOException {
+        String[] header = readLine(in).split(" ");
+        String source = new String(in.readNBytes(Integer.parseInt(header[0])), StandardCharsets.UTF_8);
+        String[] tokens = new String(in.readNBytes(Integer.parseInt(header[1])), StandardCharsets.UTF_8).trim().split("\\s+");
+        String name = header[2];
+        int arity = header.length - 4;
+
+        int threads = Thread.activeCount();
+        boolean escape = false;
+        long compileNs = 0, warmupNs = 0, peak = 0;
+        String status = "stats", message = "";
+        StringBuilder lines = new StringBuilder();
+        try {
+            long start = System.nanoTime();
+            Class<?> solution = compile(source);
+            Method method = find(solution, name, arity);
+            Constructor<?> constructor = solution.getDeclaredConstructor();
+            constructor.setAccessible(true);
+            compileNs = System.nanoTime() - start;
+
+            Type[] types = method.getGenericParameterTypes();
+            Runtime runtime = Runtime.getRuntime();
+            System.gc();
+            long base = runtime.totalMemory() - runtime.freeMemory();
+            for (int pass = 0; pass < 2; pass++) {
+                Tokens reader = new Tokens(tokens);
+                int count = Integer.parseInt(reader.next());
+                lines.setLength(0);
+                for (int index = 0; index < count; index++) {
+                    Object[] arguments = new Object[types.length];
+                    for (int i = 0; i < types.length; i++) {
+                        arguments[i] = decode(reader, types[i]);
+                    }
+                    Object instance = constructor.newInstance();
+                    long callStart = System.nanoTime();
+                    Object output = method.invoke(instance, arguments);
+                    long callNs = System.nanoTime() - callStart;
+                    peak = Math.max(peak, runtime.totalMemory() - runtime.freeMemory() - base);
+                    if (pass == 0) {
+                        warmupNs += callNs;
+                    }
+                    lines.append(callNs);
+                    if (method.getReturnType() != void.class) {
+                        encode(output, lines);
+                    }
+                    lines.append('\n');
+                }
+            }
+        } catch (CompileError e) {
+            status = "compile";
+            message = e.getMessage();
+        } catch (Throwable e) {
+            Throwable cause = e instanceof InvocationTargetException ? e.getCause() : e;
+            status = "error";
+            message = String.valueOf(cause);
+            escape = cause instanceof VirtualMachineError;
+            lines.setLength(0);
+        }
+
+        escape = escape || Thread.activeCount() > threads;
+        lines.append('#').append(status).append(' ').append(escape ? 1 : 0).append(' ').append(compileNs).append(' ')
+             .append(warmupNs).append(' ').append(Math.max(peak, 0)).append(' ').append(hex(message)).append('\n');
+        out.write(lines.toString().getBytes(StandardCharsets.UTF_8));
+        return escape;
+    }
+
+    static String readLine(InputStream in) throws IOException {
+        ByteArrayOutputStream line = new ByteArrayOutputStream();
+        int b;
+        while ((b = in.read()) != -1 && b != '\n') {
+            line.write(b);
+        }
+        return line.toString(StandardCharsets.UTF_8);
+    }
+
+    // Every job gets its own class loader, so static state of a previous solution never leaks into the next one
+    static Class<?> compile(String source) throws Exception {
+        JavaCompiler compiler = ToolProvider.getSystemJavaCompiler();
+        if (compiler == null) {
+            throw new CompileError("no system Java compiler (a JDK is required)");
+        }
+        Map<String, ByteArrayOutputStream> classes = new HashMap<>();
+        JavaFileManager manager = new ForwardingJavaFileManager<JavaFileManager>(compiler.getStandardFileManager(null, null, null)) {
+            @Override
+            public JavaFileObject getJavaFileForOutput(Location location, String className, JavaFileObject.Kind kind, FileObject sibling) {
+                ByteArrayOutputStream buffer = new ByteArrayOutputStream();
+                classes.put(className, buffer);
+                return new SimpleJavaFileObject(URI.create("mem:///" + className.replace('.', '/') + kind.extension), kind) {
+                    @Override
+                    public OutputStream openOutputStream() { return buffer; }
+                };
+            }
+        };
+        JavaFileObject file = new SimpleJavaFileObject(URI.create("string:///Solution.java"), JavaFileObject.Kind.SOURCE) {
+            @Override
+            public CharSequence getCharContent(boolean ignoreEncodingErrors) { return source; }
+        };
+        DiagnosticCollector<JavaFileObject> diagnostics = new DiagnosticCollector<>();
+        if (!compiler.getTask(null, manager, diagnostics, List.of("-proc:none"), null, List.of(file)).call()) {
+            StringBuilder errors = new StringBuilder();
+            for (Diagnostic<? extends JavaFileObject> diagnostic : diagnostics.getDiagnostics()) {
+                errors.append(diagnostic.toString()).append('\n');
+            }
+            throw new CompileError(errors.toString());
+        }
+        ClassLoader loader = new ClassLoader(VenusWorker.class.getClassLoader()) {
+            @Override
+            protected Class<?> findClass(String className) throws ClassNotFoundException {
+                ByteArrayOutputStream buffer = classes.get(className);
+                if (buffer == null) {
+                    throw new ClassNotFoundException(className);
+                }
+                byte[] bytes = buffer.toByteArray();
+                return defineClass(className, bytes, 0, bytes.length);
+            }
+        };
+        return loader.loadClass("Solution");
+    }
+
+    static Method find(Class<?> solution, String name, int arity) throws CompileError {
+        for (Method method : solution.getDeclaredMethods()) {
+            if (method.getName().equals(name) && method.getParameterCount() == arity) {
+                method.setAccessible(true);
+                return method;
+            }
+        }
+        throw new CompileError("Solution has no method " + name + " with " + arity + " parameters");
+    }
+
+    static Object decode(Tokens tokens, Type type) {
+        if (type instanceof ParameterizedType) {
+            Type item = ((ParameterizedType) type).getActualTypeArguments()[0];
+            int length = Integer.parseInt(tokens.next());
+            List<Object> items = new ArrayList<>(length);
+            for (int i = 0; i < length; i++) {
+                items.add(decode(tokens, item));
+            }
+            return items;
+        }
+        Class<?> c = (Class<?>) type;
+        if (c.isArray()) {
+            int length = Integer.parseInt(tokens.next());
+            Object items = Array.newInstance(c.getComponentType(), length);
+            for (int i = 0; i < length; i++) {
+                Array.set(items, i, decode(tokens, c.getComponentType()));
+            }
+            return items;
+        }
+        String token = tokens.next();
+        if (c == int.class || c == Integer.class) return Integer.parseInt(token);
+        if (c == long.class || c == Long.class) return Long.parseLong(token);
+        if (c == double.class || c == Double.class) return Double.parseDouble(token);
+        if (c == float.class || c == Float.class) return Float.parseFloat(token);
+        if (c == boolean.class || c == Boolean.class) return token.equals("1");
+        if (c == char.class || c == Character.class) return (char) Integer.parseInt(token);
+        if (c == String.class) return unhex(token);
+        throw new IllegalArgumentException("unsupported parameter type " + c.getName());
+    }
+
+    static void encode(Object value, StringBuilder out) {
+        if (value == null) {
+            throw new IllegalArgumentException("null output");
+        } else if (value instanceof Boolean) {
+            out.append((Boolean) value ? " 1" : " 0");
+        } else if (value instanceof Character) {
+            out.append(' ').append((int) (Character) value);
+        } else if (value instanceof String) {
+            out.append(' ').append(hex((String) value));
+        } else if (value instanceof Number) {
+            out.append(' ').append(value);
+        } else if (value instanceof Collection) {
+            out.append(' ').append(((Collection<?>) value).size());
+            for (Object item : (Collection<?>) value) {
+                encode(item, out);
+            }
+        } else if (value.getClass().isArray()) {
+            int length = Array.getLength(value);
+            out.append(' ').append(length);
+            for (int i = 0; i < length; i++) {
+                encode(Array.get(value, i), out);
+            }
+        } else {
+            throw new IllegalArgumentException("unsupported output type " + value.getClass().getName());
+        }
+    }
+
+    static String hex(String text) {
+        byte[] bytes = text.getBytes(StandardCharsets.UTF_8);
+        if (bytes.length == 0) {
+            return "-";
+        }
+        StringBuilder out = new StringBuilder();
+        for (byte b : bytes) {
+            out.append(String.format("%02x", b));
+        }
+        return out.toString();
+    }
+
+    static String unhex(String token) {
+        if (token.equals("-")) {
+            return "";
+        }
+        byte[] bytes = new byte[token.length() / 2];
+        for (int i = 0; i < bytes.length; i++) {
+            bytes[i] = (byte) Integer.parseInt(token.substring(2 * i, 2 * i + 2), 16);
+        }
+        return new String(bytes, StandardCharsets.UTF_8);
+    }
+}
+"""
+
+JAVASCRIPT_WORKER = r""""use strict";
+const net = require("net");
+const v8 = require("v8");
+const vm = require("vm");
+
+const globals = Object.getOwnPropertyNames(globalThis).join(",");
+
+class Tokens {
+    constructor(text) { this.items = text.trim().split(/\s+/); this.index = 0; }
+    next() { return this.items[this.index++]; }
+}
+
+function hex(text) {
+    return Buffer.from(String(text), "utf8").toString("hex") || "-";
+}
+
+function decode(tokens, tree) {
+    const kind = tree[0];
+    if (kind === "list") {
+        const items = new Array(Number(tokens.next()));
+        for (let i = 0; i < items.length; i++) items[i] = decode(tokens, tree.slice(1));
+        return items;
+    }
+    const token = tokens.next();
+    if (kind === "bool") return token === "1";
+    if (kind === "str") return token === "-" ? "" : Buffer.from(token, "hex").toString("utf8");
+    if (kind === "char") return String.fromCodePoint(Number(token));
+    return Number(token);
+}
+
+function encode(value, tree, out) {
+    const kind = tree[0];
+    if (value === null || value === undefined) throw new TypeError("null output");
+    if (kind === "list") {
+        out.push(String(value.length));
+        for (const item of value) encode(item, tree.slice(1), out);
+    } else if (kind === "bool") {
+        out.push(value ? "1" : "0");
+    } else if (kind === "str") {
+        out.push(hex(value));
+    } else if (kind === "char") {
+        out.push(String(String(value).codePointAt(0)));
+    } else if (kind === "int") {
+        out.push(BigInt(value).toString());
+    } else {
+        out.push(String(value));
+    }
+}
+
+function serve(source, tokens, header) {
+    const [name, returns, ...params] = header;
+    const returnTree = returns === "void" ? null : returns.split(".");
+    const paramTrees = params.map((param) => param.split("."));
+    const resources = process.getActiveResourcesInfo().length;
+    let status = "stats", message = "", lines = [];
+    let compileNs = 0n, warmupNs = 0n, peak = 0;
+
+    try {
+        const start = process.hrtime.bigint();
+        let method;
+        try {
+            // Every job gets its own context, so globals of a previous solution never leak into the next one
+            method = new vm.Script(source + "\n;(" + name + ")", { filename: "solution.js" }).runInContext(vm.createContext({}));
+            if (typeof method !== "function") throw new TypeError(name + " is not a function");
+        } catch (e) {
+            status = "compile";
+            throw e;
+        }
+        compileNs = process.hrtime.bigint() - start;
+
+        if (global.gc) global.gc();
+        const base = v8.getHeapStatistics().used_heap_size;
+        for (let pass = 0; pass < 2; pass++) {
+            const reader = new Tokens(tokens);
+            const count = Number(reader.next());
+            lines = [];
+            for (let index = 0; index < count; index++) {
+                const args = paramTrees.map((tree) => decode(reader, tree));
+                const callStart = process.hrtime.bigint();
+                const output = method.apply(null, args);
+                const callNs = process.hrtime.bigint() - callStart;
+                peak = Math.max(peak, v8.getHeapStatistics().used_heap_size - base);
+                if (pass === 0) warmupNs += callNs;
+                const line = [String(callNs)];
+                if (returnTree !== null) encode(output, returnTree, line);
+                lines.push(line.join(" "));
+            }
+        }
+    } catch (e) {
+        status = status === "compile" ? "compile" : "error";
+        message = String(e);
+        lines = [];
+    }
+
+    const escape = Object.getOwnPropertyNames(globalThis).join(",") !== globals
+                    || process.getActiveResourcesInfo().length > resources;
+    lines.push(`#${status} ${escape ? 1 : 0} ${compileNs} ${warmupNs} ${peak} ${hex(message)}`);
+    return [lines.join("\n") + "\n", escape];
+}
+
+const server = net.createServer((socket) => {
+    let buffer = Buffer.alloc(0);
+    socket.on("data", (chunk) => {
+        buffer = Buffer.concat([buffer, chunk]);
+        const end = buffer.indexOf(10);
+        if (end < 0) return;
+        const header = buffer.subarray(0, end).toString("utf8").split(" ");
+        const sourceLength = Number(header[0]), tokensLength = Number(header[1]);
+        if (buffer.length < end + 1 + sourceLength + tokensLength) return;
+        const source = buffer.subarray(end + 1, end + 1 + sourceLength).toString("utf8");
+        const tokens = buffer.subarray(end + 1 + sourceLength, end + 1 + sourceLength + tokensLength).toString("utf8");
+        const [response, escape] = serve(source, tokens, header.slice(2));
+        socket.end(response, () => { if (escape) process.exit(0); });
+    });
+    socket.on("error", () => {});
+});
+server.listen(process.argv[2], () => { process.stdout.write("ready\n"); });
+"""
+
+
+class ManagedWorker(object):
+    def __init__(self, lang, process, address):
+        self.lang = lang
+        self.process = process
+        self.address = address
+        self.jobs = 0
+
+
+class ManagedRuntime(object):
+    """
+    Warm Java and JavaScript VM workers, at most `n_workers` per language. A worker is recycled after `max_jobs` jobs
+    or when a job escapes it (a timeout, a crash, leaked threads or globals).
+    """
+    languages = {
+        "java": {
+            "worker": ("VenusWorker.java", JAVA_WORKER),
+            "build": ["javac", "-d", "{worker_dir}", "{source}"],
+            "command": ["java", "-XX:+UseSerialGC", "-Xss64m", "-Xmx2g", "-cp", "{worker_dir}", "VenusWorker", "{address}"],
+            "version": ["java", "-version"],
+        },
+        "javascript": {
+            "worker": ("worker.js", JAVASCRIPT_WORKER),
+            "build": None,
+            "command": ["node", "--expose-gc", "--max-old-space-size=2048", "{source}", "{address}"],
+            "version": ["node", "--version"],
+        },
+    }
+
+    def __init__(self, cache_dir=None, n_workers=None, max_jobs=100, start_timeout=60):
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "venus_build")
+        self.n_workers = n_workers or os.cpu_count()
+        self.max_jobs = max_jobs
+        self.start_timeout = start_timeout
+        self.socket_dir = None
+        self.versions = dict()
+        self.installed = dict()
+        self.workers = set()
+        self.idle = {lang: list() for lang in ManagedRuntime.languages}
+        self.condition = threading.Condition()
+        self.ids = itertools.count()
+        # Forked sandbox processes inherit this object, but only the creator owns the workers
+        self.owner = os.getpid()
+        atexit.register(self.close)
+
+    def version(self, lang):
+        with self.condition:
+            if lang not in self.versions:
+                try:
+                    process = subprocess.run(ManagedRuntime.languages[lang]['version'], capture_output=True, timeout=30)
+                    # java -version prints to stderr
+                    self.versions[lang] = (process.stdout + process.stderr).decode().strip()
+                except (OSError, subprocess.TimeoutExpired) as e:
+                    self.versions[lang] = None
+            return self.versions[lang]
+
+    def install(self, lang) -> str:
+        """
+        Writes (and for Java compiles) the worker once per runtime version. Returns its directory.
+        """
+        config = ManagedRuntime.languages[lang]
+        version = self.version(lang)
+        if version is None:
+            raise CompileException(f"{config['command'][0]} is not available")
+
+        with self.condition:
+            if lang in self.installed:
+                return self.installed[lang]
+            filename, source = config['worker']
+            worker_dir = os.path.join(self.cache_dir, "vm", lang, generate_hash(json.dumps([version, config['build'], source])))
+            source_path = os.path.join(worker_dir, filename)
+            if not os.path.exists(os.path.join(worker_dir, "ready")):
+                os.makedirs(worker_dir, exist_ok=True)
+                with open(source_path, "w") as f:
+                    f.write(source)
+                if config['build'] is not None:
+                    command = [part.format(worker_dir=worker_dir, source=source_path) for part in config['build']]
+                    process = subprocess.run(command, capture_output=True, timeout=300)
+                    if process.returncode != 0:
+                        raise CompileException(f"{lang} worker: {process.stderr.decode(errors='replace')[-2000:]}")
+                open(os.path.join(worker_dir, "ready"), "w").close()
+            self.installed[lang] = worker_dir
+            return worker_dir
+
+    def start(self, lang) -> ManagedWorker:
+        worker_dir = self.install(lang)
+        config = ManagedRuntime.languages[lang]
+        with self.condition:
+            if self.socket_dir is None:
+                # Socket paths are limited to ~100 bytes, so they get a short directory of their own
+                self.socket_dir = tempfile.mkdtemp(prefix="venus_vm_")
+            address = os.path.join(self.socket_dir, f"{lang}-{next(self.ids)}.sock")
+
+        source = os.path.join(worker_dir, config['worker'][0])
+        command = [part.format(worker_dir=worker_dir, source=source, address=address) for part in config['command']]
+        process = subprocess.Popen(
+            command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            cwd=self.socket_dir, start_new_session=True,
+        )
+        ready, _, _ = select.select([process.stdout], [], [], self.start_timeout)
+        if not ready or process.stdout.readline().strip() != b"ready":
+            ManagedRuntime.kill(process, address)
+            raise Exception(f"{lang} worker failed to start")
+
+        worker = ManagedWorker(lang, process, address)
+        with self.condition:
+            self.workers.add(worker)
+        return worker
+
+    def checkout(self, lang) -> ManagedWorker:
+        """
+        An idle warm worker of the language, or a new one if fewer than `n_workers` exist. Blocks otherwise.
+        """
+        with self.condition:
+            while True:
+                while self.idle[lang]:
+                    worker = self.idle[lang].pop()
+                    if worker.process.poll() is None:
+                        return worker
+                    self.discard(worker)
+                if sum(worker.lang == lang for worker in self.workers) < self.n_workers:
+                    # Reserved until the worker has started
+                    placeholder = ManagedWorker(lang, None, None)
+                    self.workers.add(placeholder)
+                    break
+                self.condition.wait()
+
+        try:
+            return self.start(lang)
+        finally:
+            with self.condition:
+                self.workers.discard(placeholder)
+                self.condition.notify()
+
+    def checkin(self, worker, recycle=False):
+        worker.jobs += 1
+        with self.condition:
+            if recycle or worker.jobs >= self.max_jobs or worker.process.poll() is not None:
+                self.discard(worker)
+            else:
+                self.idle[worker.lang].append(worker)
+            self.condition.notify()
+
+    def discard(self, worker):
+        # Needs self.condition
+        self.workers.discard(worker)
+        ManagedRuntime.kill(worker.process, worker.address)
+
+    @staticmethod
+    def kill(process, address):
+        if process.poll() is None:
+            os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+        process.stdout.close()
+        if os.path.exists(address):
+            os.remove(address)
+
+    def close(self):
+        if os.getpid() != self.owner:
+            return
+        with self.condition:
+            for worker in list(self.workers):
+                if worker.process is not None:
+                    self.discard(worker)
+            self.idle = {lang: list() for lang in ManagedRuntime.languages}
+            if self.socket_dir is not None and os.path.isdir(self.socket_dir):
+                os.rmdir(self.socket_dir)
+                self.socket_dir = None
+
+    def stats(self) -> Dict:
+        with self.condition:
+            return {
+                lang: dict(
+                    workers=sum(worker.lang == lang for worker in self.workers),
+                    idle=len(self.idle[lang]),
+                    jobs=[worker.jobs for worker in self.idle[lang]],
+                )
+                for lang in ManagedRuntime.languages
+            }
+
+    # ---------------------------------------------------------------- Protocol
+
+    @staticmethod
+    def tree_name(tree):
+        if tree is None:
+            return "void"
+        if tree[0] == "list":
+            return "list." + ManagedRuntime.tree_name(tree[1])
+        return tree[0]
+
+    @staticmethod
+    def encode_job(lang, solution, signature, test_case_inputs) -> bytes:
+        source = (JAVA_IMPORTS + solution if lang == "java" else solution).encode()
+        tokens = NativeBuilder.encode_inputs(test_case_inputs, signature)
+        trees = [ManagedRuntime.tree_name(signature['returns'] and signature['returns']['tree'])]
+        trees += [ManagedRuntime.tree_name(param['tree']) for param in signature['params']]
+        header = f"{len(source)} {len(tokens)} {signature['name']} {' '.join(trees)}\n"
+        return header.encode() + source + tokens
+
+    @staticmethod
+    def receive(connection) -> bytes:
+        chunks = list()
+        while True:
+            chunk = connection.recv(1 << 16)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+    @staticmethod
+    def decode_response(response, signature) -> Dict:
+        """
+        Returns dict(status, escape, compile_ms, warmup_ms, peak_kb, message, outputs=[(call_ns, output)]).
+        """
+        lines = response.decode().splitlines()
+        if not lines or not lines[-1].startswith("#"):
+            raise Exception("worker output truncated")
+        status, escape, compile_ns, warmup_ns, peak, message = lines.pop()[1:].split()
+
+        outputs = list()
+        for line in lines:
+            tokens = iter(line.split())
+            call_ns = int(next(tokens))
+            outputs.append((call_ns, Wire.decode(tokens, signature['returns'] and signature['returns']['tree'])))
+        return dict(
+            status=status, escape=escape == "1", compile_ms=int(compile_ns)/10**6, warmup_ms=int(warmup_ns)/10**6,
+            peak_kb=int(peak)/10**3, message="" if message == "-" else bytes.fromhex(message).decode(errors="replace"),
+            outputs=outputs,
+        )
+
+    # ---------------------------------------------------------------- Signatures
+
+    @staticmethod
+    def signature(lang, code_prompt) -> dict:
+        """
+        Parses the first method of the LeetCode code prompt, in the format of NativeBuilder.signature.
+        """
+        parse = getattr(ManagedRuntime, f"signature_{lang}")
+        return parse(code_prompt)
+
+    @staticmethod
+    def signature_java(code_prompt):
+        match = re.search(r"public\s+([\w<>\[\],\s]+?)\s+(\w+)\s*\(([^)]*)\)\s*\{", code_prompt)
+        if match is None:
+            raise SignatureException("no method found in the code prompt")
+        return_type, name, params = match.groups()
+
+        signature = dict(name=name, params=list(), returns=None)
+        return_type = re.sub(r"\s+", "", return_type)
+        if return_type != "void":
+            signature['returns'] = dict(type=return_type, tree=ManagedRuntime.java_tree(return_type))
+        for param in NativeBuilder.split_params(params):
+            param_type, param_name = re.match(r"(?:final\s+)?(.*?)\s*([A-Za-z_]\w*)$", param).groups()
+            param_type = re.sub(r"\s+", "", param_type)
+            signature['params'].append(dict(name=param_name, type=param_type, tree=ManagedRuntime.java_tree(param_type), ref=""))
+        return signature
+
+    @staticmethod
+    def java_tree(native_type):
+        if native_type.endswith("[]"):
+            return ("list", ManagedRuntime.java_tree(native_type[:-2]))
+        match = re.fullmatch(r"(?:List|ArrayList|LinkedList|Collection)<(.*)>", native_type)
+        if match:
+            return ("list", ManagedRuntime.java_tree(match.group(1)))
+        scalars = {
+            "int": "int", "Integer": "int", "long": "int", "Long": "int", "short": "int", "byte": "int",
+            "double": "float", "Double": "float", "float": "float", "Float": "float",
+            "boolean": "bool", "Boolean": "bool", "char": "char", "Character": "char", "String": "str",
+        }
+        if native_type not in scalars:
+            raise SignatureException(f"unsupported Java type: {native_type}")
+        return (scalars[native_type],)
+
+    @staticmethod
+    def signature_javascript(code_prompt):
+        match = re.search(r"(?:var|let|const)\s+(\w+)\s*=\s*function\s*\(([^)]*)\)", code_prompt)
+        match = match or re.search(r"function\s+(\w+)\s*\(([^)]*)\)", code_prompt)
+        if match is None:
+            raise SignatureException("no function found in the code prompt")
+        name, params = match.groups()
+
+        # Types come from the JSDoc block
+        types = dict((param_name, param_type) for param_type, param_name in re.findall(r"@param\s*\{([^}]*)\}\s*(\w+)", code_prompt))
+        signature = dict(name=name, params=list(), returns=None)
+        return_type = re.search(r"@returns?\s*\{([^}]*)\}", code_prompt)
+        if return_type and return_type.group(1).strip() not in ["void", "undefined"]:
+            signature['returns'] = dict(type=return_type.group(1).strip(), tree=ManagedRuntime.javascript_tree(return_type.group(1).strip()))
+        for param_name in NativeBuilder.split_params(params):
+            if param_name not in types:
+                raise SignatureException(f"no JSDoc type for {param_name}")
+            param_type = types[param_name].strip()
+            signature['params'].append(dict(name=param_name, type=param_type, tree=ManagedRuntime.javascript_tree(param_type), ref=""))
+        return signature
+
+    @staticmethod
+    def javascript_tree(native_type):
+        if native_type.endswith("[]"):
+            return ("list", ManagedRuntime.javascript_tree(native_type[:-2]))
+        match = re.fullmatch(r"Array<(.*)>", native_type)
+        if match:
+            return ("list", ManagedRuntime.javascript_tree(match.group(1).strip()))
+        scalars = {"number": "num", "string": "str", "boolean": "bool", "character": "char"}
+        if native_type not in scalars:
+            raise SignatureException(f"unsupported JavaScript type: {native_type}")
+        return (scalars[native_type],)
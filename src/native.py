@@ -0,0 +1,737 @@
+# coding: utf-8
+
+# Compiled-language backends (C++, Go, Rust) of the sandbox.
+#
+# A solution is wrapped into a language-native harness generated from the LeetCode `code_prompt` signature. The
+# harness reads the test case arguments from stdin, calls the solution once per case, and prints the call time and the
+# return value of each case, followed by its memory statistics. Values cross the pipe in a type-directed token format:
+#   int / float: decimal    bool: 1 or 0    char: code point    string: hex of the UTF-8 bytes ("-" if empty)
+#   num: decimal, an int unless it has a fraction or exponent (JavaScript numbers)
+#   list: length, then the items
+# so that the harness needs no parser beyond whitespace tokenization.
+
+from concurrent.futures import ThreadPoolExecutor
+import subprocess
+import threading
+import tempfile
+import resource
+import json
+import time
+import os
+import re
+
+try:
+    from src.utils import generate_hash
+except ImportError:
+    # Running from inside src/ (e.g. data_synthesis.py)
+    from utils import generate_hash
+
+
+class SignatureException(Exception):
+    pass
+
+
+class CompileException(Exception):
+    def __init__(self, message, compile_ms=None):
+        super().__init__(message)
+        self.compile_ms = compile_ms
+
+
+class Wire(object):
+    """
+    Type-directed token codec between Python values and the native harnesses. Types are trees of tuples:
+    ("int",), ("float",), ("num",), ("bool",), ("str",), ("char",) and ("list", item_type). None is a void return.
+    """
+
+    @staticmethod
+    def encode(value, tree, tokens):
+        kind = tree[0]
+        if kind == "int":
+            tokens.append(str(int(value)))
+        elif kind == "float":
+            tokens.append(repr(float(value)))
+        elif kind == "num":
+            tokens.append(repr(value) if isinstance(value, float) else str(int(value)))
+        elif kind == "bool":
+            tokens.append("1" if value else "0")
+        elif kind == "str":
+            tokens.append(value.encode().hex() or "-")
+        elif kind == "char":
+            tokens.append(str(ord(value)))
+        else:
+            tokens.append(str(len(value)))
+            for item in value:
+                Wire.encode(item, tree[1], tokens)
+        return tokens
+
+    @staticmethod
+    def decode(tokens, tree):
+        if tree is None:
+            return None
+        kind = tree[0]
+        if kind == "int":
+            return int(next(tokens))
+        if kind == "float":
+            return float(next(tokens))
+        if kind == "num":
+            token = next(tokens)
+            try:
+                return int(token)
+            except ValueError:
+                return float(token)
+        if kind == "bool":
+            return next(tokens) == "1"
+        if kind == "str":
+            token = next(tokens)
+            return "" if token == "-" else bytes.fromhex(token).decode()
+        if kind == "char":
+            return chr(int(next(tokens)))
+        return [Wire.decode(tokens, tree[1]) for _ in range(int(next(tokens)))]
+
+
+class NativeBuilder(object):
+    """
+    Generates and compiles native harnesses. Binaries are cached under `cache_dir`, keyed by the hash of the harness
+    source (which embeds the solution), the compiler version and the compile command, so a re-evaluation skips the
+    compile step.
+    """
+    languages = {
+        "cpp": {
+            "suffix": ".cpp",
+            "command": ["g++", "-O2", "-std=c++17", "-o", "{binary}", "{source}"],
+            "version": ["g++", "--version"],
+        },
+        "golang": {
+            "suffix": ".go",
+            "command": ["go", "build", "-o", "{binary}", "{source}"],
+            "version": ["go", "version"],
+        },
+        "rust": {
+            "suffix": ".rs",
+            "command": ["rustc", "-O", "--edition", "2021", "-C", "debuginfo=0", "-o", "{binary}", "{source}"],
+            "version": ["rustc", "--version"],
+        },
+    }
+
+    def __init__(self, cache_dir=None, compile_timeout=120):
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "venus_build")
+        self.compile_timeout = compile_timeout
+        self.versions = dict()
+        self.lock = threading.Lock()
+
+    def version(self, lang):
+        with self.lock:
+            if lang not in self.versions:
+                try:
+                    process = subprocess.run(NativeBuilder.languages[lang]['version'], capture_output=True, timeout=30)
+                    self.versions[lang] = process.stdout.decode().strip()
+                except (OSError, subprocess.TimeoutExpired) as e:
+                    self.versions[lang] = None
+            return self.versions[lang]
+
+    def build(self, lang, solution, code_prompt) -> dict:
+        """
+        Returns dict(binary, compile_ms, cached). Raises SignatureException if the signature is not supported, and
+        CompileException if the compiler is missing or rejects the harness.
+        """
+        config = NativeBuilder.languages[lang]
+        version = self.version(lang)
+        if version is None:
+            raise CompileException(f"{config['command'][0]} is not available")
+
+        source = NativeBuilder.harness(lang, solution, NativeBuilder.signature(lang, code_prompt))
+        key = generate_hash(json.dumps([lang, version, config['command'], source]))
+        binary = os.path.join(self.cache_dir, lang, key)
+        if os.path.exists(binary):
+            return dict(binary=binary, compile_ms=0.0, cached=True)
+
+        os.makedirs(os.path.dirname(binary), exist_ok=True)
+        with tempfile.TemporaryDirectory() as build_dir:
+            source_path = os.path.join(build_dir, "main" + config['suffix'])
+            binary_path = os.path.join(build_dir, "main")
+            with open(source_path, "w") as f:
+                f.write(source)
+
+            command = [part.format(binary=binary_path, source=source_path) for part in config['command']]
+            env = dict(os.environ, GOCACHE=os.environ.get("GOCACHE", os.path.join(self.cache_dir, "gocache")))
+            start_time = time.monotonic()
+            try:
+                process = subprocess.run(command, cwd=build_dir, capture_output=True, timeout=self.compile_timeout, env=env)
+            except subprocess.TimeoutExpired as e:
+                raise CompileException("compilation timed out", (time.monotonic()-start_time)*10**3)
+            compile_ms = (time.monotonic()-start_time)*10**3
+
+            if process.returncode != 0:
+                raise CompileException(process.stderr.decode(errors="replace")[-2000:], compile_ms)
+            # Atomic, so concurrent builds of the same solution never see a partial binary
+            os.replace(binary_path, binary)
+        return dict(binary=binary, compile_ms=compile_ms, cached=False)
+
+    def build_many(self, lang, solutions, code_prompt, n_workers=None) -> list:
+        """
+        Builds independent solutions in parallel. Returns a build dict or the raised exception per solution.
+        """
+        def build(solution):
+            try:
+                return self.build(lang, solution, code_prompt)
+            except (SignatureException, CompileException) as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=n_workers or os.cpu_count()) as executor:
+            return list(executor.map(build, solutions))
+
+    @staticmethod
+    def limits(timeout):
+        """
+        preexec_fn of a harness process: a CPU time limit, so that a binary orphaned by a killed sandbox still dies.
+        """
+        seconds = int(timeout) + 2
+        def apply():
+            resource.setrlimit(resource.RLIMIT_CPU, (seconds, seconds))
+            # The job's RLIMIT_DATA still caps the binary; its address space is not capped, since the Go and Rust
+            # runtimes reserve far more of it than they use
+            _, hard = resource.getrlimit(resource.RLIMIT_AS)
+            resource.setrlimit(resource.RLIMIT_AS, (hard, hard))
+        return apply
+
+    @staticmethod
+    def out_of_memory(stderr) -> bool:
+        """
+        Whether a harness died of a failed allocation (C++, Go, Rust runtime messages).
+        """
+        stderr = stderr.decode(errors="replace")
+        return any(message in stderr for message in ["std::bad_alloc", "runtime: out of memory", "memory allocation of"])
+
+    @staticmethod
+    def encode_inputs(test_case_inputs, signature) -> bytes:
+        tokens = [str(len(test_case_inputs))]
+        for test_case_input in test_case_inputs:
+            if len(test_case_input) != len(signature['params']):
+                raise SignatureException(f"{len(test_case_input)} arguments for {len(signature['params'])} parameters")
+            for value, param in zip(test_case_input, signature['params']):
+                Wire.encode(value, param['tree'], tokens)
+        return " ".join(tokens).encode()
+
+    @staticmethod
+    def decode_outputs(stdout, signature):
+        """
+        Returns ([(call_ns, output)] per case, peak memory growth in kb).
+        """
+        lines = stdout.decode().splitlines()
+        if not lines or not lines[-1].startswith("#stats"):
+            raise Exception("harness output truncated")
+        _, peak, base = lines.pop().split()
+
+        outputs = list()
+        for line in lines:
+            tokens = iter(line.split())
+            call_ns = int(next(tokens))
+            outputs.append((call_ns, Wire.decode(tokens, signature['returns'] and signature['returns']['tree'])))
+        return outputs, max(int(peak) - int(base), 0)
+
+    # ---------------------------------------------------------------- Signatures
+
+    @staticmethod
+    def split_params(params):
+        # Commas inside template / generic brackets do not separate parameters
+        parts, depth, current = list(), 0, ""
+        for char in params:
+            depth += (char in "<[(") - (char in ">])")
+            if char == "," and depth == 0:
+                parts.append(current.strip())
+                current = ""
+            else:
+                current += char
+        if current.strip():
+            parts.append(current.strip())
+        return parts
+
+    @staticmethod
+    def signature(lang, code_prompt) -> dict:
+        """
+        Parses the first method of the LeetCode code prompt:
+            dict(name, params=[dict(name, type, tree, ref)], returns=dict(type, tree) or None)
+        """
+        parse = getattr(NativeBuilder, f"signature_{lang}")
+        return parse(code_prompt)
+
+    @staticmethod
+    def signature_cpp(code_prompt):
+        body = code_prompt.split("public:", 1)[-1]
+        match = re.search(r"([\w:<>,\s\*&]+?)\s+(\w+)\s*\(([^)]*)\)\s*(?:const\s*)?\{", body)
+        if match is None:
+            raise SignatureException("no method found in the code prompt")
+        return_type, name, params = match.groups()
+
+        signature = dict(name=name, params=list(), returns=None)
+        return_type = NativeBuilder.cpp_type(return_type)
+        if return_type != "void":
+            signature['returns'] = dict(type=return_type, tree=NativeBuilder.cpp_tree(return_type))
+        for param in NativeBuilder.split_params(params):
+            param_type, param_name = re.match(r"(.*?)([A-Za-z_]\w*)$", param).groups()
+            param_type = NativeBuilder.cpp_type(param_type)
+            signature['params'].append(dict(name=param_name, type=param_type, tree=NativeBuilder.cpp_tree(param_type), ref=""))
+        return signature
+
+    @staticmethod
+    def cpp_type(native_type):
+        native_type = re.sub(r"\bconst\b", "", native_type).replace("&", "")
+        return re.sub(r"\s+", " ", native_type).replace("< ", "<").replace(" >", ">").strip()
+
+    @staticmethod
+    def cpp_tree(native_type):
+        match = re.fullmatch(r"vector\s*<(.*)>", native_type)
+        if match:
+            return ("list", NativeBuilder.cpp_tree(match.group(1).strip()))
+        scalars = {
+            "int": "int", "long": "int", "long long": "int", "unsigned": "int", "unsigned int": "int",
+            "unsigned long": "int", "unsigned long long": "int", "size_t": "int", "int64_t": "int",
+            "double": "float", "float": "float", "bool": "bool", "string": "str", "char": "char",
+        }
+        if native_type not in scalars:
+            raise SignatureException(f"unsupported C++ type: {native_type}")
+        return (scalars[native_type],)
+
+    @staticmethod
+    def signature_golang(code_prompt):
+        match = re.search(r"func\s+(\w+)\s*\(([^)]*)\)\s*([^{]*)\{", code_prompt)
+        if match is None:
+            raise SignatureException("no function found in the code prompt")
+        name, params, return_type = match.groups()
+
+        signature = dict(name=name, params=list(), returns=None)
+        return_type = return_type.strip()
+        if return_type:
+            signature['returns'] = dict(type=return_type, tree=NativeBuilder.golang_tree(return_type))
+
+        # Grouped parameters ("a, b int") take the type of the last one
+        pending = list()
+        for param in NativeBuilder.split_params(params):
+            parts = param.split(None, 1)
+            pending.append(parts[0])
+            if len(parts) == 2:
+                param_type = parts[1].replace(" ", "")
+                for param_name in pending:
+                    signature['params'].append(dict(name=param_name, type=param_type, tree=NativeBuilder.golang_tree(param_type), ref=""))
+                pending = list()
+        return signature
+
+    @staticmethod
+    def golang_tree(native_type):
+        if native_type.startswith("[]"):
+            return ("list", NativeBuilder.golang_tree(native_type[2:]))
+        scalars = {
+            "int": "int", "int8": "int", "int16": "int", "int32": "int", "int64": "int", "uint": "int",
+            "uint8": "int", "uint16": "int", "uint32": "int", "uint64": "int", "float64": "float", "float32": "float",
+            "bool": "bool", "string": "str", "byte": "char", "rune": "char",
+        }
+        if native_type not in scalars:
+            raise SignatureException(f"unsupported Go type: {native_type}")
+        return (scalars[native_type],)
+
+    @staticmethod
+    def signature_rust(code_prompt):
+        match = re.search(r"fn\s+(\w+)\s*\(([^)]*)\)\s*(?:->\s*([^{]+?))?\s*\{", code_prompt)
+        if match is None:
+            raise SignatureException("no function found in the code prompt")
+        name, params, return_type = match.groups()
+
+        signature = dict(name=name, params=list(), returns=None)
+        if return_type:
+            signature['returns'] = dict(type=return_type.strip(), tree=NativeBuilder.rust_tree(return_type.strip()))
+        for param in NativeBuilder.split_params(params):
+            param_name, param_type = [part.strip() for part in param.split(":", 1)]
+            ref = ""
+            match = re.match(r"&\s*(mut\s+)?", param_type)
+            if match:
+                ref, param_type = "&mut " if match.group(1) else "&", param_type[match.end():]
+            param_type = NativeBuilder.rust_type(param_type)
+            param_name = re.sub(r"^mut\s+", "", param_name)
+            signature['params'].append(dict(name=param_name, type=param_type, tree=NativeBuilder.rust_tree(param_type), ref=ref))
+        return signature
+
+    @staticmethod
+    def rust_type(native_type):
+        # Borrowed parameters are read into their owned types
+        native_type = native_type.replace(" ", "")
+        if native_type == "str":
+            return "String"
+        match = re.fullmatch(r"\[(.*)\]", native_type)
+        if match:
+            return f"Vec<{match.group(1)}>"
+        return native_type
+
+    @staticmethod
+    def rust_tree(native_type):
+        native_type = native_type.replace(" ", "")
+        match = re.fullmatch(r"Vec<(.*)>", native_type)
+        if match:
+            return ("list", NativeBuilder.rust_tree(match.group(1)))
+        scalars = {
+            "i8": "int", "i16": "int", "i32": "int", "i64": "int", "i128": "int", "isize": "int", "u8": "int",
+            "u16": "int", "u32": "int", "u64": "int", "u128": "int", "usize": "int", "f64": "float", "f32": "float",
+            "bool": "bool", "String": "str", "char": "char",
+        }
+        if native_type not in scalars:
+            raise SignatureException(f"unsupported Rust type: {native_type}")
+        return (scalars[native_type],)
+
+    # ---------------------------------------------------------------- Harnesses
+
+    @staticmethod
+    def harness(lang, solution, signature) -> str:
+        return getattr(NativeBuilder, f"harness_{lang}")(solution, signature)
+
+    CPP_HARNESS = r"""#include <bits/stdc++.h>
+using namespace std;
+
+{solution}
+
+static long venus_memory(const char* key) {{
+    ifstream status("/proc/self/status");
+    string line;
+    while (getline(status, line)) {{
+        if (line.rfind(key, 0) == 0) return atol(line.c_str() + strlen(key));
+    }}
+    return 0;
+}}
+
+static void venus_read(int& x) {{ cin >> x; }}
+static void venus_read(long& x) {{ cin >> x; }}
+static void venus_read(long long& x) {{ cin >> x; }}
+static void venus_read(unsigned& x) {{ cin >> x; }}
+static void venus_read(unsigned long& x) {{ cin >> x; }}
+static void venus_read(unsigned long long& x) {{ cin >> x; }}
+static void venus_read(double& x) {{ cin >> x; }}
+static void venus_read(float& x) {{ cin >> x; }}
+static void venus_read(bool& x) {{ int v; cin >> v; x = v; }}
+static void venus_read(char& x) {{ int v; cin >> v; x = (char) v; }}
+static void venus_read(string& x) {{
+    string t; cin >> t; x.clear();
+    if (t == "-") return;
+    for (size_t i = 0; i + 1 < t.size(); i += 2) x.push_back((char) stoi(t.substr(i, 2), nullptr, 16));
+}}
+template <class T> static void venus_read(vector<T>& x) {{
+    size_t n; cin >> n; x.resize(n);
+    for (size_t i = 0; i < n; i++) {{ T v; venus_read(v); x[i] = v; }}
+}}
+
+static void venus_write(long long x) {{ cout << ' ' << x; }}
+static void venus_write(int x) {{ cout << ' ' << x; }}
+static void venus_write(long x) {{ cout << ' ' << x; }}
+static void venus_write(unsigned x) {{ cout << ' ' << x; }}
+static void venus_write(unsigned long x) {{ cout << ' ' << x; }}
+static void venus_write(unsigned long long x) {{ cout << ' ' << x; }}
+static void venus_write(double x) {{ char b[32]; snprintf(b, sizeof(b), "%.17g", x); cout << ' ' << b; }}
+static void venus_write(float x) {{ venus_write((double) x); }}
+static void venus_write(bool x) {{ cout << ' ' << (x ? 1 : 0); }}
+static void venus_write(char x) {{ cout << ' ' << (int) (unsigned char) x; }}
+static void venus_write(const string& x) {{
+    static const char* digits = "0123456789abcdef";
+    cout << ' ';
+    if (x.empty()) {{ cout << '-'; return; }}
+    for (unsigned char c : x) cout << digits[c >> 4] << digits[c & 15];
+}}
+template <class T> static void venus_write(const vector<T>& x) {{
+    cout << ' ' << x.size();
+    for (size_t i = 0; i < x.size(); i++) venus_write((T) x[i]);
+}}
+
+int main() {{
+    ios::sync_with_stdio(false);
+    cin.tie(nullptr);
+    long venus_base = venus_memory("VmRSS:");
+    size_t venus_cases;
+    cin >> venus_cases;
+    Solution venus_solution;
+    for (size_t venus_case = 0; venus_case < venus_cases; venus_case++) {{
+{reads}
+        auto venus_start = chrono::steady_clock::now();
+        {call}
+        auto venus_end = chrono::steady_clock::now();
+        cout << chrono::duration_cast<chrono::nanoseconds>(venus_end - venus_start).count();
+        {write}
+        cout << '\n';
+    }}
+    cout << "#stats " << venus_memory("VmHWM:") << ' ' << venus_base << '\n';
+    return 0;
+}}
+"""
+
+    @staticmethod
+    def harness_cpp(solution, signature):
+        reads = "\n".join(f"        {param['type']} venus_a{index}; venus_read(venus_a{index});" for index, param in enumerate(signature['params']))
+        args = ", ".join(f"venus_a{index}" for index in range(len(signature['params'])))
+        call = f"venus_solution.{signature['name']}({args});"
+        write = ""
+        if signature['returns'] is not None:
+            call = f"auto venus_output = {call}"
+            write = "venus_write(venus_output);"
+        return NativeBuilder.CPP_HARNESS.format(solution=solution, reads=reads, call=call, write=write)
+
+    # Packages LeetCode makes available to Go solutions without an import, with a use that keeps each one legal
+    GOLANG_IMPORTS = {
+        "bufio": "bufio.NewReader", "os": "os.Exit", "strconv": "strconv.Itoa", "strings": "strings.Split",
+        "time": "time.Now", "encoding/hex": "hex.DecodeString", "sort": "sort.Ints", "math": "math.Abs",
+        "math/bits": "bits.OnesCount", "container/heap": "heap.Init", "container/list": "list.New",
+        "unicode": "unicode.IsDigit", "bytes": "bytes.Equal", "fmt": "fmt.Sprint",
+    }
+
+    GOLANG_HARNESS = r"""package main
+
+import (
+{imports}
+)
+
+{uses}
+
+{solution}
+
+var venusIn = bufio.NewScanner(os.Stdin)
+var venusOut = bufio.NewWriterSize(os.Stdout, 1<<16)
+
+func venusToken() string {{
+	venusIn.Scan()
+	return venusIn.Text()
+}}
+
+func venusInt() int64 {{
+	v, _ := strconv.ParseInt(venusToken(), 10, 64)
+	return v
+}}
+
+func venusFloat() float64 {{
+	v, _ := strconv.ParseFloat(venusToken(), 64)
+	return v
+}}
+
+func venusBool() bool {{
+	return venusToken() == "1"
+}}
+
+func venusStr() string {{
+	t := venusToken()
+	if t == "-" {{
+		return ""
+	}}
+	b, _ := hex.DecodeString(t)
+	return string(b)
+}}
+
+func venusSlice[T any](read func() T) []T {{
+	s := make([]T, int(venusInt()))
+	for i := range s {{
+		s[i] = read()
+	}}
+	return s
+}}
+
+func venusWriteInt(v int64) {{
+	venusOut.WriteByte(' ')
+	venusOut.WriteString(strconv.FormatInt(v, 10))
+}}
+
+func venusWriteFloat(v float64) {{
+	venusOut.WriteByte(' ')
+	venusOut.WriteString(strconv.FormatFloat(v, 'g', -1, 64))
+}}
+
+func venusWriteBool(v bool) {{
+	if v {{
+		venusOut.WriteString(" 1")
+	}} else {{
+		venusOut.WriteString(" 0")
+	}}
+}}
+
+func venusWriteStr(v string) {{
+	venusOut.WriteByte(' ')
+	if v == "" {{
+		venusOut.WriteByte('-')
+		return
+	}}
+	venusOut.WriteString(hex.EncodeToString([]byte(v)))
+}}
+
+func venusWriteSlice[T any](s []T, write func(T)) {{
+	venusWriteInt(int64(len(s)))
+	for _, v := range s {{
+		write(v)
+	}}
+}}
+
+func venusMemory(key string) int64 {{
+	data, _ := os.ReadFile("/proc/self/status")
+	for _, line := range strings.Split(string(data), "\n") {{
+		if strings.HasPrefix(line, key) {{
+			v, _ := strconv.ParseInt(strings.Fields(line[len(key):])[0], 10, 64)
+			return v
+		}}
+	}}
+	return 0
+}}
+
+func main() {{
+	venusIn.Buffer(make([]byte, 1<<20), 1<<30)
+	venusIn.Split(bufio.ScanWords)
+	venusBase := venusMemory("VmRSS:")
+	venusCases := int(venusInt())
+	for venusCase := 0; venusCase < venusCases; venusCase++ {{
+{reads}
+		venusStart := time.Now()
+		{call}
+		venusOut.WriteString(strconv.FormatInt(time.Since(venusStart).Nanoseconds(), 10))
+		{write}
+		venusOut.WriteByte('\n')
+	}}
+	venusOut.WriteString("#stats " + strconv.FormatInt(venusMemory("VmHWM:"), 10) + " " + strconv.FormatInt(venusBase, 10) + "\n")
+	venusOut.Flush()
+}}
+"""
+
+    @staticmethod
+    def golang_read(native_type, tree):
+        if tree[0] == "list":
+            item_type = native_type[2:]
+            return f"venusSlice(func() {item_type} {{ return {NativeBuilder.golang_read(item_type, tree[1])} }})"
+        if tree[0] in ["int", "char"]:
+            return f"{native_type}(venusInt())"
+        if tree[0] == "float":
+            return f"{native_type}(venusFloat())"
+        return {"bool": "venusBool()", "str": "venusStr()"}[tree[0]]
+
+    @staticmethod
+    def golang_write(native_type, tree, value, depth=0):
+        if tree[0] == "list":
+            item_type, item = native_type[2:], f"venusV{depth}"
+            return f"venusWriteSlice({value}, func({item} {item_type}) {{ {NativeBuilder.golang_write(item_type, tree[1], item, depth+1)} }})"
+        if tree[0] in ["int", "char"]:
+            return f"venusWriteInt(int64({value}))"
+        if tree[0] == "float":
+            return f"venusWriteFloat(float64({value}))"
+        return {"bool": f"venusWriteBool({value})", "str": f"venusWriteStr({value})"}[tree[0]]
+
+    @staticmethod
+    def harness_golang(solution, signature):
+        # Import declarations of the solution move to the harness import block
+        imports = set(NativeBuilder.GOLANG_IMPORTS)
+        pattern = re.compile(r'^\s*import\s*(\((.*?)\)|"[^"]+")', re.S | re.M)
+        for match in pattern.finditer(solution):
+            imports.update(re.findall(r'"([^"]+)"', match.group(1)))
+        solution = pattern.sub("", solution)
+        solution = re.sub(r"^\s*package\s+\w+", "", solution, flags=re.M)
+
+        reads = "\n".join(f"\t\tvenusA{index} := {NativeBuilder.golang_read(param['type'], param['tree'])}" for index, param in enumerate(signature['params']))
+        args = ", ".join(f"venusA{index}" for index in range(len(signature['params'])))
+        call = f"{signature['name']}({args})"
+        write = ""
+        if signature['returns'] is not None:
+            call = f"venusOutput := {call}"
+            write = NativeBuilder.golang_write(signature['returns']['type'], signature['returns']['tree'], "venusOutput")
+        return NativeBuilder.GOLANG_HARNESS.format(
+            imports="\n".join(f'\t"{package}"' for package in sorted(imports)),
+            uses="\n".join(f"var _ = {use}" for package, use in NativeBuilder.GOLANG_IMPORTS.items()),
+            solution=solution, reads=reads, call=call, write=write,
+        )
+
+    RUST_HARNESS = r"""#![allow(unused_imports, dead_code, unused_variables, unused_mut, non_snake_case)]
+use std::collections::*;
+use std::io::{{Read, Write}};
+
+struct Solution;
+
+{solution}
+
+type VenusTokens<'a> = std::str::SplitAsciiWhitespace<'a>;
+
+trait VenusWire: Sized {{
+    fn venus_read(tokens: &mut VenusTokens) -> Self;
+    fn venus_write(&self, out: &mut String);
+}}
+
+macro_rules! venus_number {{
+    ($($t:ty),*) => {{ $(
+        impl VenusWire for $t {{
+            fn venus_read(tokens: &mut VenusTokens) -> Self {{ tokens.next().unwrap().parse().unwrap() }}
+            fn venus_write(&self, out: &mut String) {{ out.push(' '); out.push_str(&self.to_string()); }}
+        }}
+    )* }};
+}}
+venus_number!(i8, i16, i32, i64, i128, isize, u8, u16, u32, u64, u128, usize, f32, f64);
+
+impl VenusWire for bool {{
+    fn venus_read(tokens: &mut VenusTokens) -> Self {{ tokens.next().unwrap() == "1" }}
+    fn venus_write(&self, out: &mut String) {{ out.push_str(if *self {{ " 1" }} else {{ " 0" }}); }}
+}}
+
+impl VenusWire for char {{
+    fn venus_read(tokens: &mut VenusTokens) -> Self {{ char::from_u32(tokens.next().unwrap().parse().unwrap()).unwrap() }}
+    fn venus_write(&self, out: &mut String) {{ out.push(' '); out.push_str(&(*self as u32).to_string()); }}
+}}
+
+impl VenusWire for String {{
+    fn venus_read(tokens: &mut VenusTokens) -> Self {{
+        let t = tokens.next().unwrap();
+        if t == "-" {{ return String::new(); }}
+        let bytes: Vec<u8> = (0..t.len()).step_by(2).map(|i| u8::from_str_radix(&t[i..i + 2], 16).unwrap()).collect();
+        String::from_utf8(bytes).unwrap()
+    }}
+    fn venus_write(&self, out: &mut String) {{
+        out.push(' ');
+        if self.is_empty() {{ out.push('-'); return; }}
+        for b in self.bytes() {{ out.push_str(&format!("{{:02x}}", b)); }}
+    }}
+}}
+
+impl<T: VenusWire> VenusWire for Vec<T> {{
+    fn venus_read(tokens: &mut VenusTokens) -> Self {{
+        let n: usize = tokens.next().unwrap().parse().unwrap();
+        (0..n).map(|_| T::venus_read(tokens)).collect()
+    }}
+    fn venus_write(&self, out: &mut String) {{
+        out.push(' ');
+        out.push_str(&self.len().to_string());
+        for item in self {{ item.venus_write(out); }}
+    }}
+}}
+
+impl VenusWire for () {{
+    fn venus_read(tokens: &mut VenusTokens) -> Self {{}}
+    fn venus_write(&self, out: &mut String) {{}}
+}}
+
+fn venus_memory(key: &str) -> i64 {{
+    let status = std::fs::read_to_string("/proc/self/status").unwrap_or_default();
+    for line in status.lines() {{
+        if let Some(rest) = line.strip_prefix(key) {{
+            return rest.split_whitespace().next().unwrap_or("0").parse().unwrap_or(0);
+        }}
+    }}
+    0
+}}
+
+fn main() {{
+    let venus_base = venus_memory("VmRSS:");
+    let mut venus_input = String::new();
+    std::io::stdin().read_to_string(&mut venus_input).unwrap();
+    let mut venus_tokens = venus_input.split_ascii_whitespace();
+    let venus_cases: usize = venus_tokens.next().unwrap().parse().unwrap();
+    let mut venus_out = String::new();
+    for _ in 0..venus_cases {{
+{reads}
+        let venus_start = std::time::Instant::now();
+        let venus_output = Solution::{name}({args});
+        venus_out.push_str(&venus_start.elapsed().as_nanos().to_string());
+        venus_output.venus_write(&mut venus_out);
+        venus_out.push('\n');
+    }}
+    venus_out.push_str(&format!("#stats {{}} {{}}\n", venus_memory("VmHWM:"), venus_base));
+    std::io::stdout().write_all(venus_out.as_bytes()).unwrap();
+}}
+"""
+
+    @staticmethod
+    def harness_rust(solution, signature):
+        reads = "\n".join(f"        let mut venus_a{index}: {param['type']} = VenusWire::venus_read(&mut venus_tokens);" for index, param in enumerate(signature['params']))
+        args = ", ".join(f"{param['ref']}venus_a{index}" for index, param in enumerate(signature['params']))
+        return NativeBuilder.RUST_HARNESS.format(solution=solution, reads=reads, name=signature['name'], args=args)
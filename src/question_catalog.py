@@ -0,0 +1,129 @@
+# coding: utf-8
+
+# Local catalog of LeetCode questions, so that the pipelines stop downloading the full question list (content and code
+# snippets included) for every batch they process.
+#
+# Questions live in a single SQLite file, indexed by questionId and titleSlug, along with their position in the
+# problem set listing. A refresh first lists the question ids alone (a small response), then fetches the full data of
+# the questions it has not seen yet, so that after the first run only new questions cost a download.
+
+from typing import Dict, List, Optional
+import threading
+import sqlite3
+import json
+import time
+import os
+
+
+class QuestionCatalog(object):
+    """
+    Usage:
+        catalog = QuestionCatalog()
+        catalog.refresh(list_ids, list_questions)       # the first time: everything; afterwards: new questions only
+        for question in catalog.questions(start, range_):
+            ...
+        question = catalog.get(question_id) or catalog.get_by_slug(title_slug)
+    """
+
+    # Questions per listing request: ids only, or with the full data
+    id_page_size = 1000
+    page_size = 100
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("VENUS_CATALOG") or os.path.join(os.path.expanduser("~"), ".cache", "venus", "catalog.sqlite")
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.lock = threading.Lock()
+
+        self.connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS questions (question_id INTEGER PRIMARY KEY, title_slug TEXT, position INTEGER, question TEXT, fetched REAL)"
+        )
+        self.connection.execute("CREATE UNIQUE INDEX IF NOT EXISTS questions_slug ON questions (title_slug)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS questions_position ON questions (position)")
+        self.connection.commit()
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM questions WHERE position IS NOT NULL").fetchone()[0]
+
+    def refresh(self, list_ids, list_questions) -> int:
+        """
+        Brings the catalog up to date. list_ids(skip, limit) returns (total, [(question_id, title_slug)]) of a listing
+        page, and list_questions(skip, limit) the full questions of the same page. Raises LookupError if the listing
+        cannot be retrieved. Returns the number of new questions.
+        """
+        listing, total = list(), None
+        while total is None or len(listing) < total:
+            page = list_ids(len(listing), QuestionCatalog.id_page_size)
+            if page is None:
+                raise LookupError(f"Question listing failed at {len(listing)}")
+            total, ids = page
+            if not ids:
+                break
+            listing += ids
+
+        with self.lock:
+            known = {row[0] for row in self.connection.execute("SELECT question_id FROM questions")}
+            # Positions follow the current listing; questions that left it drop out of the slices
+            self.connection.execute("UPDATE questions SET position = NULL")
+            self.connection.executemany(
+                "UPDATE questions SET position = ? WHERE question_id = ?",
+                [(position, question_id) for position, (question_id, _) in enumerate(listing)]
+            )
+            self.connection.commit()
+
+        new_positions = [position for position, (question_id, _) in enumerate(listing) if question_id not in known]
+        fetched = set()
+        for position in new_positions:
+            if position in fetched:
+                continue
+            questions = list_questions(position, QuestionCatalog.page_size)
+            if not questions:
+                raise LookupError(f"Question retrieval failed at {position}")
+            self.put(position, questions)
+            fetched.update(range(position, position + len(questions)))
+        return len(new_positions)
+
+    def put(self, start, questions):
+        now = time.time()
+        rows = [
+            (int(question['questionId']), question['titleSlug'], start + offset, json.dumps(question), now)
+            for offset, question in enumerate(questions)
+        ]
+        with self.lock:
+            self.connection.executemany("INSERT OR REPLACE INTO questions VALUES (?, ?, ?, ?, ?)", rows)
+            self.connection.commit()
+
+    def questions(self, start, range_) -> List[Dict]:
+        """
+        The questions at positions [start, start + range_) of the listing, like one page of it.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT question FROM questions WHERE position >= ? AND position < ? ORDER BY position", [start, start + range_]
+            ).fetchall()
+        return [json.loads(question) for question, in rows]
+
+    def get(self, question_id) -> Optional[Dict]:
+        return self.lookup("question_id", int(question_id))
+
+    def get_by_slug(self, title_slug) -> Optional[Dict]:
+        return self.lookup("title_slug", title_slug)
+
+    def lookup(self, column, value) -> Optional[Dict]:
+        with self.lock:
+            row = self.connection.execute(f"SELECT question FROM questions WHERE {column} = ?", [value]).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @staticmethod
+    def code_prompts(question) -> Dict:
+        """
+        {langSlug: code prompt} of a question.
+        """
+        return {snippet['langSlug']: snippet['code'] for snippet in question.get('codeSnippets') or []}
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
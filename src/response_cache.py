@@ -0,0 +1,126 @@
+# coding: utf-8
+
+# On-disk cache of GraphQL responses, so that re-running a crawl or a formatting stage does not fetch the same payloads
+# again, and can even run without network access (offline mode).
+#
+# Entries are content-addressed: the key is the hash of the canonical payload (query and variables), and the entry is
+# the gzip-compressed response JSON under <directory>/<query type>/<first two key characters>/<rest of the key>.json.gz,
+# where the query type is the GraphQL operation name. An entry is fresh for the TTL of its query type, judged by its
+# modification time. Query types with a TTL of 0 are never cached.
+
+from collections import Counter, defaultdict
+from typing import Dict, Optional
+import threading
+import gzip
+import json
+import time
+import os
+
+try:
+    from src.utils import generate_hash
+except ImportError:
+    # Running from inside src/
+    from utils import generate_hash
+
+
+class ResponseCache(object):
+    """
+    Usage:
+        cache = ResponseCache()                     # or ResponseCache(offline=True): cache only, never the network
+        transport = GraphQLTransport(headers, cache=cache)
+    """
+
+    # Seconds an entry stays fresh, per query type (None: forever, 0: not cached)
+    ttls = {
+        "problemsetQuestionList": 24 * 3600,        # new questions come out every week
+        "problemsetQuestionIds": 24 * 3600,         # listing behind the question catalog refresh
+        "questionEditorData": 30 * 24 * 3600,       # code prompts hardly ever change
+        "submissionList": 0,                        # depends on the cookie's account, and changes with every submission
+        "submissionDetails": None,                  # a submission never changes
+        "codeWithRuntime": 7 * 24 * 3600,
+        "codeWithMemory": 7 * 24 * 3600,
+    }
+
+    # TTL of the other query types
+    default_ttl = 24 * 3600
+
+    def __init__(self, directory=None, ttls=None, offline=False):
+        self.directory = directory or os.getenv("VENUS_RESPONSE_CACHE") or os.path.join(os.path.expanduser("~"), ".cache", "venus", "graphql")
+        os.makedirs(self.directory, exist_ok=True)
+        self.ttls = dict(ResponseCache.ttls, **(ttls or dict()))
+        self.offline = offline
+        self.counters = defaultdict(Counter)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(payload) -> str:
+        payload = json.loads(payload) if isinstance(payload, str) else payload
+        # Equal payloads hash alike whatever their key order and spacing
+        return generate_hash(json.dumps(payload, sort_keys=True, separators=(",", ":")))
+
+    def path(self, name, key) -> str:
+        return os.path.join(self.directory, name, key[:2], key[2:] + ".json.gz")
+
+    def ttl(self, name):
+        return self.ttls.get(name, ResponseCache.default_ttl)
+
+    def get(self, name, payload) -> Optional[Dict]:
+        """
+        Fresh cached response of a payload, or None.
+        """
+        ttl = self.ttl(name)
+        if ttl == 0:
+            return None
+        path = self.path(name, ResponseCache.key(payload))
+        try:
+            if ttl is not None and time.time() - os.stat(path).st_mtime > ttl:
+                raise FileNotFoundError(path)
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                response = json.load(f)
+            outcome = "hits"
+        except (OSError, ValueError, EOFError) as e:
+            # Missing, expired or truncated entry
+            response, outcome = None, "misses"
+        with self.lock:
+            self.counters[name][outcome] += 1
+        return response
+
+    def put(self, name, payload, response):
+        """
+        Stores a response whose data is not null (null data may be throttling, see GraphQLTransport), unless its query
+        type is not cached.
+        """
+        data = response.get('data') or dict()
+        if not data or data[next(iter(data))] is None or self.ttl(name) == 0:
+            return
+        path = self.path(name, ResponseCache.key(payload))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written aside and renamed, so that concurrent readers never see a partial entry
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(temporary, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(response, f, separators=(",", ":"))
+        os.replace(temporary, path)
+        with self.lock:
+            self.counters[name]['writes'] += 1
+
+    def purge(self) -> int:
+        """
+        Removes expired entries and leftover temporary files. Returns the number of removed files.
+        """
+        removed = 0
+        for query_type in os.scandir(self.directory):
+            if not query_type.is_dir():
+                continue
+            ttl = self.ttl(query_type.name)
+            oldest = time.time() - ttl if ttl is not None else None
+            for shard in os.scandir(query_type.path):
+                for entry in os.scandir(shard.path):
+                    expired = oldest is not None and entry.stat().st_mtime < oldest
+                    if expired or entry.name.endswith(".tmp"):
+                        os.remove(entry.path)
+                        removed += 1
+        return removed
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {name: dict(counter) for name, counter in self.counters.items()}
@@ -0,0 +1,169 @@
+# coding: utf-8
+
+# Persistent cache of sandbox results, so that re-running a pipeline only pays for the genuinely new work.
+#
+# Results live in a single SQLite file, keyed by a hash of everything that determines them (e.g. solution source, test
+# suite and measurement settings) and tagged with the sandbox version: a change to the sandbox code or the Python
+# version invalidates every stored result, and an optional TTL expires old ones.
+
+from collections import Counter
+from typing import Dict
+import threading
+import sqlite3
+import pickle
+import json
+import time
+import sys
+import os
+
+try:
+    from src.utils import generate_hash
+except ImportError:
+    # Running from inside src/ (e.g. data_synthesis.py)
+    from utils import generate_hash
+
+
+class ResultStore(object):
+    """
+    Single-file result store.
+
+    Usage:
+        store = ResultStore()
+        key = ResultStore.key("execution", solution, ResultStore.suite_key(test_cases, functions), settings)
+        result = store.get("execution", key)
+        if result is None:
+            result = sandbox.run_code_execution(sample)
+            store.put("execution", key, result)
+    """
+
+    # Results of runs that may not repeat (load-dependent or infrastructure failures) are never stored
+    transient = ("failed@timeout", "failed@sandbox_error")
+
+    # Sources whose changes invalidate the stored results
+    sources = ["sandbox.py", "native.py", "managed.py"]
+
+    # Rows per lookup query (SQLite caps the number of bound parameters)
+    chunk_size = 500
+
+    def __init__(self, path=None, ttl=None, version=None):
+        self.path = path or os.getenv("VENUS_RESULT_STORE") or os.path.join(os.path.expanduser("~"), ".cache", "venus", "results.sqlite")
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.ttl = ttl
+        self.version = version or ResultStore.sandbox_version()
+        self.hits, self.misses, self.writes = Counter(), Counter(), Counter()
+        self.lock = threading.Lock()
+
+        self.connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        # Concurrent pipelines on the same file: readers do not block the writer
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, kind TEXT, version TEXT, created REAL, result BLOB)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_version ON results (version)")
+        self.connection.commit()
+
+    @staticmethod
+    def sandbox_version() -> str:
+        """
+        Hash of the sandbox sources and the Python version.
+        """
+        directory = os.path.dirname(os.path.abspath(__file__))
+        parts = [sys.version]
+        for source in ResultStore.sources:
+            path = os.path.join(directory, source)
+            if os.path.exists(path):
+                with open(path) as f:
+                    parts.append(f.read())
+        return generate_hash(json.dumps(parts))[:16]
+
+    @staticmethod
+    def key(*parts) -> str:
+        return generate_hash(json.dumps(parts, sort_keys=True, default=str))
+
+    @staticmethod
+    def suite_key(test_cases, functions) -> str:
+        # Hashed once per problem, so that per-solution keys do not re-hash the whole test suite
+        return ResultStore.key(test_cases, functions)
+
+    def get(self, kind, key):
+        return self.get_many(kind, [key]).get(key)
+
+    def get_many(self, kind, keys) -> Dict:
+        """
+        Bulk lookup. Returns {key: result} for the keys that are stored, current and not expired.
+        """
+        keys = list(dict.fromkeys(keys))
+        oldest = time.time() - self.ttl if self.ttl is not None else float("-inf")
+        found = dict()
+        with self.lock:
+            for index in range(0, len(keys), ResultStore.chunk_size):
+                chunk = keys[index:index+ResultStore.chunk_size]
+                rows = self.connection.execute(
+                    f"SELECT key, result FROM results WHERE kind = ? AND version = ? AND created >= ? AND key IN ({','.join('?' * len(chunk))})",
+                    [kind, self.version, oldest] + chunk,
+                )
+                found.update((key, pickle.loads(result)) for key, result in rows)
+            self.hits[kind] += len(found)
+            self.misses[kind] += len(keys) - len(found)
+        return found
+
+    def put(self, kind, key, result):
+        self.put_many(kind, [(key, result)])
+
+    def put_many(self, kind, items):
+        """
+        Stores (key, result) pairs, skipping transient failures.
+        """
+        now = time.time()
+        rows = [
+            (key, kind, self.version, now, pickle.dumps(result))
+            for key, result in items if not ResultStore.is_transient(result)
+        ]
+        with self.lock:
+            self.connection.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)", rows)
+            self.connection.commit()
+            self.writes[kind] += len(rows)
+
+    @staticmethod
+    def is_transient(result) -> bool:
+        status = result.get('status') if isinstance(result, dict) else result[0] if result else None
+        return isinstance(status, str) and status.startswith(ResultStore.transient)
+
+    def invalidate(self, kind=None):
+        """
+        Drops every stored result (of one kind).
+        """
+        with self.lock:
+            if kind is None:
+                self.connection.execute("DELETE FROM results")
+            else:
+                self.connection.execute("DELETE FROM results WHERE kind = ?", [kind])
+            self.connection.commit()
+
+    def purge(self) -> int:
+        """
+        Drops the results of other sandbox versions and the expired ones. Returns the number of dropped rows.
+        """
+        oldest = time.time() - self.ttl if self.ttl is not None else float("-inf")
+        with self.lock:
+            cursor = self.connection.execute("DELETE FROM results WHERE version != ? OR created < ?", [self.version, oldest])
+            self.connection.commit()
+            return cursor.rowcount
+
+    def stats(self) -> Dict:
+        with self.lock:
+            entries = dict(self.connection.execute(
+                "SELECT kind, COUNT(*) FROM results WHERE version = ? GROUP BY kind", [self.version]
+            ).fetchall())
+            stale = self.connection.execute("SELECT COUNT(*) FROM results WHERE version != ?", [self.version]).fetchone()[0]
+        hits, misses = sum(self.hits.values()), sum(self.misses.values())
+        return dict(
+            hits=dict(self.hits), misses=dict(self.misses), writes=dict(self.writes),
+            hit_rate=hits / (hits + misses) if hits + misses else None,
+            entries=entries, stale=stale, version=self.version,
+        )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
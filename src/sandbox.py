@@ -3,27 +3,55 @@
 # The sandbox is inspired by OpenAI's release
 # https://github.com/openai/human-eval/blob/master/human_eval/execution.py
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from multiprocessing import Manager, Process
-from typing import Optional, Dict
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from multiprocessing import Process, Pipe, shared_memory, resource_tracker
+from multiprocessing.reduction import ForkingPickler
+from collections import OrderedDict, Counter
+from statistics import NormalDist
+from typing import Optional, Dict, List
 from tqdm import tqdm
+import importlib.util
+import inspect
 import faulthandler
 import tracemalloc
+import resource
 import numpy as np
 import contextlib
 import traceback
 import itertools
 import platform
+import pickle
+import marshal
+import copy
+import math
+import gc
 import tempfile
+import shutil
+import subprocess
+import threading
 import psutil
+import queue
 import random
 import signal
+import socket
+import types
+import sys
 import json
 import time
 import os
 import re
 import io
 
+try:
+    from src.utils import generate_hash
+    from src.native import NativeBuilder, SignatureException, CompileException
+    from src.managed import ManagedRuntime
+except ImportError:
+    # Running from inside src/ (e.g. data_synthesis.py)
+    from utils import generate_hash
+    from native import NativeBuilder, SignatureException, CompileException
+    from managed import ManagedRuntime
+
 CITATION = """
 @article{du2024mercury,
     title={Mercury: An Efficiency Benchmark for LLM Code Synthesis},
@@ -76,11 +104,625 @@ class WriteOnlyStringIO(io.StringIO):
         """ Returns True if the IO object can be read. """
         return False
 
+class Channel(object):
+    """
+    Ships a whole payload (a job, or all of its outputs) as a single length-prefixed pipe message, instead of one
+    IPC round-trip per item. Payloads above `threshold` bytes go through a shared memory buffer: only its name
+    crosses the pipe, and the receiver unpickles straight from the mapped buffer.
+    """
+    threshold = 16 * 2**20
+
+    # Header of shared memory messages. Pickled payloads always start with the PROTO opcode instead.
+    SHM_HEADER = b"SHM:"
+
+    @staticmethod
+    def prepare():
+        """
+        Starts the resource tracker before forking, so that parent and children share it. A segment whose receiver
+        died before unlinking it is then still cleaned up when the parent exits.
+        """
+        resource_tracker.ensure_running()
+
+    @staticmethod
+    def send(conn, obj):
+        # ForkingPickler also handles connections, e.g. a result pipe sent to the fork server
+        payload = ForkingPickler.dumps(obj, pickle.HIGHEST_PROTOCOL)
+        if len(payload) < Channel.threshold:
+            conn.send_bytes(payload)
+            return
+
+        shm = shared_memory.SharedMemory(create=True, size=len(payload))
+        shm.buf[:len(payload)] = payload
+        conn.send_bytes(Channel.SHM_HEADER + json.dumps([shm.name, len(payload)]).encode())
+        shm.close()
+
+    @staticmethod
+    def recv(conn):
+        message = conn.recv_bytes()
+        if not message.startswith(Channel.SHM_HEADER):
+            return pickle.loads(message)
+
+        name, size = json.loads(message[len(Channel.SHM_HEADER):])
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            with shm.buf[:size] as buffer:
+                return pickle.loads(buffer)
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+class CodeCache(object):
+    """
+    Cache of compiled code objects. The in-memory tier is an LRU of `capacity` entries keyed by (filename, source),
+    which lives as long as the process (e.g. a pool worker). The optional on-disk tier stores marshalled code objects
+    under the hash of (filename, source) in `cache_dir`, so that restarted workers start warm.
+    """
+
+    def __init__(self, capacity=1024, cache_dir=None):
+        self.capacity = capacity
+        self.cache_dir = cache_dir
+        self.codes = OrderedDict()
+        self.hits, self.disk_hits, self.misses = 0, 0, 0
+
+        # Captured before any reliability guard disables it
+        self.replace = os.replace
+
+        if self.cache_dir:
+            # Marshal data is only valid for the interpreter version that wrote it
+            self.cache_dir = os.path.join(self.cache_dir, importlib.util.MAGIC_NUMBER.hex())
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def compile(self, source, filename="<string>"):
+        # Hashed only on a miss: every job looks up its prelude statements and code again
+        code = self.codes.get((filename, source))
+        if code is not None:
+            self.hits += 1
+            self.codes.move_to_end((filename, source))
+            return code
+
+        key = generate_hash(f"{filename}\n{source}")
+        code = self.load(key)
+        if code is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            code = compile(source, filename, "exec")
+            self.dump(key, code)
+
+        self.codes[filename, source] = code
+        if len(self.codes) > self.capacity:
+            self.codes.popitem(last=False)
+        return code
+
+    def load(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, f"{key}.marshal"), "rb") as f:
+                return marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError) as e:
+            return None
+
+    def dump(self, key, code):
+        if not self.cache_dir:
+            return
+        path = os.path.join(self.cache_dir, f"{key}.marshal")
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                marshal.dump(code, f)
+            self.replace(temp_path, path)
+        except (OSError, ValueError) as e:
+            pass
+
+    def stats(self) -> Dict:
+        return dict(hits=self.hits, disk_hits=self.disk_hits, misses=self.misses, size=len(self.codes))
+
+
+class MemoryMeter(object):
+    """
+    Peak memory of a measured section, with a pluggable backend (sample['memory']):
+        tracemalloc: peak of the Python allocations traced by tracemalloc (default). Exact, but it slows down
+                     allocation-heavy code several times over and misses C-level allocations.
+        rusage:      peak RSS of the process (VmHWM, reset before the section), minus the RSS before the section.
+        psutil:      peak RSS of the process sampled by the parent while the job runs, minus the RSS before the section.
+        two_pass:    no tracer while the runtime is measured; the memory is traced by tracemalloc in a second run.
+    The RSS backends also see C-level allocations, but only page-granular growth: memory that the allocator already
+    holds from earlier work in the same process is not counted again.
+    """
+    backends = ["tracemalloc", "rusage", "psutil", "two_pass"]
+
+    # Sampling interval of the parent-side RSS sampler (seconds)
+    interval = 0.001
+
+    # Sections measured by the psutil backend in the current job, {key: (start, end, rss_before, rss_after)}
+    sections = dict()
+
+    page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def __init__(self, backend=None, key=0):
+        self.backend = backend or "tracemalloc"
+        if self.backend not in MemoryMeter.backends:
+            raise ValueError(f"Unknown memory backend: {self.backend}")
+        self.key = key
+        self.baseline, self.window_baseline, self.high = 0, 0, 0
+        self.start_time = None
+
+    def start(self):
+        if self.backend == "tracemalloc":
+            tracemalloc.start()
+        self.baseline = self.usage()
+        self.start_time = time.monotonic()
+        self.mark()
+
+    def stop(self):
+        if self.backend == "tracemalloc":
+            tracemalloc.stop()
+
+    def mark(self):
+        """
+        Starts a new peak window (e.g. one test case). The peak of the whole section is kept.
+        """
+        self.high = max(self.high, self.high_water())
+        self.reset_high_water()
+        self.window_baseline = self.usage()
+
+    def window_peak(self) -> Optional[int]:
+        """
+        Peak growth since the last mark, in bytes. None when measured elsewhere (psutil, two_pass).
+        """
+        if self.backend in ["psutil", "two_pass"]:
+            return None
+        return max(self.high_water() - self.window_baseline, 0)
+
+    def peak(self) -> Optional[int]:
+        """
+        Peak growth since the start, in bytes. None when measured elsewhere (psutil, two_pass).
+        """
+        if self.backend == "two_pass":
+            return None
+        if self.backend == "psutil":
+            # Settled by the parent from its RSS samples, see MemoryMeter.settle()
+            MemoryMeter.sections[self.key] = (self.start_time, time.monotonic(), self.baseline, self.usage())
+            return None
+        return max(max(self.high, self.high_water()) - self.baseline, 0)
+
+    def usage(self) -> int:
+        if self.backend == "tracemalloc":
+            return tracemalloc.get_traced_memory()[0]
+        if self.backend in ["rusage", "psutil"]:
+            return MemoryMeter.rss()
+        return 0
+
+    def high_water(self) -> int:
+        if self.backend == "tracemalloc":
+            return tracemalloc.get_traced_memory()[1]
+        if self.backend == "rusage":
+            return MemoryMeter.rss_peak()
+        return 0
+
+    def reset_high_water(self):
+        if self.backend == "tracemalloc":
+            tracemalloc.reset_peak()
+        elif self.backend == "rusage":
+            try:
+                # Resets VmHWM to the current RSS (Linux)
+                with open("/proc/self/clear_refs", "w") as f:
+                    f.write("5")
+            except OSError as e:
+                # The high-water mark then still includes earlier peaks of this process
+                pass
+
+    @staticmethod
+    def rss() -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * MemoryMeter.page_size
+        except OSError as e:
+            return psutil.Process().memory_info().rss
+
+    @staticmethod
+    def rss_peak() -> int:
+        try:
+            with open("/proc/self/status") as f:
+                return int(re.search(r"VmHWM:\s+(\d+)", f.read()).group(1)) * 1024
+        except (OSError, AttributeError) as e:
+            # Kilobytes on Linux, bytes on macOS
+            scale = 1 if platform.uname().system == 'Darwin' else 1024
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    @staticmethod
+    def wait(conn, pid, timeout, backend=None):
+        """
+        conn.poll(timeout) that meanwhile samples the RSS of process `pid` for the psutil backend.
+        Returns (ready, samples), where samples are (time.monotonic(), rss) pairs.
+        """
+        if backend != "psutil":
+            return conn.poll(timeout), None
+        try:
+            process = psutil.Process(pid)
+        except psutil.Error as e:
+            return conn.poll(timeout), None
+
+        samples = list()
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                samples.append((time.monotonic(), process.memory_info().rss))
+            except psutil.Error as e:
+                pass
+            remaining = deadline - time.monotonic()
+            if conn.poll(min(MemoryMeter.interval, max(remaining, 0))):
+                return True, samples
+            if remaining <= 0:
+                return False, samples
+
+    @staticmethod
+    def settle(kind, result, sections, samples):
+        """
+        Fills in the memory of the sections measured by the psutil backend, from the RSS samples of the parent.
+        """
+        for key, (start, end, rss_before, rss_after) in sections.items():
+            peak = max([rss for t, rss in samples or [] if start <= t <= end] + [rss_after])
+            peak = max(peak - rss_before, 0)
+            if kind == "execution":
+                result[2] = peak/10**3
+            elif kind == "execution_batch":
+                result[key][2] = peak/10**3
+            elif kind == "evaluation":
+                result['code_mem'] = peak/10**3
+            elif kind == "generation":
+                result['code_mem'] = peak
+        return result
+
+
+class MemoryCap(object):
+    """
+    Memory cap of a job: `limit` bytes on top of what the job process already uses when the job starts
+    (sample['memory_limit'], default Sandbox.MEMORY_LIMIT; None disables it).
+        rlimit: soft RLIMIT_AS and RLIMIT_DATA, lifted again after the job (pool workers serve many jobs). Python code
+                gets a MemoryError beyond the cap.
+        cgroup: if the memory controller of cgroup v2 is delegated to the sandbox (enabled in the subtree_control of
+                the parent of its cgroup), the job process also moves into a group of its own with memory.max, where
+                the kernel OOM-kills it beyond the cap.
+    Either way the job information reports the kernel's view of the job's peak: memory.peak of its group, else the
+    VmHWM high-water mark (reset at the start of the job), else ru_maxrss.
+    """
+    root = "/sys/fs/cgroup"
+
+    # (pid, delegated_parent()) of the last lookup, so that a pool worker reads its cgroup once rather than per job
+    delegation = None
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.rlimits = dict()
+        self.group = None
+        self.origin = None
+        self.high_water = False
+        # The guard of the job disables os.rmdir
+        self.rmdir = os.rmdir
+
+    def apply(self):
+        self.high_water = MemoryCap.reset_high_water()
+        if self.limit is None:
+            return
+        status = MemoryCap.status()
+        for limit, field in [(resource.RLIMIT_AS, 'VmSize'), (resource.RLIMIT_DATA, 'VmData')]:
+            soft, hard = resource.getrlimit(limit)
+            cap = status.get(field, 0) + self.limit
+            if hard != resource.RLIM_INFINITY:
+                cap = min(cap, hard)
+            resource.setrlimit(limit, (cap, hard))
+            self.rlimits[limit] = (soft, hard)
+        self.enter_group()
+
+    def release(self) -> Dict:
+        """
+        Lifts the cap. Returns the job information: memory_limit, kernel_peak_kb and kernel_peak_source.
+        """
+        info = dict(memory_limit=self.limit, **self.kernel_peak())
+        for limit, limits in self.rlimits.items():
+            resource.setrlimit(limit, limits)
+        self.leave_group()
+        return info
+
+    def kernel_peak(self) -> Dict:
+        if self.group is not None:
+            try:
+                with open(os.path.join(self.group, "memory.peak")) as f:
+                    return dict(kernel_peak_kb=int(f.read())/10**3, kernel_peak_source="memory.peak")
+            except (OSError, ValueError) as e:
+                pass
+        if self.high_water:
+            return dict(kernel_peak_kb=MemoryMeter.rss_peak()/10**3, kernel_peak_source="VmHWM")
+        # Kilobytes on Linux, bytes on macOS
+        scale = 1 if platform.uname().system == 'Darwin' else 1024
+        return dict(kernel_peak_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss*scale/10**3, kernel_peak_source="ru_maxrss")
+
+    @staticmethod
+    def status() -> Dict:
+        # Virtual memory fields of /proc/self/status, in bytes
+        try:
+            with open("/proc/self/status") as f:
+                return {key: int(value)*1024 for key, value in re.findall(r"(Vm\w+):\s+(\d+) kB", f.read())}
+        except OSError as e:
+            return dict()
+
+    @staticmethod
+    def reset_high_water() -> bool:
+        try:
+            # Resets VmHWM to the current RSS (Linux)
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")
+            return True
+        except OSError as e:
+            return False
+
+    @staticmethod
+    def delegated_parent():
+        """
+        (own cgroup, cgroup under which job groups are created) if the memory controller is delegated, else None.
+        Job groups are siblings of the sandbox's own group: a non-root group with processes cannot have children with
+        controllers enabled.
+        """
+        if MemoryCap.delegation is None or MemoryCap.delegation[0] != os.getpid():
+            MemoryCap.delegation = (os.getpid(), MemoryCap.find_delegated_parent())
+        return MemoryCap.delegation[1]
+
+    @staticmethod
+    def find_delegated_parent():
+        try:
+            with open("/proc/self/cgroup") as f:
+                path = next(line.strip()[3:] for line in f if line.startswith("0::"))
+            own = os.path.join(MemoryCap.root, path.lstrip("/"))
+            parent = own if path == "/" else os.path.dirname(own)
+            with open(os.path.join(parent, "cgroup.subtree_control")) as f:
+                if "memory" not in f.read().split():
+                    return None
+            return own, parent
+        except (OSError, StopIteration) as e:
+            return None
+
+    @staticmethod
+    def group_path(parent, pid):
+        return os.path.join(parent, f"venus-{pid}")
+
+    def enter_group(self):
+        groups = MemoryCap.delegated_parent()
+        if groups is None:
+            return
+        own, parent = groups
+        group = MemoryCap.group_path(parent, os.getpid())
+        try:
+            os.makedirs(group, exist_ok=True)
+            with open(os.path.join(group, "memory.max"), "w") as f:
+                f.write(str(self.limit))
+            if os.path.exists(os.path.join(group, "memory.swap.max")):
+                with open(os.path.join(group, "memory.swap.max"), "w") as f:
+                    f.write("0")
+            # "0" moves the writing process
+            with open(os.path.join(group, "cgroup.procs"), "w") as f:
+                f.write("0")
+            self.group, self.origin = group, own
+        except OSError as e:
+            # Not permitted after all: the rlimits still hold
+            pass
+
+    def leave_group(self):
+        if self.group is None:
+            return
+        try:
+            with open(os.path.join(self.origin, "cgroup.procs"), "w") as f:
+                f.write("0")
+            self.rmdir(self.group)
+        except OSError as e:
+            pass
+        self.group = None
+
+    @staticmethod
+    def reap(pid) -> Dict:
+        """
+        Parent side, after job process `pid` died without reporting: removes its group and tells whether the kernel
+        OOM-killed it. Returns {'oom_kill': True} or {}.
+        """
+        groups = MemoryCap.delegated_parent()
+        if groups is None:
+            return dict()
+        group = MemoryCap.group_path(groups[1], pid)
+        if not os.path.isdir(group):
+            return dict()
+        oom_kill = False
+        try:
+            with open(os.path.join(group, "memory.events")) as f:
+                oom_kill = int(re.search(r"oom_kill (\d+)", f.read()).group(1)) > 0
+        except (OSError, AttributeError) as e:
+            pass
+        for _ in range(10):
+            try:
+                os.rmdir(group)
+                break
+            except OSError as e:
+                # The killed process may not be gone yet
+                time.sleep(0.01)
+        return dict(oom_kill=True) if oom_kill else dict()
+
+
 class Sandbox(object):
+    """
+    Execution modes:
+        spawn:  a fresh process per job (default)
+        zygote: a fork server with preloaded preludes forks a copy-on-write child per job
+        pool:   long-lived, pre-initialized workers (see SandboxPool)
+    """
+    # Namespace prelude for LeetCode-style solutions (code execution / test case validation)
+    EXECUTION_PRELUDE = [
+        "import re",
+        "import sys",
+        "import json",
+        "import math",
+        "import copy",
+        "import lxml",
+        "import heapq",
+        "import pickle",
+        "import bisect",
+        "import string",
+        "import random",
+        "import itertools",
+        "import functools",
+        "import collections",
+        "from json import loads",
+        "from sys import maxsize, stdin",
+        "from functools import lru_cache, cache",
+        "from heapq import heappush, heappop, heapify",
+        "from bisect import bisect_left, bisect_right",
+        "from typing import Set,Dict, List, Optional, Tuple",
+        "from math import floor, ceil, factorial, sqrt, inf, atan2",
+        "from itertools import combinations, permutations, zip_longest",
+        "from collections import OrderedDict, defaultdict, Counter, deque",
+        "class ListNode:\n\tdef __init__(self, val=0, next=None):\n\t\tself.val=val\n\t\tself.next=next",
+        "class TreeNode:\n\tdef __init__(self, val=0, left=None, right=None):\n\t\tself.val=val\n\t\tself.left=left\n\t\tself.right=right",
+        "def print(*args):pass",
+    ]
+
+    # Namespace prelude for synthesized problems (case generation / case evaluation)
+    SYNTHESIS_PRELUDE = [
+        "import re",
+        "import os",
+        "import sys",
+        "import lxml",
+        "import string",
+        "import pickle",
+        "import feedparser",
+        "import matplotlib",
+        "from typing import List, Optional, Tuple",
+        "from collections import deque, defaultdict, OrderedDict",
+        "def print(*args):pass",
+    ]
+
+    # Prelude namespaces built by Sandbox.preload()
+    preludes = dict()
+
+    # Time at which the namespace prelude of the current job was ready
+    prelude_time = None
+
+    # Whether a time limit fired in the current job, see Sandbox.time_limit
+    interrupted = False
+
+    # Working directory of the jobs of a pool worker, instead of a fresh tempdir per job
+    workdir = None
+
+    # Memory cap of a job in bytes, on top of the footprint of the job process (sample['memory_limit']), see MemoryCap
+    MEMORY_LIMIT = int(os.getenv("VENUS_MEMORY_LIMIT", 2 * 1024**3)) or None
+
+    # Defaults of the runtime measurement mode (sample['measure'])
+    MEASURE_CONFIG = {
+        "warmup": 1,          # untimed runs before measuring
+        "min_runs": 5,        # timed runs before checking the confidence interval
+        "max_runs": 30,       # timed runs cap
+        "ci_width": 0.05,     # target width of the median confidence interval, relative to the median
+        "confidence": 0.95,
+        "budget": 10,         # seconds: no further run once spent (at least one timed run)
+    }
+
+    # Defaults of the complexity estimation pass (sample['scaling'])
+    SCALING_CONFIG = {
+        "min_size": 16,             # first rung of the size ladder
+        "max_size": 2**16,          # last rung
+        "ratio": 2,                 # between two rungs
+        "repeat": 3,                # inputs per rung
+        "samples": 48,              # inputs of a generator without a `size` parameter
+        "budget": 10,               # seconds for the whole pass
+        "rung_limit": 1,            # seconds: no further rung after a call this slow
+        "reference_size": 10**5,    # size at which the fitted curves are projected
+    }
+
+    # Defaults of the hotspot profiling pass (sample['profile'])
+    PROFILE_CONFIG = {
+        "interval": 0.001,      # seconds of CPU time between two stack samples
+        "min_samples": 50,      # the suite is re-run until this many samples landed in the solution
+        "budget": 0.5,          # seconds for the sampled runs, and again for the line hit run
+        "top": 10,              # rows of each hotspot table
+        "line_hits": True,      # one more run under a line tracer for exact hit and call counts
+    }
+
+    # Defaults of the allocation site pass (sample['allocations'])
+    ALLOCATION_CONFIG = {
+        "frames": 16,           # traceback depth, to find the solution line under helpers it calls
+        "top": 10,              # allocation sites reported
+        "growth": 0.1,          # new snapshot once traced memory grew this much over the last one
+        "budget": 2,            # seconds for the traced run of the most demanding test case
+    }
+
+    # Candidate complexity classes of the scaling fit, simplest first
+    COMPLEXITY_CLASSES = OrderedDict([
+        ("O(1)", lambda n: np.ones_like(n)),
+        ("O(log n)", lambda n: np.log2(n)),
+        ("O(n)", lambda n: n),
+        ("O(n log n)", lambda n: n * np.log2(n)),
+        ("O(n^2)", lambda n: n**2),
+        ("O(n^3)", lambda n: n**3),
+    ])
+
+    # Defaults of per-problem timeouts calibrated from reference solutions (problem['adaptive_timeout'])
+    ADAPTIVE_TIMEOUT = {
+        "factor": 10,         # times the runtime of the slowest passing reference solution
+        "floor": 1,           # seconds, covers the fixed cost of loading the test suite
+        "ceiling": 120,       # seconds
+        "references": 5,      # reference solutions sampled for the calibration
+    }
+
+    # Time limits of the optional passes, which run after the correctness run and outside of its limit (see
+    # Sandbox.pass_timeouts): the budget of the pass, if it has one, plus a number of runs of the test suite at
+    # sample['timeout'] each
+    PASS_TIMEOUT = {
+        "slack": 1,             # runs of an untraced pass (runtime measurement, profiling)
+        "traced_slack": 30,     # runs of a traced pass (two_pass memory, instruction counts, scaling, allocation sites)
+        "ceiling": 600,         # seconds per pass
+    }
+
+    # Defaults of the differential test case validation (Sandbox.run_test_case_validation)
+    VALIDATION_CONFIG = {
+        "case_count": 64,           # generated inputs
+        "chunk_size": 8,            # solutions per job
+        "solution_timeout": 10,     # seconds per solution over all inputs
+        "min_agreement": None,      # share of solutions that must agree with the majority on every case (None: any)
+    }
+
+    # Compiled solutions, test case functions and harness statements of this process
+    code_cache = CodeCache(capacity=1024, cache_dir=os.getenv("VENUS_CODE_CACHE"))
+
+    # Job kind -> (child target, number of output lists, result collector)
+    JOBS = {
+        "execution": ("code_execution", 1, "collect_code_execution"),
+        "execution_batch": ("code_execution_batch", 1, "collect_code_execution_batch"),
+        "evaluation": ("case_evaluation", 1, "collect_evaluation"),
+        "generation": ("case_generation", 1, "collect_generation"),
+        "validation": ("test_case_validation", 2, "collect_test_case_validation"),
+        "differential": ("differential_execution", 1, "collect_differential_execution"),
+        "native_execution": ("native_execution", 1, "collect_code_execution"),
+        "managed_execution": ("managed_execution", 1, "collect_code_execution"),
+    }
+
+    # Compiled harnesses of C++, Go and Rust solutions
+    native = NativeBuilder(cache_dir=os.getenv("VENUS_BUILD_CACHE"))
+
+    # Warm JVM and node workers of Java and JavaScript solutions
+    managed = ManagedRuntime(cache_dir=os.getenv("VENUS_BUILD_CACHE"))
+
+    def __init__(self, mode="spawn", n_workers=None, pin=False, max_load=None):
+        assert mode in ["spawn", "zygote", "pool"], f"Unknown execution mode: {mode}"
+        if mode != "pool" and (n_workers is not None or pin or max_load is not None):
+            raise ValueError(f"n_workers, pin and max_load only apply to the pool mode, not to {mode}")
+        self.mode = mode
+        self.pool = SandboxPool(n_workers, pin=pin, max_load=max_load) if mode == "pool" else None
+        self.zygote = Zygote() if mode == "zygote" else None
+
     @staticmethod
     @contextlib.contextmanager
     def time_limit(seconds: float):
         def signal_handler(signum, frame):
+            Sandbox.interrupted = True
             raise TimeoutException("Timed out")
 
         signal.setitimer(signal.ITIMER_REAL, seconds)
@@ -102,6 +744,11 @@ class Sandbox(object):
     @staticmethod
     @contextlib.contextmanager
     def create_tempdir():
+        if Sandbox.workdir is not None:
+            # A pool worker's own directory, left empty by every job (see SandboxPool.worker)
+            with Sandbox.chdir(Sandbox.workdir):
+                yield Sandbox.workdir
+            return
         with tempfile.TemporaryDirectory() as dirname:
             with Sandbox.chdir(dirname):
                 yield dirname
@@ -136,6 +783,44 @@ class Sandbox(object):
         
         return ''.join(modified_tb_lines)
 
+    @staticmethod
+    def prelude(statements):
+        if tuple(statements) in Sandbox.preludes:
+            # Preloaded by a fork server: every forked job owns a copy-on-write copy.
+            namespace = dict(Sandbox.preludes[tuple(statements)])
+        else:
+            namespace = {}
+            for statement in statements:
+                exec(Sandbox.code_cache.compile(statement), namespace)
+        Sandbox.prelude_time = time.monotonic()
+        return namespace
+
+    @staticmethod
+    def preload():
+        """
+        Builds every namespace prelude once. Only for processes that fork a fresh child per job, since the prelude
+        objects (e.g. ListNode and TreeNode) are shared by all jobs running in the same process.
+        """
+        for statements in [Sandbox.EXECUTION_PRELUDE, Sandbox.SYNTHESIS_PRELUDE]:
+            try:
+                Sandbox.preludes[tuple(statements)] = Sandbox.prelude(statements)
+            except Exception as e:
+                # Missing optional modules are reported by the job itself
+                pass
+
+    @staticmethod
+    def warmup():
+        """
+        Imports every prelude module once, so that jobs running later in this process only hit sys.modules.
+        """
+        for statements in [Sandbox.EXECUTION_PRELUDE, Sandbox.SYNTHESIS_PRELUDE]:
+            for statement in statements:
+                try:
+                    exec(statement, {})
+                except Exception as e:
+                    # Missing optional modules are reported by the job itself
+                    pass
+
     @staticmethod
     def reliability_guard(maximum_memory_bytes: Optional[int] = None):
         """
@@ -148,14 +833,8 @@ class Sandbox(object):
         """
 
         if maximum_memory_bytes is not None:
-            import resource
-            resource.setrlimit(resource.RLIMIT_AS,
-                               (maximum_memory_bytes, maximum_memory_bytes))
-            resource.setrlimit(resource.RLIMIT_DATA,
-                               (maximum_memory_bytes, maximum_memory_bytes))
-            if platform.uname().system != 'Darwin':
-                resource.setrlimit(resource.RLIMIT_STACK,
-                                   (maximum_memory_bytes, maximum_memory_bytes))
+            # Jobs run by Sandbox.execute are already capped by MemoryCap (sample['memory_limit'])
+            MemoryCap(maximum_memory_bytes).apply()
 
         faulthandler.disable()
 
@@ -210,6 +889,21 @@ class Sandbox(object):
         sys.modules['resource'] = None
         sys.modules['psutil'] = None
         sys.modules['tkinter'] = None
+
+    @staticmethod
+    def guard_intact():
+        """
+        Checks that the reliability guard still holds after a job, i.e. the code did not restore any disabled function.
+        """
+        import os
+        import builtins
+        import subprocess
+        disabled = [
+            os.kill, os.system, os.putenv, os.remove, os.removedirs, os.setuid, os.fork, os.forkpty, os.killpg, 
+            os.rename, os.renames, os.truncate, os.replace, os.unlink, os.chmod, os.chown, os.chroot,
+            subprocess.Popen, builtins.exit, builtins.quit,
+        ]
+        return all(function is None for function in disabled)
     
     @staticmethod
     def test_case_validation(sample, test_cases, status):
@@ -227,68 +921,21 @@ class Sandbox(object):
                 
                 try:                    
                     # Global Namespace
-                    namespace = {}                
-                    exec("import re", namespace)
-                    exec("import sys", namespace)
-                    exec("import json", namespace)
-                    exec("import math", namespace)
-                    exec("import copy", namespace)
-                    exec("import lxml", namespace)
-                    exec("import heapq", namespace)
-                    exec("import pickle", namespace)
-                    exec("import bisect", namespace)
-                    exec("import string", namespace)
-                    exec("import string", namespace)
-                    exec("import random", namespace)
-                    exec("import itertools", namespace)
-                    exec("import functools", namespace)
-                    exec("import collections", namespace)
-                    exec("from json import loads", namespace)
-                    exec("from sys import maxsize, stdin", namespace)
-                    exec("from functools import lru_cache, cache", namespace)
-                    exec("from heapq import heappush, heappop, heapify", namespace)
-                    exec("from bisect import bisect_left, bisect_right", namespace)
-                    exec("from math import floor, ceil, factorial, sqrt, inf", namespace)
-                    exec("from typing import Set,Dict, List, Optional, Tuple", namespace)
-                    exec("from itertools import combinations, permutations, zip_longest", namespace)
-                    exec("from collections import OrderedDict, defaultdict, Counter, deque", namespace)
-                    
-                    exec("class ListNode:\n\tdef __init__(self, val=0, next=None):\n\t\tself.val=val\n\t\tself.next=next", namespace)
-                    exec("class TreeNode:\n\tdef __init__(self, val=0, left=None, right=None):\n\t\tself.val=val\n\t\tself.left=left\n\t\tself.right=right", namespace)
-                    exec("def print(*args):pass", namespace)
+                    namespace = Sandbox.prelude(Sandbox.EXECUTION_PRELUDE)
+                    compiled = Sandbox.code_cache.compile
                     
                     with Sandbox.swallow_io():
                         with Sandbox.time_limit(sample['timeout']):
-                            canonical_solution = random.choice(sample['solutions'])
                             try:
-                                exec(canonical_solution, namespace)
-                                exec("solution = Solution()", namespace)
-                                exec(sample['test_case_functions']['serialize_input'], namespace)
-                                exec(sample['test_case_functions']['deserialize_input'], namespace)
-                                exec(sample['test_case_functions']['serialize_output'], namespace)
-                                exec(sample['test_case_functions']['deserialize_output'], namespace)
-                                exec(sample['test_case_functions']['generate_test_case_input'], namespace)
-
-                                for _ in range(64):
-                                    exec(canonical_solution, namespace)
-                                    exec("solution = Solution()", namespace)
-                                    exec("test_case_input = generate_test_case_input()", namespace)
-                                    exec("test_case_input_serialized = serialize_input(test_case_input)", namespace)
-                                    exec("test_case_input = deserialize_input(test_case_input_serialized)", namespace)
-                                    exec("test_case_output = solution.{}(*test_case_input)".format(sample['test_case_functions']['entry_point']), namespace)
-                                    exec("test_case_output_serialized = serialize_output(test_case_output)", namespace)
-                                    exec("test_case_output = deserialize_output(test_case_output_serialized)", namespace)
-                                    
-                                    for _ in range(min(8, len(sample['solutions']))):
-                                        exec(random.choice(sample['solutions']), namespace)
-                                        exec("solution = Solution()", namespace)
-                                        exec("test_case_output_ = solution.{}(*test_case_input)".format(sample['test_case_functions']['entry_point']), namespace)
-                                        exec("test_case_output_serialized_ = serialize_output(test_case_output)", namespace)
-                                        exec("test_case_output_ = deserialize_output(test_case_output_serialized)", namespace)
-                                        if namespace['test_case_output'] != namespace['test_case_output_']:
-                                            raise Exception(f"Test case output mismatch")
-                                    
-                                    test_cases += [{"input": namespace['test_case_input_serialized'], "output": namespace['test_case_output_serialized']}]
+                                for function in ['serialize_input', 'deserialize_input', 'generate_test_case_input']:
+                                    exec(compiled(sample['test_case_functions'][function]), namespace)
+
+                                # Inputs only: the outputs come from the differential run of the solutions
+                                for _ in range(sample['case_count']):
+                                    exec(compiled("test_case_input = generate_test_case_input()"), namespace)
+                                    exec(compiled("test_case_input_serialized = serialize_input(test_case_input)"), namespace)
+                                    exec(compiled("test_case_input = deserialize_input(test_case_input_serialized)"), namespace)
+                                    test_cases += [{"input": namespace['test_case_input_serialized']}]
                                 status += ["success"]
                             except Exception as e:
                                 status += [f"failed@{e}"]
@@ -302,27 +949,142 @@ class Sandbox(object):
         except Exception as e:
             pass
         
+    def run_test_case_validation(self, sample) -> Dict:
+        """
+        Differential validation of generated test case functions: the inputs are generated once, every solution in
+        sample['solutions'] runs once over all of them (chunks of solutions run in parallel jobs), and the expected
+        output of each case is the majority output. Optional keys are those of Sandbox.VALIDATION_CONFIG.
+
+        Returns dict(status, test_cases, agreement), where agreement[i] is the share of cases on which solution i
+        produced the majority output. With sample['min_agreement'], validation succeeds only when at least that share
+        of the solutions agree on every case. Leave it unset for problems with several correct outputs (any order, any
+        valid answer), where correct solutions disagree.
+        """
+        config = dict(Sandbox.VALIDATION_CONFIG, **{key: sample[key] for key in Sandbox.VALIDATION_CONFIG if key in sample})
+        result = self.run("validation", dict(sample, case_count=config['case_count']))
+        if result['status'] != "success":
+            return dict(result, agreement=None)
+
+        solutions = sample['solutions']
+        chunks = [solutions[index:index+config['chunk_size']] for index in range(0, len(solutions), config['chunk_size'])]
+        jobs = (
+            (index, "differential", {
+                "functions": sample['test_case_functions'], "inputs": [case['input'] for case in result['test_cases']],
+                "solutions": chunk, "solution_timeout": config['solution_timeout'], "timeout": config['solution_timeout']*len(chunk),
+            })
+            for index, chunk in enumerate(chunks)
+        )
+        vectors = [None] * len(solutions)
+        for index, outputs in self.run_samples(jobs):
+            # Drop the job information
+            outputs = [vector for vector in outputs if not isinstance(vector, dict)]
+            offset = index * config['chunk_size']
+            vectors[offset:offset+len(outputs)] = outputs
+
+        # A solution of a chunk that died produced no outputs
+        case_count = len(result['test_cases'])
+        vectors = [vector if vector is not None else [None] * case_count for vector in vectors]
+        test_cases, agreement = Sandbox.differential_consensus(result['test_cases'], vectors)
+
+        agreeing = sum(rate == 1.0 for rate in agreement)
+        status = "success"
+        if not solutions or (config['min_agreement'] is not None and agreeing < config['min_agreement'] * len(solutions)):
+            status = f"failed@Test case output mismatch: {agreeing}/{len(solutions)} solutions agree on every case"
+        return dict(status=status, test_cases=test_cases, agreement=agreement)
+
     @staticmethod
-    def run_test_case_validation(sample) -> Dict:
+    def differential_consensus(inputs, vectors):
         """
-        Evaluates the functional correctness of a completion by running the test suite provided in the problem. 
+        The majority output of each case over the output vectors of all solutions (None: no output), and the share of
+        cases on which each solution matches it.
         """
+        test_cases = list()
+        for index, case in enumerate(inputs):
+            counts = Counter(vector[index] for vector in vectors if vector[index] is not None)
+            output = counts.most_common(1)[0][0] if counts else None
+            test_cases += [{"input": case['input'], "output": output}]
 
-        with Manager() as manager:
-            test_cases = manager.list()
-            status = manager.list()
+        agreement = list()
+        for vector in vectors:
+            matches = sum(output is not None and output == case['output'] for output, case in zip(vector, test_cases))
+            agreement.append(matches / len(test_cases) if test_cases else 0.0)
+        return test_cases, agreement
 
-            p = Process(target=Sandbox.test_case_validation, args=(sample, test_cases, status))
-            p.start()
-            p.join(timeout=sample['timeout']+1)
-            if p.is_alive():
-                p.kill()
+    @staticmethod
+    def collect_test_case_validation(test_cases, status) -> Dict:
+        if not status:
+            status = ["failed@timeout"]
+            
+        return dict(status=status[0], test_cases=list(test_cases))
 
-            if not status:
-                status = ["failed@timeout"]
+    @staticmethod
+    def differential_execution(sample, results):
+        try:
+            with Sandbox.create_tempdir():
+                # These system calls are needed when cleaning up tempdir.
+                import os
+                import shutil
+                rmtree = shutil.rmtree
+                rmdir = os.rmdir
+                chdir = os.chdir
                 
-            return dict(status=status[0], test_cases=list(test_cases))
-    
+                # Disable functionalities that can make destructive changes to the test.
+                Sandbox.reliability_guard()
+
+                with Sandbox.swallow_io():
+                    # Deserialize the inputs once for all solutions of the chunk
+                    compiled = Sandbox.code_cache.compile
+                    try:
+                        with Sandbox.time_limit(sample['solution_timeout']):
+                            base_namespace = Sandbox.prelude(Sandbox.EXECUTION_PRELUDE)
+                            for function in ['serialize_input', 'deserialize_input', 'serialize_output', 'deserialize_output']:
+                                exec(compiled(sample['functions'][function]), base_namespace)
+                            test_case_inputs = [base_namespace['deserialize_input'](test_case_input) for test_case_input in sample['inputs']]
+                            # Unpickling a snapshot copies plain inputs several times faster than deepcopy
+                            try:
+                                snapshot = pickle.dumps(test_case_inputs)
+                            except Exception as e:
+                                snapshot = None
+                    except Exception as e:
+                        test_case_inputs = None
+
+                    call = compiled("test_case_output = solution.{}(*test_case_input)".format(sample['functions']['entry_point']))
+                    serialize = compiled("test_case_output_serialized = serialize_output(test_case_output)")
+                    for solution in sample['solutions']:
+                        # Every solution gets its own namespace and a fresh copy of the inputs; a failing call
+                        # only costs the solution that case
+                        outputs = [None] * len(sample['inputs'])
+                        if test_case_inputs is not None:
+                            namespace = dict(base_namespace)
+                            inputs = copy.deepcopy(test_case_inputs) if snapshot is None else pickle.loads(snapshot)
+                            try:
+                                with Sandbox.time_limit(sample['solution_timeout']):
+                                    exec(compiled(solution), namespace)
+                                    for index, test_case_input in enumerate(inputs):
+                                        try:
+                                            exec(compiled("solution = Solution()"), namespace)
+                                            namespace['test_case_input'] = test_case_input
+                                            exec(call, namespace)
+                                            exec(serialize, namespace)
+                                            outputs[index] = namespace['test_case_output_serialized']
+                                        except TimeoutException:
+                                            raise
+                                        except Exception as e:
+                                            pass
+                            except Exception as e:
+                                pass
+                        results.append(outputs)
+
+                shutil.rmtree = rmtree
+                os.rmdir = rmdir
+                os.chdir = chdir
+        except Exception as e:
+            pass
+
+    @staticmethod
+    def collect_differential_execution(results):
+        return list(results)
+
     @staticmethod
     def code_execution(sample, results):
         try:
@@ -338,98 +1100,253 @@ class Sandbox(object):
                 Sandbox.reliability_guard()
                           
                 with Sandbox.swallow_io():
-                    with Sandbox.time_limit(sample['timeout']):
-                        # execute the code here
-                        try:
-                            namespace = {}
-                            exec("import re", namespace)
-                            exec("import sys", namespace)
-                            exec("import json", namespace)
-                            exec("import math", namespace)
-                            exec("import copy", namespace)
-                            exec("import lxml", namespace)
-                            exec("import heapq", namespace)
-                            exec("import pickle", namespace)
-                            exec("import bisect", namespace)
-                            exec("import string", namespace)
-                            exec("import string", namespace)
-                            exec("import random", namespace)
-                            exec("import itertools", namespace)
-                            exec("import functools", namespace)
-                            exec("import collections", namespace)
-                            exec("from json import loads", namespace)
-                            exec("from sys import maxsize, stdin", namespace)
-                            exec("from functools import lru_cache, cache", namespace)
-                            exec("from heapq import heappush, heappop, heapify", namespace)
-                            exec("from bisect import bisect_left, bisect_right", namespace)
-                            exec("from typing import Set,Dict, List, Optional, Tuple", namespace)
-                            exec("from math import floor, ceil, factorial, sqrt, inf, atan2", namespace)
-                            exec("from itertools import combinations, permutations, zip_longest", namespace)
-                            exec("from collections import OrderedDict, defaultdict, Counter, deque", namespace)
-                            
-                            exec("class ListNode:\n\tdef __init__(self, val=0, next=None):\n\t\tself.val=val\n\t\tself.next=next", namespace)
-                            exec("class TreeNode:\n\tdef __init__(self, val=0, left=None, right=None):\n\t\tself.val=val\n\t\tself.left=left\n\t\tself.right=right", namespace)
-                            exec("def print(*args):pass", namespace)
+                    # execute the code here
+                    try:
+                        with Sandbox.time_limit(sample['timeout']):
+                            namespace = Sandbox.prelude(Sandbox.EXECUTION_PRELUDE)
+                            compiled = Sandbox.code_cache.compile
                             
-                            tracemalloc.start()
+                            meter = MemoryMeter(sample.get('memory'))
+                            meter.start()
                             start_time = time.process_time_ns()
                             
-                            exec(sample['solution'], namespace)
-                            exec("solution = Solution()", namespace)
-                            exec(sample['functions']['serialize_input'], namespace)
-                            exec(sample['functions']['deserialize_input'], namespace)
-                            exec(sample['functions']['serialize_output'], namespace)
-                            exec(sample['functions']['deserialize_output'], namespace)
-                            exec(sample['functions']['generate_test_case_input'], namespace)
-
-                            for test_case in sample['test_cases']:
-                                s_test_case_input_serialized = test_case['input']
-                                s_test_case_output_serialized = test_case['output']
-                                
-                                namespace['test_case_input_serialized'] = s_test_case_input_serialized
-                                exec("test_case_input = deserialize_input(test_case_input_serialized)", namespace)
-                                exec("test_case_output = solution.{}(*test_case_input)".format(sample['functions']['entry_point']), namespace)
-                                exec("test_case_output_serialized = serialize_output(test_case_output)", namespace)
-                                
-                                test_case_output_serialized = namespace['test_case_output_serialized']
-                                
-                                if test_case_output_serialized != s_test_case_output_serialized:
-                                    raise Exception(f"Test case output mismatch")
+                            exec(compiled(sample['solution']), namespace)
+                            exec(compiled("solution = Solution()"), namespace)
+                            exec(compiled(sample['functions']['serialize_input']), namespace)
+                            exec(compiled(sample['functions']['deserialize_input']), namespace)
+                            exec(compiled(sample['functions']['serialize_output']), namespace)
+                            exec(compiled(sample['functions']['deserialize_output']), namespace)
+                            exec(compiled(sample['functions']['generate_test_case_input']), namespace)
+
+                            entry_point = "test_case_output = solution.{}(*test_case_input)".format(sample['functions']['entry_point'])
+                            cases = Sandbox.run_test_cases(namespace, entry_point, sample['test_cases'], meter=meter, record=sample.get('details', False))
                             
                             end_time = time.process_time_ns()
-                            current, peak = tracemalloc.get_traced_memory()
+                            peak = meter.peak()
+                            meter.stop()
+
+                            details = dict()
+                            if cases is not None:
+                                details['cases'] = cases
+                                if not cases['passed'].all():
+                                    raise Sandbox.CaseMismatch(details)
+
+                            # Filled in by the parent for the psutil backend
+                            result = ["pass", (end_time-start_time)/10**6, None if peak is None else peak/10**3]
+
+                            test_case_inputs = None
+                            if Sandbox.pass_timeouts(sample):
+                                # Inputs of the optional passes, deserialized untimed
+                                test_case_inputs = [namespace['deserialize_input'](test_case['input']) for test_case in sample['test_cases']]
+
+                        Sandbox.optional_passes(sample, namespace, sample['solution'], entry_point, test_case_inputs, result, details)
+                        results.extend(result)
+                        if details:
+                            results.append(details)
+                    except Sandbox.CaseMismatch as e:
+                        results.append("failed@code_error:Test case output mismatch")
+                        results.append(e.details)
+                    except TimeoutException as e:
+                        results.append("failed@timeout")
+                    except MemoryError as e:
+                        results.append("failed@memory")
+                    except Exception as e:
+                        results.append(f"failed@code_error:{e}")
+                    finally:
+                        tracemalloc.stop()
+
+                shutil.rmtree = rmtree
+                os.rmdir = rmdir
+                os.chdir = chdir
+        except Exception as e:
+            results.append(f"failed@sandbox_error:{e}")
+    
+    def run_code_execution(self, sample) -> Dict:
+        """
+        Returns ['pass', runtime_ms, peak_kb] or [status], where a solution over its memory cap (sample['memory_limit'],
+        see MemoryCap) fails with 'failed@memory'. The trailing dict always carries the kernel-reported peak of the job
+        process next to peak_kb. Optional passes report into it too:
+            sample['details']:      every test case is run (even after a mismatch), per-case vectors under 'cases',
+                                    see Sandbox.run_test_cases
+            sample['measure']:      the runtime is the median of repeated timed runs of the solution calls alone,
+                                    statistics under 'runtime', see Sandbox.MEASURE_CONFIG
+            sample['instructions']: deterministic instruction counts under 'instructions', see
+                                    Sandbox.count_instructions
+            sample['scaling']:      estimated time and memory complexity under 'scaling', from runs on generated inputs
+                                    of growing size, see Sandbox.scaling_pass and Sandbox.SCALING_CONFIG.
+            sample['profile']:      per-function and per-line hotspots (sampled self time, traced hit counts) under
+                                    'profile', see Sandbox.profile_hotspots and Sandbox.PROFILE_CONFIG. Render them
+                                    with Sandbox.hotspot_table.
+            sample['allocations']:  the top allocation sites of the solution at its peak under 'allocations', see
+                                    Sandbox.allocation_sites and Sandbox.ALLOCATION_CONFIG. Render them with
+                                    Sandbox.allocation_table.
+        sample['timeout'] only bounds the correctness run. The passes run after it, each under its own time limit (see
+        Sandbox.pass_timeouts); a pass over its limit reports None and is listed under 'timed_out'.
+        With sample['adaptive_timeout'] set (see Sandbox.calibrate_timeout), it replaces sample['timeout'] for an
+        untraced correctness run (see Sandbox.limit), and the trailing dict records the limit and whether the solution
+        was killed by it.
+        """
+        if sample.get('lang', 'python3') in NativeBuilder.languages:
+            return self.run_native_execution(sample)
+        if sample.get('lang', 'python3') in ManagedRuntime.languages:
+            return self.run_managed_execution(sample)
+        result = self.run("execution", Sandbox.limit(sample))
+        return Sandbox.tag_timeout(result, sample)
+
+    def run_native_execution(self, sample, build=None) -> List:
+        """
+        Runs a C++, Go or Rust solution (sample['lang']) in a harness generated from sample['code_prompt']. The test
+        case functions stay in Python. Returns ['pass', run_ms, peak_kb, {'compile_ms', 'build_cached'}] or [status],
+        where run_ms only covers the solution calls and compile_ms is 0 for a cached binary.
+        """
+        if build is None:
+            try:
+                build = Sandbox.native.build(sample['lang'], sample['solution'], sample['code_prompt'])
+            except (SignatureException, CompileException) as e:
+                build = e
+
+        if isinstance(build, SignatureException):
+            return [f"failed@harness_error:{build}"]
+        if isinstance(build, CompileException):
+            return [f"failed@compile_error:{build}", dict(compile_ms=build.compile_ms)]
+
+        result = self.run("native_execution", dict(Sandbox.limit(sample), binary=build['binary']))
+        result = Sandbox.attach(result, dict(compile_ms=build['compile_ms'], build_cached=build['cached']))
+        return Sandbox.tag_timeout(result, sample)
+
+    @staticmethod
+    def native_execution(sample, results):
+        try:
+            with Sandbox.create_tempdir():
+                # These system calls are needed when cleaning up tempdir.
+                import os
+                import shutil
+                rmtree = shutil.rmtree
+                rmdir = os.rmdir
+                chdir = os.chdir
+                kill = os.kill
+
+                # The harness starts before the guard disables process creation
+                process = subprocess.Popen(
+                    [sample['binary']], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                    preexec_fn=NativeBuilder.limits(sample['timeout']),
+                )
+
+                # Disable functionalities that can make destructive changes to the test.
+                Sandbox.reliability_guard()
+
+                with Sandbox.swallow_io():
+                    with Sandbox.time_limit(sample['timeout']):
+                        try:
+                            namespace = Sandbox.prelude(Sandbox.EXECUTION_PRELUDE)
+                            compiled = Sandbox.code_cache.compile
+                            for function in ['serialize_input', 'deserialize_input', 'serialize_output', 'deserialize_output']:
+                                exec(compiled(sample['functions'][function]), namespace)
+
+                            signature = NativeBuilder.signature(sample['lang'], sample['code_prompt'])
+                            test_case_inputs = [namespace['deserialize_input'](test_case['input']) for test_case in sample['test_cases']]
+                            stdout, stderr = process.communicate(NativeBuilder.encode_inputs(test_case_inputs, signature))
+                            if process.returncode != 0:
+                                if NativeBuilder.out_of_memory(stderr):
+                                    raise MemoryError()
+                                raise Exception(f"exit code {process.returncode}: {stderr.decode(errors='replace')[-500:]}")
+                            outputs, peak = NativeBuilder.decode_outputs(stdout, signature)
+                            details = dict()
+                            runtime = Sandbox.check_outputs(namespace, sample['test_cases'], outputs, details, sample.get('details', False))
+
                             results.append("pass")
-                            results.append((end_time-start_time)/10**6)
-                            results.append(peak/10**3)
-                            
-                            tracemalloc.stop()
+                            results.append(runtime/10**6)
+                            # VmHWM is in KiB
+                            results.append(peak*1024/10**3)
+                            if details:
+                                results.append(details)
+                        except Sandbox.CaseMismatch as e:
+                            results.append("failed@code_error:Test case output mismatch")
+                            results.append(e.details)
+                        except TimeoutException as e:
+                            results.append("failed@timeout")
+                        except MemoryError as e:
+                            results.append("failed@memory")
                         except Exception as e:
                             results.append(f"failed@code_error:{e}")
+                        finally:
+                            if process.poll() is None:
+                                kill(process.pid, signal.SIGKILL)
+                                process.wait()
 
                 shutil.rmtree = rmtree
                 os.rmdir = rmdir
                 os.chdir = chdir
         except Exception as e:
             results.append(f"failed@sandbox_error:{e}")
-    
+
     @staticmethod
-    def run_code_execution(sample) -> Dict:
-        with Manager() as manager:
-            results = manager.list()
+    def check_outputs(namespace, test_cases, outputs, details, record=False):
+        """
+        Checks the (call_ns, output) pairs of a native or managed run against the test cases and returns the total call
+        time (ns). Without `record`, raises on the first mismatch. With `record`, every case is checked, per-case
+        vectors (as in Sandbox.run_test_cases, without memory) go into details['cases'], and Sandbox.CaseMismatch is
+        raised after a failing run.
+        """
+        cases = None
+        if record:
+            count = len(test_cases)
+            cases = {
+                "runtime": np.zeros(count, dtype=np.float32),
+                "memory": np.full(count, np.nan, dtype=np.float32),
+                "output_size": np.zeros(count, dtype=np.int32),
+                "passed": np.zeros(count, dtype=np.bool_),
+            }
 
-            p = Process(target=Sandbox.code_execution, args=(sample, results))
-            p.start()
-            p.join(timeout=sample['timeout']+1)
-            if p.is_alive():
-                p.kill()
+        runtime = 0
+        for index, (test_case, (call_ns, output)) in enumerate(zip(test_cases, outputs)):
+            test_case_output_serialized = namespace['serialize_output'](output)
+            passed = test_case_output_serialized == test_case['output']
+            runtime += call_ns
+            if cases is not None:
+                cases['runtime'][index] = call_ns/10**6
+                cases['output_size'][index] = len(test_case_output_serialized)
+                cases['passed'][index] = passed
+            elif not passed:
+                raise Exception(f"Test case output mismatch")
+        if len(outputs) != len(test_cases):
+            raise Exception(f"Test case output missing")
+
+        if cases is not None:
+            details['cases'] = cases
+            if not cases['passed'].all():
+                raise Sandbox.CaseMismatch(details)
+        return runtime
+
+    def run_managed_execution(self, sample) -> List:
+        """
+        Runs a Java or JavaScript solution (sample['lang']) on a warm VM worker. Returns ['pass', run_ms, peak_kb,
+        {'warmup_ms', 'compile_ms', 'vm_jobs'}] or [status], where run_ms is the steady-state time of the solution
+        calls, warmup_ms the time of the same calls on the first (JIT warmup) pass, peak_kb the heap growth, and vm_jobs
+        the number of jobs the worker has served so far.
+        """
+        try:
+            ManagedRuntime.signature(sample['lang'], sample['code_prompt'])
+            worker = Sandbox.managed.checkout(sample['lang'])
+        except SignatureException as e:
+            return [f"failed@harness_error:{e}"]
+        except CompileException as e:
+            return [f"failed@compile_error:{e}"]
+        except Exception as e:
+            return [f"failed@sandbox_error:{e}"]
+
+        recycle = True
+        try:
+            result = self.run("managed_execution", dict(Sandbox.limit(sample), address=worker.address))
+            # Without a verdict from the worker (a timeout, a crash), it may still be running the solution
+            recycle = result[-1].pop('vm_escape', True) if isinstance(result[-1], dict) else True
+        finally:
+            Sandbox.managed.checkin(worker, recycle)
+        result = Sandbox.attach(result, dict(vm_jobs=worker.jobs))
+        return Sandbox.tag_timeout(result, sample)
 
-            if not results:
-                results = ["failed@timeout"]
-                
-            return list(results)
-    
     @staticmethod
-    def case_evaluation(sample, result):
+    def managed_execution(sample, results):
         try:
             with Sandbox.create_tempdir():
                 # These system calls are needed when cleaning up tempdir.
@@ -438,27 +1355,1008 @@ class Sandbox(object):
                 rmtree = shutil.rmtree
                 rmdir = os.rmdir
                 chdir = os.chdir
-                
-                # Disable functionalities that can make destructive changes to the test.
+
+                # The worker is connected before the guard
+                connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                connection.connect(sample['address'])
+
+                # Disable functionalities that can make destructive changes to the test.
+                Sandbox.reliability_guard()
+
+                with Sandbox.swallow_io():
+                    with Sandbox.time_limit(sample['timeout']):
+                        details = dict()
+                        try:
+                            namespace = Sandbox.prelude(Sandbox.EXECUTION_PRELUDE)
+                            compiled = Sandbox.code_cache.compile
+                            for function in ['serialize_input', 'deserialize_input', 'serialize_output', 'deserialize_output']:
+                                exec(compiled(sample['functions'][function]), namespace)
+
+                            signature = ManagedRuntime.signature(sample['lang'], sample['code_prompt'])
+                            test_case_inputs = [namespace['deserialize_input'](test_case['input']) for test_case in sample['test_cases']]
+                            connection.sendall(ManagedRuntime.encode_job(sample['lang'], sample['solution'], signature, test_case_inputs))
+                            run = ManagedRuntime.decode_response(ManagedRuntime.receive(connection), signature)
+                            details.update(vm_escape=run['escape'], compile_ms=run['compile_ms'], warmup_ms=run['warmup_ms'])
+                            if run['status'] == "compile":
+                                raise CompileException(run['message'])
+                            if run['status'] == "error":
+                                raise Exception(run['message'])
+
+                            runtime = Sandbox.check_outputs(namespace, sample['test_cases'], run['outputs'], details, sample.get('details', False))
+                            results.append("pass")
+                            results.append(runtime/10**6)
+                            results.append(run['peak_kb'])
+                            results.append(details)
+                        except CompileException as e:
+                            results.append(f"failed@compile_error:{e}")
+                            results.append(details)
+                        except Sandbox.CaseMismatch as e:
+                            results.append("failed@code_error:Test case output mismatch")
+                            results.append(details)
+                        except TimeoutException as e:
+                            results.append("failed@timeout")
+                        except Exception as e:
+                            results.append(f"failed@code_error:{e}")
+                            results.append(details)
+                        finally:
+                            connection.close()
+
+                shutil.rmtree = rmtree
+                os.rmdir = rmdir
+                os.chdir = chdir
+        except Exception as e:
+            results.append(f"failed@sandbox_error:{e}")
+
+    @staticmethod
+    def limit(sample):
+        """
+        The sample with its adaptive timeout applied, if it has one. The limit was calibrated on untraced runs, so the
+        correctness run it bounds is untraced too: the tracemalloc backend becomes two_pass (same measurement, in a pass
+        of its own, see Sandbox.pass_timeouts).
+        """
+        if sample.get('adaptive_timeout') is None:
+            return sample
+        memory = sample.get('memory') or "tracemalloc"
+        return dict(sample, timeout=sample['adaptive_timeout'], memory="two_pass" if memory == "tracemalloc" else memory)
+
+    @staticmethod
+    def tag_timeout(result, sample):
+        if sample.get('adaptive_timeout') is None:
+            return result
+        return Sandbox.attach(result, dict(adaptive_timeout=sample['adaptive_timeout'], adaptive_kill=result[0] == "failed@timeout"))
+
+    def calibrate_timeout(self, problem, references, config=None, seed=0) -> Optional[float]:
+        """
+        Adaptive timeout of a problem (seconds): the runtime of its slowest passing reference solution times `factor`,
+        clamped to [floor, ceiling] (see Sandbox.ADAPTIVE_TIMEOUT). Only `references` of them, sampled with `seed`, run
+        with problem['timeout'], untraced (rusage memory backend) and without the optional passes, so that the runtime
+        is that of the correctness run alone. Returns None if no reference passed.
+        """
+        config = dict(Sandbox.ADAPTIVE_TIMEOUT, **(config or {}))
+        references = random.Random(seed).sample(list(references), min(config['references'], len(references)))
+        problem = {key: problem[key] for key in ['timeout', 'functions', 'test_cases', 'lang', 'code_prompt', 'memory_limit'] if key in problem}
+        runtimes = [result[1] for result in self.run_code_execution_batch(dict(problem, memory="rusage"), references) if result[0] == "pass"]
+        if not runtimes:
+            return None
+        return Sandbox.adaptive_timeout(max(runtimes), config)
+
+    @staticmethod
+    def adaptive_timeout(runtime_ms, config=None) -> float:
+        config = dict(Sandbox.ADAPTIVE_TIMEOUT, **(config or {}))
+        return min(max(runtime_ms/10**3 * config['factor'], config['floor']), config['ceiling'])
+
+    @staticmethod
+    def pass_timeouts(sample) -> Dict:
+        """
+        Time limit (seconds) of every optional pass the sample asks for, in the order they run, see Sandbox.PASS_TIMEOUT.
+        """
+        config = Sandbox.PASS_TIMEOUT
+        untraced, traced = config['slack'] * sample['timeout'], config['traced_slack'] * sample['timeout']
+        timeouts = OrderedDict()
+        if sample.get('memory') == "two_pass":
+            timeouts['memory'] = traced
+        if sample.get('measure') is not None:
+            timeouts['measure'] = dict(Sandbox.MEASURE_CONFIG, **sample['measure'])['budget'] + untraced
+        if sample.get('instructions'):
+            timeouts['instructions'] = traced
+        if sample.get('scaling') is not None:
+            timeouts['scaling'] = dict(Sandbox.SCALING_CONFIG, **sample['scaling'])['budget'] + traced
+        if sample.get('profile') is not None:
+            # The sampled runs and the line hit run have a budget each
+            timeouts['profile'] = 2 * dict(Sandbox.PROFILE_CONFIG, **sample['profile'])['budget'] + untraced
+        if sample.get('allocations') is not None:
+            timeouts['allocations'] = dict(Sandbox.ALLOCATION_CONFIG, **sample['allocations'])['budget'] + traced
+        return OrderedDict((name, min(seconds, config['ceiling'])) for name, seconds in timeouts.items())
+
+    @staticmethod
+    def job_timeout(kind, sample) -> float:
+        """
+        How long the parent waits for a job: its time limit, plus the time limits of the optional passes of every
+        solution of a code execution job.
+        """
+        if kind == "execution":
+            return sample['timeout'] + sum(Sandbox.pass_timeouts(sample).values())
+        if kind == "execution_batch":
+            passes = Sandbox.pass_timeouts(dict(sample, timeout=sample['solution_timeout']))
+            return sample['timeout'] + sum(passes.values()) * len(sample['solutions'])
+        return sample['timeout']
+
+    @staticmethod
+    def optional_passes(sample, namespace, solution, entry_point, test_case_inputs, result, details):
+        """
+        Runs the optional passes of a solution that passed (see Sandbox.run_code_execution) after its correctness run,
+        each under its own time limit (see Sandbox.pass_timeouts), filling in `result` and `details`. A pass over its
+        limit reports None and is listed under details['timed_out']; the solution still passes.
+        """
+        method = sample['functions']['entry_point']
+        cases = details.get('cases')
+
+        def run(name, function, *args):
+            try:
+                with Sandbox.time_limit(timeouts[name]):
+                    return function(*args)
+            except TimeoutException as e:
+                details.setdefault('timed_out', list()).append(name)
+                return None
+
+        timeouts = Sandbox.pass_timeouts(sample)
+        if 'memory' in timeouts:
+            memory = run("memory", Sandbox.memory_pass, namespace, solution, entry_point, sample['test_cases'], copy.deepcopy(test_case_inputs), cases is not None)
+            if memory is not None:
+                peak, cases_memory = memory
+                result[2] = peak/10**3
+                if cases is not None:
+                    cases['memory'] = cases_memory
+
+        if 'measure' in timeouts:
+            # Re-time the solution calls alone, without the tracer
+            details['runtime'] = run("measure", Sandbox.measure_runtime, namespace, method, test_case_inputs, sample['measure'])
+            if details['runtime'] is not None:
+                result[1] = details['runtime']['median']
+
+        if 'instructions' in timeouts:
+            details['instructions'] = run("instructions", Sandbox.count_instructions, namespace, solution, method, test_case_inputs)
+
+        if 'scaling' in timeouts:
+            details['scaling'] = run("scaling", Sandbox.scaling_pass, namespace, method, sample['scaling'])
+
+        if 'profile' in timeouts:
+            details['profile'] = run("profile", Sandbox.profile_hotspots, namespace, solution, method, test_case_inputs, sample['profile'])
+
+        if 'allocations' in timeouts:
+            details['allocations'] = run("allocations", Sandbox.allocation_pass, namespace, solution, method, test_case_inputs, sample['allocations'])
+
+    class ProfileBudget(Exception):
+        """
+        Raised by the line tracer of the profiling pass when its budget runs out.
+        """
+
+    class CaseMismatch(Exception):
+        """
+        Raised after a recorded run in which some test cases failed, carrying the per-case details.
+        """
+        def __init__(self, details):
+            super().__init__("Test case output mismatch")
+            self.details = details
+
+    @staticmethod
+    def run_test_cases(namespace, entry_point, test_cases, test_case_inputs=None, meter=None, record=False):
+        """
+        Runs the solution over the test suite, deserializing the inputs unless `test_case_inputs` is given. Without
+        `record`, raises on the first mismatching case. With `record`, runs every case and returns compact per-case
+        vectors: call time (ms), peak memory of the call on the running MemoryMeter (kb, NaN if it is measured
+        elsewhere), serialized output length and pass flag.
+        """
+        compiled = Sandbox.code_cache.compile
+        deserialize = compiled("test_case_input = deserialize_input(test_case_input_serialized)")
+        call = compiled(entry_point)
+        serialize = compiled("test_case_output_serialized = serialize_output(test_case_output)")
+
+        cases = None
+        if record:
+            count = len(test_cases)
+            cases = {
+                "runtime": np.zeros(count, dtype=np.float32),
+                "memory": np.zeros(count, dtype=np.float32),
+                "output_size": np.zeros(count, dtype=np.int32),
+                "passed": np.zeros(count, dtype=np.bool_),
+            }
+
+        for index, test_case in enumerate(test_cases):
+            if test_case_inputs is None:
+                namespace['test_case_input_serialized'] = test_case['input']
+                exec(deserialize, namespace)
+            else:
+                namespace['test_case_input'] = test_case_inputs[index]
+
+            if record:
+                meter.mark()
+                start_time = time.process_time_ns()
+                exec(call, namespace)
+                cases['runtime'][index] = (time.process_time_ns()-start_time)/10**6
+                peak = meter.window_peak()
+                cases['memory'][index] = np.nan if peak is None else peak/10**3
+            else:
+                exec(call, namespace)
+
+            exec(serialize, namespace)
+            test_case_output_serialized = namespace['test_case_output_serialized']
+            passed = test_case_output_serialized == test_case['output']
+            if record:
+                cases['output_size'][index] = len(test_case_output_serialized)
+                cases['passed'][index] = passed
+            elif not passed:
+                raise Exception(f"Test case output mismatch")
+        return cases
+
+    @staticmethod
+    def memory_pass(namespace, solution, entry_point, test_cases, test_case_inputs=None, record=False):
+        """
+        Second run of the two_pass memory backend: the solution runs again, traced by tracemalloc, for its memory only.
+        Returns (peak bytes, per-case memory vector or None).
+        """
+        namespace = dict(namespace)
+        meter = MemoryMeter("tracemalloc")
+        meter.start()
+        try:
+            exec(Sandbox.code_cache.compile(solution), namespace)
+            exec(Sandbox.code_cache.compile("solution = Solution()"), namespace)
+            cases = Sandbox.run_test_cases(namespace, entry_point, test_cases, test_case_inputs, meter, record)
+            return meter.peak(), None if cases is None else cases['memory']
+        finally:
+            meter.stop()
+
+    @staticmethod
+    def collect_code_execution(results):
+        if not results:
+            results = ["failed@timeout"]
+            
+        return list(results)
+
+    @staticmethod
+    def measure_runtime(namespace, entry_point, test_case_inputs, config):
+        """
+        Times the solution calls only (no exec, deserialization or output serialization): warmup runs first, then
+        timed runs on fresh copies of the inputs, until the confidence interval of the median is narrower than
+        `ci_width`, `max_runs` is hit or the `budget` is spent. The garbage collector is disabled inside timed sections.
+        """
+        config = dict(Sandbox.MEASURE_CONFIG, **config)
+        gc_enabled = gc.isenabled()
+        deadline = time.monotonic() + config['budget']
+        timings = list()
+        for run in range(config['warmup'] + config['max_runs']):
+            inputs = copy.deepcopy(test_case_inputs)
+            method = getattr(namespace['Solution'](), entry_point)
+
+            elapsed = 0
+            for test_case_input in inputs:
+                gc.disable()
+                try:
+                    start_time = time.process_time_ns()
+                    method(*test_case_input)
+                    elapsed += time.process_time_ns() - start_time
+                finally:
+                    if gc_enabled:
+                        gc.enable()
+
+            if run < config['warmup']:
+                continue
+            timings.append(elapsed/10**6)
+
+            if time.monotonic() >= deadline:
+                break
+            if len(timings) >= config['min_runs']:
+                statistics = Sandbox.runtime_statistics(timings, config['confidence'])
+                if statistics['ci_high'] - statistics['ci_low'] <= config['ci_width'] * statistics['median']:
+                    break
+
+        statistics = Sandbox.runtime_statistics(timings, config['confidence'])
+        statistics['warmup'] = config['warmup']
+        return statistics
+
+    @staticmethod
+    def count_instructions(namespace, solution, entry_point, test_case_inputs):
+        """
+        Deterministic cost of a solution over the test suite: the bytecode instructions executed in the solution's own
+        code, and the Python calls into it (generator resumptions included). Uses sys.monitoring on Python 3.12+ and
+        sys.settrace before. Much slower than a plain run, so it is always a separate pass. Counts are only comparable
+        under the same Python version and tracer, and set iteration over str keys still depends on PYTHONHASHSEED.
+        """
+        namespace = dict(namespace)
+        code = Sandbox.code_cache.compile(solution, "<solution>")
+        exec(code, namespace)
+        method = getattr(namespace['Solution'](), entry_point)
+        inputs = copy.deepcopy(test_case_inputs)
+
+        counts = dict(instructions=0, calls=0)
+        if hasattr(sys, "monitoring"):
+            counts['tracer'] = "sys.monitoring"
+            Sandbox.monitor_calls(code, method, inputs, counts)
+        else:
+            counts['tracer'] = "sys.settrace"
+            Sandbox.trace_calls(method, inputs, counts)
+        return counts
+
+    @staticmethod
+    def scaling_pass(namespace, entry_point, config):
+        """
+        Complexity estimation of a solution that already passed. Inputs come from generate_test_case_input: on a
+        geometric ladder of sizes if it takes a `size` parameter, otherwise at whatever sizes it produces. Each input is
+        timed on its own (solution call only) and then run once more under tracemalloc for its peak memory, until the
+        ladder, the budget or the rung limit is exhausted.
+
+        The size of an input is measured on the deserialized arguments (see Sandbox.input_size), so that it does not
+        depend on how the generator reads `size`. Returns the points and a fit per metric, see Sandbox.fit_complexity.
+        """
+        config = dict(Sandbox.SCALING_CONFIG, **config)
+        points = list()
+        try:
+            Sandbox.scale(namespace, entry_point, config, points)
+        except TimeoutException as e:
+            # Over the time limit of the pass, see Sandbox.optional_passes
+            raise
+        except Exception as e:
+            return dict(error=str(e), points=None, time=None, memory=None)
+
+        sizes = np.array([point[0] for point in points], dtype=np.int64)
+        runtime = np.array([point[1] for point in points], dtype=np.float32)
+        memory = np.array([point[2] for point in points], dtype=np.float32)
+        return dict(
+            points=dict(size=sizes, runtime=runtime, memory=memory),
+            # Floors keep near-zero measurements from dominating the relative error
+            time=Sandbox.fit_complexity(sizes, runtime, floor=10**-3, reference_size=config['reference_size']),
+            memory=Sandbox.fit_complexity(sizes, memory, floor=1, reference_size=config['reference_size']),
+        )
+
+    @staticmethod
+    def scale(namespace, entry_point, config, points):
+        generate = namespace['generate_test_case_input']
+        deadline = time.monotonic() + config['budget']
+        gc_enabled = gc.isenabled()
+
+        def run(test_case_input):
+            # Same types as the test suite, untimed
+            test_case_input = namespace['deserialize_input'](namespace['serialize_input'](test_case_input))
+            size = Sandbox.input_size(test_case_input)
+
+            timed_input, traced_input = copy.deepcopy(test_case_input), test_case_input
+            method = getattr(namespace['Solution'](), entry_point)
+            gc.disable()
+            try:
+                start_time = time.process_time_ns()
+                method(*timed_input)
+                elapsed = (time.process_time_ns()-start_time)/10**6
+            finally:
+                if gc_enabled:
+                    gc.enable()
+
+            meter = MemoryMeter("tracemalloc")
+            meter.start()
+            try:
+                getattr(namespace['Solution'](), entry_point)(*traced_input)
+                peak = meter.peak()
+            finally:
+                meter.stop()
+            points.append((size, elapsed, peak/10**3))
+            return elapsed
+
+        if "size" in inspect.signature(generate).parameters:
+            size = config['min_size']
+            while size <= config['max_size']:
+                slowest = 0
+                for _ in range(config['repeat']):
+                    if time.monotonic() >= deadline:
+                        return
+                    slowest = max(slowest, run(generate(size=size)))
+                if slowest > config['rung_limit']*10**3:
+                    break
+                size = max(int(size*config['ratio']), size+1)
+        else:
+            for _ in range(config['samples']):
+                if time.monotonic() >= deadline:
+                    break
+                run(generate())
+
+    @staticmethod
+    def input_size(value) -> int:
+        """
+        Size of a test case input: the number of scalar leaves of its containers (a string counts its characters), or,
+        for inputs made of scalars only, the largest absolute integer (e.g. n in "count primes below n").
+        """
+        def leaves(value):
+            if isinstance(value, str):
+                return len(value), True
+            if isinstance(value, dict):
+                value = list(value.items())
+            if isinstance(value, (list, tuple, set, frozenset)):
+                return sum(leaves(item)[0] for item in value), True
+            if hasattr(value, "__dict__"):
+                # ListNode / TreeNode: count the nodes
+                seen, stack = set(), [value]
+                while stack:
+                    node = stack.pop()
+                    if id(node) in seen or not hasattr(node, "__dict__"):
+                        continue
+                    seen.add(id(node))
+                    stack.extend(item for item in vars(node).values() if hasattr(item, "__dict__"))
+                return len(seen), True
+            return 1, False
+
+        counts = [leaves(argument) for argument in value]
+        if any(container for _, container in counts):
+            return max(sum(count for count, container in counts if container), 1)
+        integers = [abs(argument) for argument in value if isinstance(argument, int) and not isinstance(argument, bool)]
+        return max(integers + [1])
+
+    @staticmethod
+    def fit_complexity(sizes, values, floor, reference_size):
+        """
+        Least-squares fit of value = intercept + constant * f(size) for every class of Sandbox.COMPLEXITY_CLASSES, on
+        the median value per distinct size, weighted by 1/value (relative error, so large sizes do not dominate). The
+        estimate is the simplest class whose error is within 10% of the best one; a negative constant rules a class
+        out. Also reports the log-log slope and the fitted value at `reference_size`, a ranking signal.
+
+        Returns None if the sizes span less than a factor of 4 over at least 3 distinct sizes.
+        """
+        if len(sizes) == 0:
+            return None
+        distinct = np.unique(sizes)
+        if len(distinct) < 3 or distinct[-1] < 4 * max(distinct[0], 1):
+            return None
+        n = distinct.astype(np.float64)
+        y = np.array([np.median(values[sizes == size]) for size in distinct], dtype=np.float64)
+        weights = 1 / np.maximum(y, floor)
+
+        fits = dict()
+        for name, f in Sandbox.COMPLEXITY_CLASSES.items():
+            columns = [np.ones_like(n)] if name == "O(1)" else [np.ones_like(n), f(n)]
+            design = np.stack(columns, axis=1) * weights[:, None]
+            coefficients, _, _, _ = np.linalg.lstsq(design, y * weights, rcond=None)
+            if name != "O(1)" and coefficients[1] <= 0:
+                continue
+            error = float(np.sqrt(np.mean((design @ coefficients - y * weights)**2)))
+            fits[name] = (error, coefficients)
+
+        best = min(error for error, _ in fits.values())
+        name = next(name for name, (error, _) in fits.items() if error <= 1.1 * best)
+        error, coefficients = fits[name]
+        constant = 0.0 if name == "O(1)" else float(coefficients[1])
+        reference = np.array([float(reference_size)])
+        projected = float(coefficients[0]) + constant * float(Sandbox.COMPLEXITY_CLASSES[name](reference)[0])
+
+        positive = y > floor
+        slope = float(np.polyfit(np.log(n[positive]), np.log(y[positive]), 1)[0]) if positive.sum() >= 2 else 0.0
+        return {
+            "class": name, "constant": constant, "intercept": float(coefficients[0]), "error": error,
+            "slope": slope, "projected": projected, "errors": {name: error for name, (error, _) in fits.items()},
+        }
+
+    @staticmethod
+    def solution_codes(code):
+        # Functions, classes and comprehensions of a module are nested in its constants
+        yield code
+        for const in code.co_consts:
+            if isinstance(const, types.CodeType):
+                yield from Sandbox.solution_codes(const)
+
+    @staticmethod
+    def monitor_calls(code, method, inputs, counts):
+        monitoring = sys.monitoring
+        events = monitoring.events
+        tool = monitoring.PROFILER_ID
+        monitoring.use_tool_id(tool, "venus")
+        try:
+            def on_instruction(code, offset):
+                counts['instructions'] += 1
+
+            def on_call(code, offset):
+                counts['calls'] += 1
+
+            monitoring.register_callback(tool, events.INSTRUCTION, on_instruction)
+            monitoring.register_callback(tool, events.PY_START, on_call)
+            monitoring.register_callback(tool, events.PY_RESUME, on_call)
+
+            # Only the solution's own code objects are instrumented
+            codes = list(Sandbox.solution_codes(code))
+            for solution_code in codes:
+                monitoring.set_local_events(tool, solution_code, events.INSTRUCTION | events.PY_START | events.PY_RESUME)
+            try:
+                for test_case_input in inputs:
+                    method(*test_case_input)
+            finally:
+                for solution_code in codes:
+                    monitoring.set_local_events(tool, solution_code, 0)
+        finally:
+            for event in [events.INSTRUCTION, events.PY_START, events.PY_RESUME]:
+                monitoring.register_callback(tool, event, None)
+            monitoring.free_tool_id(tool)
+
+    @staticmethod
+    def trace_calls(method, inputs, counts):
+        def on_opcode(frame, event, arg):
+            if event == "opcode":
+                counts['instructions'] += 1
+            return on_opcode
+
+        def on_call(frame, event, arg):
+            # Frames outside the solution (prelude, builtins in Python) are not traced
+            if frame.f_code.co_filename != "<solution>":
+                return None
+            counts['calls'] += 1
+            frame.f_trace_opcodes = True
+            return on_opcode
+
+        sys.settrace(on_call)
+        try:
+            for test_case_input in inputs:
+                method(*test_case_input)
+        finally:
+            sys.settrace(None)
+
+    @staticmethod
+    def profile_hotspots(namespace, solution, entry_point, test_case_inputs, config):
+        """
+        Sampling profile of a solution over the test suite. A CPU-time timer (SIGPROF) samples the stack every
+        `interval` seconds, and each sample is weighted by the CPU time since the previous one, so that a long call into
+        C code (during which the handler cannot run) still counts in full. A sample is charged to the line of the
+        innermost solution frame (self time, including the builtins and helpers it calls) and to every solution function
+        on the stack (total time). Samples outside the solution (input copies) only count towards outside_ms.
+
+        Line numbers are those of the submitted solution. The result holds plain numbers and lists only, so that it
+        can be stored in a dataset as is. See Sandbox.hotspot_table for a compact text rendering.
+        """
+        config = dict(Sandbox.PROFILE_CONFIG, **config)
+        namespace = dict(namespace)
+        code = Sandbox.code_cache.compile(solution, "<solution>")
+        exec(code, namespace)
+        method = getattr(namespace['Solution'](), entry_point)
+        try:
+            snapshot = pickle.dumps(test_case_inputs)
+        except Exception as e:
+            snapshot = None
+
+        line_time, self_time, total_time = Counter(), Counter(), Counter()
+        state = dict(samples=0, outside=0.0, last=time.process_time())
+
+        def on_sample(signum, frame):
+            now = time.process_time()
+            weight, state['last'] = now - state['last'], now
+            stack = list()
+            while frame is not None:
+                if frame.f_code.co_filename == "<solution>":
+                    stack.append(frame)
+                frame = frame.f_back
+            if not stack:
+                state['outside'] += weight
+                return
+            state['samples'] += 1
+            line_time[stack[0].f_lineno] += weight
+            self_time[stack[0].f_code] += weight
+            # Once per function, however deep the recursion
+            for function in {frame.f_code for frame in stack}:
+                total_time[function] += weight
+
+        runs = 0
+        deadline = time.monotonic() + config['budget']
+        previous = signal.signal(signal.SIGPROF, on_sample)
+        signal.setitimer(signal.ITIMER_PROF, config['interval'], config['interval'])
+        try:
+            while runs == 0 or (state['samples'] < config['min_samples'] and time.monotonic() < deadline):
+                inputs = copy.deepcopy(test_case_inputs) if snapshot is None else pickle.loads(snapshot)
+                for test_case_input in inputs:
+                    method(*test_case_input)
+                runs += 1
+        finally:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, previous)
+
+        hits, calls, tracer, truncated = Counter(), Counter(), None, False
+        if config['line_hits']:
+            tracer = "sys.monitoring" if hasattr(sys, "monitoring") else "sys.settrace"
+            inputs = copy.deepcopy(test_case_inputs) if snapshot is None else pickle.loads(snapshot)
+            deadline = time.monotonic() + config['budget']
+            try:
+                if hasattr(sys, "monitoring"):
+                    Sandbox.monitor_lines(code, method, inputs, hits, calls, deadline)
+                else:
+                    Sandbox.trace_lines(method, inputs, hits, calls, deadline)
+            except Sandbox.ProfileBudget as e:
+                truncated = True
+
+        sampled = sum(self_time.values())
+        def share(value):
+            return round(value / sampled, 4) if sampled else 0.0
+        def name(function):
+            return getattr(function, "co_qualname", function.co_name)
+
+        line_functions = Sandbox.line_functions(code)
+        top = config['top']
+        ranked = [line for line, _ in line_time.most_common(top)]
+        ranked += [line for line, _ in hits.most_common(top) if line not in ranked]
+        source = solution.splitlines()
+        lines = [
+            dict(
+                line=line, function=line_functions.get(line),
+                code=source[line-1].strip()[:120] if 0 < line <= len(source) else "",
+                self_ms=round(float(line_time[line])*10**3, 3), self_share=share(line_time[line]),
+                hits=hits[line] if tracer is not None else None,
+            )
+            for line in sorted(ranked, key=lambda line: (-line_time[line], -hits[line]))
+        ]
+        functions = [
+            dict(
+                function=name(function), line=function.co_firstlineno,
+                self_ms=round(self_time[function]*10**3, 3), self_share=share(self_time[function]),
+                total_ms=round(total_time[function]*10**3, 3), total_share=share(total_time[function]),
+                calls=calls[function] if tracer is not None else None,
+            )
+            for function, _ in total_time.most_common(top)
+        ]
+        return dict(
+            interval_ms=config['interval']*10**3, runs=runs, samples=state['samples'],
+            solution_ms=round(sampled*10**3, 3), outside_ms=round(state['outside']*10**3, 3),
+            functions=functions, lines=lines, line_hits=tracer, truncated=truncated,
+        )
+
+    @staticmethod
+    def line_functions(code) -> Dict:
+        """
+        Qualified name of the innermost function of every line of the solution.
+        """
+        functions = dict()
+        # Nested code objects come after their parent
+        for function in Sandbox.solution_codes(code):
+            if function is not code:
+                name = getattr(function, "co_qualname", function.co_name)
+                functions.update((line, name) for _, _, line in function.co_lines() if line is not None)
+        return functions
+
+    @staticmethod
+    def allocation_pass(namespace, solution, entry_point, test_case_inputs, config):
+        """
+        Allocation sites of a solution that already passed, with tracemalloc stopped however the pass ends.
+        """
+        try:
+            return Sandbox.allocation_sites(namespace, solution, entry_point, test_case_inputs, config)
+        finally:
+            tracemalloc.stop()
+
+    @staticmethod
+    def allocation_sites(namespace, solution, entry_point, test_case_inputs, config):
+        """
+        Where a solution's memory goes at its peak. Every test case first runs alone under tracemalloc for its peak
+        (solution call only). The most demanding one runs again under a line tracer, which takes a tracemalloc snapshot
+        whenever the traced memory grew by `growth` since the last one, so that the last snapshot is the peak as seen at
+        line boundaries (a peak inside a single C call, e.g. a temporary list of sorted(), shows as its caller's line
+        afterwards at best). The tracer only runs for the `budget`, keeping the snapshot it had by then.
+
+        Each allocation is charged to the line of its innermost solution frame (builtins and helpers it calls
+        included); harness and prelude allocations are left out. Returns the top sites with their size and number of
+        blocks, and the solution's share of the snapshot.
+        """
+        config = dict(Sandbox.ALLOCATION_CONFIG, **config)
+        namespace = dict(namespace)
+        code = Sandbox.code_cache.compile(solution, "<solution>")
+        exec(code, namespace)
+        method = getattr(namespace['Solution'](), entry_point)
+        try:
+            snapshot = pickle.dumps(test_case_inputs)
+        except Exception as e:
+            snapshot = None
+        def fresh_inputs():
+            return copy.deepcopy(test_case_inputs) if snapshot is None else pickle.loads(snapshot)
+
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        # Peaks only need the innermost frame
+        tracemalloc.start(1)
+
+        peaks = list()
+        for test_case_input in fresh_inputs():
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            method(*test_case_input)
+            peaks.append(tracemalloc.get_traced_memory()[1] - start)
+        worst = int(np.argmax(peaks))
+
+        test_case_input = fresh_inputs()[worst]
+        tracemalloc.stop()
+        tracemalloc.start(config['frames'])
+        state = dict(snapshot=None, size=tracemalloc.get_traced_memory()[0])
+        deadline = time.monotonic() + config['budget']
+        counter = itertools.count()
+
+        def check(frame, event, arg):
+            if event in ("line", "return"):
+                size = tracemalloc.get_traced_memory()[0]
+                if size > state['size'] * (1 + config['growth']) or state['snapshot'] is None:
+                    # Only the latest snapshot is kept
+                    state['snapshot'] = None
+                    state['snapshot'], state['size'] = tracemalloc.take_snapshot(), size
+                if next(counter) % 1024 == 0 and time.monotonic() > deadline:
+                    raise Sandbox.ProfileBudget()
+            return check
+
+        def on_call(frame, event, arg):
+            # Frames outside the solution (prelude, builtins in Python) are not traced
+            if frame.f_code.co_filename != "<solution>":
+                return None
+            return check
+
+        truncated = False
+        sys.settrace(on_call)
+        try:
+            method(*test_case_input)
+        except Sandbox.ProfileBudget as e:
+            truncated = True
+        finally:
+            sys.settrace(None)
+
+        sizes, counts = Counter(), Counter()
+        # One statistic per distinct traceback, far fewer than traces
+        for statistic in state['snapshot'].statistics("traceback") if state['snapshot'] is not None else []:
+            # Frames go from the oldest to the most recent
+            lines = [frame.lineno for frame in statistic.traceback if frame.filename == "<solution>"]
+            if lines:
+                sizes[lines[-1]] += statistic.size
+                counts[lines[-1]] += statistic.count
+
+        line_functions = Sandbox.line_functions(code)
+        source = solution.splitlines()
+        sites = [
+            dict(
+                line=line, function=line_functions.get(line),
+                code=source[line-1].strip()[:120] if 0 < line <= len(source) else "",
+                size_kb=round(size/10**3, 3), count=counts[line],
+            )
+            for line, size in sizes.most_common(config['top'])
+        ]
+        return dict(
+            test_case=worst, peak_kb=round(peaks[worst]/10**3, 3), snapshot_kb=round(state['size']/10**3, 3),
+            solution_kb=round(sum(sizes.values())/10**3, 3), sites=sites, truncated=truncated,
+        )
+
+    @staticmethod
+    def monitor_lines(code, method, inputs, hits, calls, deadline):
+        monitoring = sys.monitoring
+        events = monitoring.events
+        tool = monitoring.PROFILER_ID
+        monitoring.use_tool_id(tool, "venus")
+        try:
+            counter = itertools.count()
+
+            def on_line(code, line_number):
+                hits[line_number] += 1
+                if next(counter) % 1024 == 0 and time.monotonic() > deadline:
+                    raise Sandbox.ProfileBudget()
+
+            def on_call(code, offset):
+                calls[code] += 1
+
+            monitoring.register_callback(tool, events.LINE, on_line)
+            monitoring.register_callback(tool, events.PY_START, on_call)
+            monitoring.register_callback(tool, events.PY_RESUME, on_call)
+
+            # Only the solution's own code objects are instrumented
+            codes = list(Sandbox.solution_codes(code))
+            for solution_code in codes:
+                monitoring.set_local_events(tool, solution_code, events.LINE | events.PY_START | events.PY_RESUME)
+            try:
+                for test_case_input in inputs:
+                    method(*test_case_input)
+            finally:
+                for solution_code in codes:
+                    monitoring.set_local_events(tool, solution_code, 0)
+        finally:
+            for event in [events.LINE, events.PY_START, events.PY_RESUME]:
+                monitoring.register_callback(tool, event, None)
+            monitoring.free_tool_id(tool)
+
+    @staticmethod
+    def trace_lines(method, inputs, hits, calls, deadline):
+        counter = itertools.count()
+
+        def on_line(frame, event, arg):
+            if event == "line":
+                hits[frame.f_lineno] += 1
+                if next(counter) % 1024 == 0 and time.monotonic() > deadline:
+                    raise Sandbox.ProfileBudget()
+            return on_line
+
+        def on_call(frame, event, arg):
+            # Frames outside the solution (prelude, builtins in Python) are not traced
+            if frame.f_code.co_filename != "<solution>":
+                return None
+            calls[frame.f_code] += 1
+            return on_line
+
+        sys.settrace(on_call)
+        try:
+            for test_case_input in inputs:
+                method(*test_case_input)
+        finally:
+            sys.settrace(None)
+
+    @staticmethod
+    def hotspot_table(profile) -> str:
+        """
+        Compact text rendering of a profile (see Sandbox.profile_hotspots), e.g. for an optimization prompt.
+        """
+        if not profile:
+            return ""
+        def count(value):
+            return "-" if value is None else str(value)
+        rows = [f"{'function':<32} {'self':>6} {'total':>6} {'calls':>8}"]
+        for function in profile['functions']:
+            rows.append(f"{function['function'][:32]:<32} {function['self_share']:>6.1%} {function['total_share']:>6.1%} {count(function['calls']):>8}")
+        rows.append("")
+        rows.append(f"{'line':>5} {'self':>6} {'hits':>9}  code")
+        for line in profile['lines']:
+            rows.append(f"{line['line']:>5} {line['self_share']:>6.1%} {count(line['hits']):>9}  {line['code']}")
+        return "\n".join(rows)
+
+    @staticmethod
+    def allocation_table(allocations) -> str:
+        """
+        Compact text rendering of allocation sites (see Sandbox.allocation_sites), e.g. for an optimization prompt.
+        """
+        if not allocations:
+            return ""
+        rows = [f"{'line':>5} {'size_kb':>10} {'blocks':>8}  code"]
+        for site in allocations['sites']:
+            rows.append(f"{site['line']:>5} {site['size_kb']:>10.1f} {site['count']:>8}  {site['code']}")
+        return "\n".join(rows)
+
+    @staticmethod
+    def runtime_statistics(timings, confidence):
+        """
+        Median, interquartile range and a distribution-free confidence interval of the median (order statistics).
+        """
+        timings = np.sort(np.asarray(timings))
+        n = len(timings)
+        q1, median, q3 = np.percentile(timings, [25, 50, 75])
+
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        low = max(int(math.floor((n - z * math.sqrt(n)) / 2)), 1)
+        high = min(int(math.ceil(1 + (n + z * math.sqrt(n)) / 2)), n)
+        return dict(
+            median=float(median), q1=float(q1), q3=float(q3), iqr=float(q3-q1),
+            ci_low=float(timings[low-1]), ci_high=float(timings[high-1]), confidence=confidence, runs=n
+        )
+
+    @staticmethod
+    def code_execution_batch(sample, results):
+        try:
+            with Sandbox.create_tempdir():
+                # These system calls are needed when cleaning up tempdir.
+                import os
+                import shutil
+                rmtree = shutil.rmtree
+                rmdir = os.rmdir
+                chdir = os.chdir
+                
+                # Disable functionalities that can make destructive changes to the test.
+                Sandbox.reliability_guard()
+
+                with Sandbox.swallow_io():
+                    # Load and deserialize the test suite once for all solutions
+                    try:
+                        with Sandbox.time_limit(sample['solution_timeout']):
+                            base_namespace = Sandbox.prelude(Sandbox.EXECUTION_PRELUDE)
+                            compiled = Sandbox.code_cache.compile
+                            for function in ['serialize_input', 'deserialize_input', 'serialize_output', 'deserialize_output', 'generate_test_case_input']:
+                                exec(compiled(sample['functions'][function]), base_namespace)
+                            test_case_inputs = [base_namespace['deserialize_input'](test_case['input']) for test_case in sample['test_cases']]
+                    except Exception as e:
+                        results += [[f"failed@code_error:{e}"] for _ in sample['solutions']]
+                        test_case_inputs = None
+
+                    entry_point = "test_case_output = solution.{}(*test_case_input)".format(sample['functions']['entry_point'])
+                    for index, solution in enumerate(sample['solutions'] if test_case_inputs is not None else []):
+                        # Every solution gets its own namespace and a fresh copy of the inputs
+                        namespace = dict(base_namespace)
+                        inputs = copy.deepcopy(test_case_inputs)
+                        try:
+                            with Sandbox.time_limit(sample['solution_timeout']):
+                                meter = MemoryMeter(sample.get('memory'), key=index)
+                                meter.start()
+                                start_time = time.process_time_ns()
+
+                                exec(compiled(solution), namespace)
+                                exec(compiled("solution = Solution()"), namespace)
+                                cases = Sandbox.run_test_cases(namespace, entry_point, sample['test_cases'], inputs, meter, record=sample.get('details', False))
+
+                                end_time = time.process_time_ns()
+                                peak = meter.peak()
+                                meter.stop()
+
+                                details = dict()
+                                if cases is not None:
+                                    details['cases'] = cases
+                                    if not cases['passed'].all():
+                                        raise Sandbox.CaseMismatch(details)
+
+                                # The psutil backend's memory is filled in by the parent
+                                result = ["pass", (end_time-start_time)/10**6, None if peak is None else peak/10**3]
+
+                            # The passes have their own time limits, see Sandbox.job_timeout
+                            Sandbox.optional_passes(dict(sample, timeout=sample['solution_timeout']), namespace, solution, entry_point, test_case_inputs, result, details)
+                            if details:
+                                result.append(details)
+                            results.append(result)
+                        except Sandbox.CaseMismatch as e:
+                            results.append(["failed@code_error:Test case output mismatch", e.details])
+                        except TimeoutException as e:
+                            results.append(["failed@timeout"])
+                        except MemoryError as e:
+                            results.append(["failed@memory"])
+                        except Exception as e:
+                            results.append([f"failed@code_error:{e}"])
+                        finally:
+                            tracemalloc.stop()
+
+                shutil.rmtree = rmtree
+                os.rmdir = rmdir
+                os.chdir = chdir
+        except Exception as e:
+            results += [[f"failed@sandbox_error:{e}"] for _ in sample['solutions'][len(results):]]
+
+    def run_code_execution_batch(self, problem, solutions) -> List:
+        """
+        Runs many solutions against one problem's test suite in a single job. The test suite is shipped and
+        deserialized once, and every solution gets a fresh copy of the inputs. Unlike run_code_execution, the measured
+        runtime therefore excludes input deserialization.
+
+        Returns one run_code_execution-style result per solution.
+        """
+        if problem.get('lang', 'python3') in NativeBuilder.languages:
+            # Compile all solutions in parallel, then run them as separate jobs
+            builds = Sandbox.native.build_many(problem['lang'], solutions, problem['code_prompt'])
+            n_workers = self.pool.n_workers if self.pool is not None else os.cpu_count()
+            with ThreadPoolExecutor(max_workers=n_workers) as executor:
+                runs = [executor.submit(self.run_native_execution, dict(problem, solution=solution), build) for solution, build in zip(solutions, builds)]
+                return [run.result() for run in runs]
+        if problem.get('lang', 'python3') in ManagedRuntime.languages:
+            # One job per solution, spread over the warm workers
+            with ThreadPoolExecutor(max_workers=Sandbox.managed.n_workers) as executor:
+                runs = [executor.submit(self.run_managed_execution, dict(problem, solution=solution)) for solution in solutions]
+                return [run.result() for run in runs]
+
+        limited = Sandbox.limit(problem)
+        sample = dict(limited, solutions=solutions, solution_timeout=limited['timeout'], timeout=limited['timeout']*len(solutions))
+        results = self.run("execution_batch", sample)
+        info = results.pop()
+
+        if len(results) < len(solutions):
+            # The batch process died (e.g. a solution hung in C code): run every solution on its own instead
+            return [self.run_code_execution(dict(problem, solution=solution)) for solution in solutions]
+        return [Sandbox.tag_timeout(Sandbox.attach(result, dict(info)), problem) for result in results]
+
+    @staticmethod
+    def collect_code_execution_batch(results):
+        return list(results)
+    
+    @staticmethod
+    def case_evaluation(sample, result):
+        try:
+            with Sandbox.create_tempdir():
+                # These system calls are needed when cleaning up tempdir.
+                import os
+                import shutil
+                rmtree = shutil.rmtree
+                rmdir = os.rmdir
+                chdir = os.chdir
+                
+                # Disable functionalities that can make destructive changes to the test.
                 Sandbox.reliability_guard()
                 
                 try:
                     # Memory Trace
-                    tracemalloc.start()
+                    meter = MemoryMeter(sample.get('memory'))
+                    meter.start()
                     
                     # Global Namespace
-                    namespace = {}                
-                    exec("import re", namespace)
-                    exec("import os", namespace)
-                    exec("import sys", namespace)
-                    exec("import lxml", namespace)
-                    exec("import string", namespace)
-                    exec("import pickle", namespace)
-                    exec("import feedparser", namespace)
-                    exec("import matplotlib", namespace)
-                    exec("from typing import List, Optional, Tuple", namespace)
-                    exec("from collections import deque, defaultdict, OrderedDict", namespace)
-                    exec("def print(*args):pass", namespace)
+                    namespace = Sandbox.prelude(Sandbox.SYNTHESIS_PRELUDE)
                     
                     runtime = 0
                     with Sandbox.swallow_io():
@@ -493,24 +2391,37 @@ class Sandbox(object):
                                 exec("cases += [{'input': input_, 'output': output_}]", namespace)
                                 
                             # Case Evaluation
-                            start_time = time.time()
-                            exec(sample['optimized_solution'], namespace)
-                            exec("case_len = len(cases)", namespace)
-                            
-                            case_pass = list()
-                            for index in range(namespace["case_len"]):
-                                exec(f"output_={entry_point}(*cases[{index}]['input'])", namespace)
-                                exec(f"p=(cases[{index}]['output']==output_)", namespace)
-                                case_pass += [namespace['p']]
+                            def evaluate():
+                                exec(sample['optimized_solution'], namespace)
+                                exec("case_len = len(cases)", namespace)
                                 
-                            _, peak_mem = tracemalloc.get_traced_memory()
+                                case_pass = list()
+                                for index in range(namespace["case_len"]):
+                                    exec(f"output_={entry_point}(*cases[{index}]['input'])", namespace)
+                                    exec(f"p=(cases[{index}]['output']==output_)", namespace)
+                                    case_pass += [namespace['p']]
+                                return case_pass
+
+                            start_time = time.time()
+                            case_pass = evaluate()
+                            peak_mem = meter.peak()
                             end_time = time.time()
                             runtime = end_time-start_time
+                            meter.stop()
+
+                            if meter.backend == "two_pass":
+                                traced = MemoryMeter("tracemalloc")
+                                traced.start()
+                                evaluate()
+                                peak_mem = traced.peak()
+                                traced.stop()
+                            # Filled in by the parent for the psutil backend
+                            peak_mem = None if peak_mem is None else peak_mem/10**3
                             
                             if all(case_pass):
-                                result.append({"status": "success", "traceback": None, "time": runtime, "mem": peak_mem/10**3})
+                                result.append({"status": "success", "traceback": None, "time": runtime, "mem": peak_mem})
                             else:
-                                result.append({"status": "failed@cases", "traceback": None, "time": runtime, "mem": peak_mem/10**3})
+                                result.append({"status": "failed@cases", "traceback": None, "time": runtime, "mem": peak_mem})
 
                 except Exception as e:
                     exc_type, exc_value, exc_traceback = traceback.sys.exc_info()
@@ -541,21 +2452,11 @@ class Sandbox(object):
                 
                 try:
                     # Memory Trace
-                    tracemalloc.start()
+                    meter = MemoryMeter(sample.get('memory'))
+                    meter.start()
                     
                     # Global Namespace
-                    namespace = {}
-                    exec("import re", namespace)
-                    exec("import os", namespace)
-                    exec("import sys", namespace)
-                    exec("import lxml", namespace)
-                    exec("import string", namespace)
-                    exec("import pickle", namespace)
-                    exec("import feedparser", namespace)
-                    exec("import matplotlib", namespace)
-                    exec("from typing import List, Optional, Tuple", namespace)
-                    exec("from collections import deque, defaultdict, OrderedDict", namespace)
-                    exec("def print(*args):pass", namespace)
+                    namespace = Sandbox.prelude(Sandbox.SYNTHESIS_PRELUDE)
                     
                     runtime = 0
                     cases = list()
@@ -571,36 +2472,46 @@ class Sandbox(object):
                                 raise InitialException(tb)
 
                             # Case Generation
+                            def generate(cases):
+                                for _ in range(sample['case_count']):
+                                    try:
+                                        exec("input_=generate_test_case()", namespace)
+                                    except Exception as e:
+                                        exc_type, exc_value, exc_traceback = traceback.sys.exc_info()
+                                        tb = Sandbox.custom_traceback(exc_type, exc_value, exc_traceback)
+                                        raise InputException(tb)
+                                    
+                                    try:
+                                        entry_point = "solution"
+                                        exec(f"output_={entry_point}(*input_)", namespace)
+                                    except Exception as e:
+                                        exc_type, exc_value, exc_traceback = traceback.sys.exc_info()
+                                        tb = Sandbox.custom_traceback(exc_type, exc_value, exc_traceback)
+                                        raise OutputException(tb)
+                                    
+                                    try:                
+                                        exec('case_dict_=pickle.dumps({"input": input_, "output": output_})', namespace)
+                                    except Exception as e:
+                                        exc_type, exc_value, exc_traceback = traceback.sys.exc_info()
+                                        tb = Sandbox.custom_traceback(exc_type, exc_value, exc_traceback)
+                                        raise SerializationException(tb)
+                                    
+                                    cases += [namespace['case_dict_']]
+
                             start_time = time.time()
-                            
-                            for _ in range(sample['case_count']):
-                                try:
-                                    exec("input_=generate_test_case()", namespace)
-                                except Exception as e:
-                                    exc_type, exc_value, exc_traceback = traceback.sys.exc_info()
-                                    tb = Sandbox.custom_traceback(exc_type, exc_value, exc_traceback)
-                                    raise InputException(tb)
-                                
-                                try:
-                                    entry_point = "solution"
-                                    exec(f"output_={entry_point}(*input_)", namespace)
-                                except Exception as e:
-                                    exc_type, exc_value, exc_traceback = traceback.sys.exc_info()
-                                    tb = Sandbox.custom_traceback(exc_type, exc_value, exc_traceback)
-                                    raise OutputException(tb)
-                                
-                                try:                
-                                    exec('case_dict_=pickle.dumps({"input": input_, "output": output_})', namespace)
-                                except Exception as e:
-                                    exc_type, exc_value, exc_traceback = traceback.sys.exc_info()
-                                    tb = Sandbox.custom_traceback(exc_type, exc_value, exc_traceback)
-                                    raise SerializationException(tb)
-                                
-                                cases += [namespace['case_dict_']]
-                            
-                            _, peak_mem = tracemalloc.get_traced_memory()
+                            generate(cases)
+                            peak_mem = meter.peak()
                             end_time = time.time()
                             runtime = end_time-start_time
+                            meter.stop()
+
+                            if meter.backend == "two_pass":
+                                # Memory of a second, traced generation of the same size
+                                traced = MemoryMeter("tracemalloc")
+                                traced.start()
+                                generate(list())
+                                peak_mem = traced.peak()
+                                traced.stop()
                             result.append({"status": "success", "traceback": None, "cases": cases, "time": runtime, "mem": peak_mem})
                 except TimeoutException:
                     result.append({"status": "failed@timeout", "traceback": str(e), "cases": cases, "time": None, "mem": None})
@@ -624,73 +2535,502 @@ class Sandbox(object):
         except Exception as e:
             pass
 
+    def run_evaluation(self, sample) -> Dict:
+        """
+        Evaluates the functional correctness of a completion by running the test suite provided in the problem. 
+        """
+        return self.run("evaluation", sample)
+
     @staticmethod
-    def run_evaluation(sample) -> Dict:
+    def collect_evaluation(result) -> Dict:
+        if not result:
+            exc_type, exc_value, exc_traceback = traceback.sys.exc_info()
+            tb = Sandbox.custom_traceback(exc_type, exc_value, exc_traceback)
+            result.append({"status": "failed@timeout", "traceback": tb, "time": None, "mem": None})
+
+        return dict(
+            status=result[0]['status'],
+            traceback=result[0]['traceback'],
+            code_time=result[0]['time'],
+            code_mem=result[0]['mem']
+        )
+            
+    def run_generation(self, sample) -> Dict:
         """
         Evaluates the functional correctness of a completion by running the test suite provided in the problem. 
         """
+        return self.run("generation", sample)
 
-        with Manager() as manager:
-            result = manager.list()
+    @staticmethod
+    def collect_generation(result) -> Dict:
+        if not result:
+            exc_type, exc_value, exc_traceback = traceback.sys.exc_info()
+            tb = Sandbox.custom_traceback(exc_type, exc_value, exc_traceback)
+            result.append({"status": "failed@timeout", "traceback": tb, "cases": None, "time": None, "mem": None})
 
-            p = Process(target=Sandbox.case_evaluation, args=(sample, result))
-            p.start()
-            p.join(timeout=sample['timeout']+1)
-            if p.is_alive():
-                p.kill()
+        return dict(
+            status=result[0]['status'],
+            traceback=result[0]['traceback'],
+            cases=result[0]['cases'],
+            code_time=result[0]['time'],
+            code_mem=result[0]['mem']
+        )
 
-            if not result:
-                exc_type, exc_value, exc_traceback = traceback.sys.exc_info()
-                tb = Sandbox.custom_traceback(exc_type, exc_value, exc_traceback)
-                result.append({"status": "failed@timeout", "traceback": tb, "time": None, "mem": None})
+    def run(self, kind, sample):
+        """
+        Runs a job of the given kind (see Sandbox.JOBS) with the execution mode of this sandbox and collects its result.
+        """
+        if self.mode == "pool":
+            return self.pool.run(kind, sample)
+        if self.mode == "zygote":
+            outputs, info = self.zygote.run(kind, sample)
+        else:
+            outputs, info = Sandbox.spawn(kind, sample)
+        return Sandbox.collect(kind, outputs, info)
 
-            return dict(
-                status=result[0]['status'],
-                traceback=result[0]['traceback'],
-                code_time=result[0]['time'],
-                code_mem=result[0]['mem']
-            )
-            
     @staticmethod
-    def run_generation(sample) -> Dict:
+    def collect(kind, outputs, info):
         """
-        Evaluates the functional correctness of a completion by running the test suite provided in the problem. 
+        Builds the result of a job from its raw outputs and attaches the job information (e.g. startup latency).
         """
+        _, _, collector = Sandbox.JOBS[kind]
+        sections, samples = info.pop('memory_sections', None), info.pop('memory_samples', None)
+        result = getattr(Sandbox, collector)(*outputs)
+        if info.pop('oom_kill', False) and isinstance(result, list) and result == ["failed@timeout"]:
+            # No report because the kernel killed the job over its memory cap
+            result = ["failed@memory"]
+        if sections:
+            MemoryMeter.settle(kind, result, sections, samples)
+        return Sandbox.attach(result, info)
 
-        with Manager() as manager:
-            result = manager.list()
+    @staticmethod
+    def attach(result, info):
+        """
+        Merges job information into a dict result. List results carry it in a trailing dict, which the child may
+        already have started with its own details.
+        """
+        if isinstance(result, dict):
+            result.update(info)
+        elif result and isinstance(result[-1], dict):
+            result[-1].update(info)
+        else:
+            result.append(info)
+        return result
 
-            p = Process(target=Sandbox.case_generation, args=(sample, result))
-            p.start()
-            p.join(timeout=sample['timeout']+1)
-            if p.is_alive():
-                p.kill()
+    @staticmethod
+    def spawn(kind, sample):
+        Channel.prepare()
+        reader, writer = Pipe(duplex=False)
 
-            if not result:
-                exc_type, exc_value, exc_traceback = traceback.sys.exc_info()
-                tb = Sandbox.custom_traceback(exc_type, exc_value, exc_traceback)
-                result.append({"status": "failed@timeout", "traceback": tb, "cases": None, "time": None, "mem": None})
+        p = Process(target=Sandbox.launch, args=(kind, sample, time.monotonic(), writer))
+        p.start()
+        writer.close()
 
-            return dict(
-                status=result[0]['status'],
-                traceback=result[0]['traceback'],
-                cases=result[0]['cases'],
-                code_time=result[0]['time'],
-                code_mem=result[0]['mem']
-            )
+        outputs, info = Sandbox.no_outputs(kind)
+        try:
+            ready, samples = MemoryMeter.wait(reader, p.pid, Sandbox.job_timeout(kind, sample)+1, sample.get('memory'))
+            if ready:
+                outputs, info = Channel.recv(reader)
+                info['memory_samples'] = samples
+        except EOFError as e:
+            # The child crashed before reporting
+            pass
+        finally:
+            reader.close()
+
+        if p.is_alive():
+            p.kill()
+        p.join()
+        if not outputs[0]:
+            info.update(MemoryCap.reap(p.pid))
+        return outputs, info
+
+    @staticmethod
+    def launch(kind, sample, dispatch_time, conn):
+        """
+        Child entry point: runs the job and ships all of its outputs back as a single message.
+        """
+        Channel.send(conn, Sandbox.execute(kind, sample, dispatch_time))
+        conn.close()
+
+    @staticmethod
+    def startup(dispatch_time):
+        """
+        Startup latency of the current job: from its dispatch until its namespace prelude was ready.
+        """
+        if Sandbox.prelude_time is None:
+            return dict(startup_ms=None)
+        return dict(startup_ms=(Sandbox.prelude_time-dispatch_time)*10**3)
+
+    @staticmethod
+    def execute(kind, sample, dispatch_time=None):
+        """
+        Runs a job of the given kind in the current process, returning its raw output lists and job information.
+        """
+        target, n_outputs, _ = Sandbox.JOBS[kind]
+        dispatch_time = dispatch_time or time.monotonic()
+        outputs = [list() for _ in range(n_outputs)]
+
+        Sandbox.prelude_time = None
+        MemoryMeter.sections = dict()
+        cap = MemoryCap(sample.get('memory_limit', Sandbox.MEMORY_LIMIT))
+        cap.apply()
+        try:
+            getattr(Sandbox, target)(sample, *outputs)
+        finally:
+            memory = cap.release()
+
+        info = Sandbox.startup(dispatch_time)
+        info.update(memory)
+        if MemoryMeter.sections:
+            info['memory_sections'] = MemoryMeter.sections
+        return outputs, info
+
+    @staticmethod
+    def no_outputs(kind):
+        """
+        Outputs of a job that never reported back (timeout or crash).
+        """
+        _, n_outputs, _ = Sandbox.JOBS[kind]
+        return [list() for _ in range(n_outputs)], dict(startup_ms=None)
+
+    def run_samples(self, jobs, max_in_flight=None):
+        """
+        Bulk executor. Runs an iterable of (job_id, kind, sample) jobs of any kinds (see Sandbox.JOBS) in parallel and
+        yields (job_id, result) in completion order. At most `max_in_flight` jobs (default: twice the number of
+        workers) are submitted at a time, so the job iterable is consumed lazily and memory stays flat.
+
+        Usage:
+            for job_id, result in sandbox.run_samples((i, "execution", sample) for i, sample in enumerate(samples)):
+                ...
+        """
+        executor = None
+        if self.mode == "pool":
+            submit, n_workers = self.pool.submit, self.pool.n_workers
+        else:
+            # Every thread just waits on its own child process
+            n_workers = os.cpu_count()
+            executor = ThreadPoolExecutor(max_workers=n_workers)
+            submit = lambda kind, sample: executor.submit(self.run, kind, sample)
+        max_in_flight = max_in_flight or 2 * n_workers
+
+        in_flight = dict()
+        try:
+            for job_id, kind, sample in jobs:
+                if kind not in Sandbox.JOBS:
+                    raise ValueError(f"Unknown job kind: {kind}")
+                in_flight[submit(kind, sample)] = job_id
+                while len(in_flight) >= max_in_flight:
+                    yield from Sandbox.completed(in_flight)
+            while in_flight:
+                yield from Sandbox.completed(in_flight)
+        finally:
+            # The consumer stopped early (or a job failed): drop what has not started yet
+            for future in in_flight:
+                future.cancel()
+            if executor is not None:
+                executor.shutdown(wait=True)
 
     @staticmethod
-    def run_samples(samples, n_workers=4):
-        with ThreadPoolExecutor(max_workers=n_workers) as executor:
-            futures, results = list(), list()
+    def completed(in_flight):
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield in_flight.pop(future), future.result()
+
+
+class SandboxPool(object):
+    """
+    A pool of long-lived, pre-initialized sandbox workers.
+
+    Each worker imports the prelude modules once and then serves jobs over a pipe, so a job only pays for its own code.
+    Workers are recycled after `max_jobs` jobs, or right after a crash, a timeout or a guard violation.
+
+    With `pin`, every worker is pinned to its own physical core (one hyperthread per core, the first core is left to
+    the orchestrator), and results are tagged with the core and a host load snapshot. With `max_load`, a job waits (up
+    to `load_patience` seconds) until the busy fraction of its core, sampled over `load_window` seconds, is at most
+    `max_load`.
+
+    Usage:
+        with SandboxPool(n_workers=8) as pool:
+            future = pool.submit("execution", sample)
+            results = future.result()
+    """
 
-            for sample in samples:
-                args = (sample,)
-                future = executor.submit(Sandbox.run_sample, *args)
-                futures.append(future)
+    load_window = 0.01
+    load_patience = 5
 
-            for future in tqdm(as_completed(futures), total=len(futures), desc='Reading futures'):
-                result = future.result()
-                results.append(result)
+    def __init__(self, n_workers=None, max_jobs=256, pin=False, max_load=None):
+        self.cores = SandboxPool.measurement_cores() if pin else list()
+        self.n_workers = min(n_workers or len(self.cores), len(self.cores)) if pin else n_workers or os.cpu_count()
+        self.max_jobs = max_jobs
+        self.max_load = max_load
+        self.jobs = queue.Queue()
+        self.recycled = 0
+        self.cache_stats = dict()
+        self.lock = threading.Lock()
+        cores = self.cores[:self.n_workers] if pin else [None] * self.n_workers
+        self.threads = [threading.Thread(target=self.dispatch, args=(core,), daemon=True) for core in cores]
+        for thread in self.threads:
+            thread.start()
 
-        return results
\ No newline at end of file
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def submit(self, kind, sample) -> Future:
+        """
+        Queues a job of the given kind (see Sandbox.JOBS). The future resolves to the same result as Sandbox.run().
+        """
+        future = Future()
+        self.jobs.put((future, kind, sample))
+        return future
+
+    def run(self, kind, sample):
+        return self.submit(kind, sample).result()
+
+    def close(self):
+        for _ in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join()
+
+    @staticmethod
+    def measurement_cores() -> List[int]:
+        """
+        One logical CPU per physical core available to this process, without the first core (left to the
+        orchestrator) unless it is the only one. Hyperthread siblings share execution units, so only one is used.
+        """
+        cores, seen = list(), set()
+        for cpu in sorted(os.sched_getaffinity(0)):
+            if cpu in seen:
+                continue
+            siblings = {cpu}
+            try:
+                with open(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list") as f:
+                    for part in f.read().strip().split(","):
+                        first, _, last = part.partition("-")
+                        siblings.update(range(int(first), int(last or first)+1))
+            except (OSError, ValueError) as e:
+                pass
+            seen.update(siblings)
+            cores.append(cpu)
+        return cores[1:] if len(cores) > 1 else cores
+
+    @staticmethod
+    def core_load(core, window) -> float:
+        """
+        Busy fraction of a CPU over `window` seconds.
+        """
+        before = psutil.cpu_times(percpu=True)[core]
+        time.sleep(window)
+        after = psutil.cpu_times(percpu=True)[core]
+        total = sum(after) - sum(before)
+        idle = (after.idle + getattr(after, "iowait", 0)) - (before.idle + getattr(before, "iowait", 0))
+        return 1 - idle/total if total > 0 else 0.0
+
+    def check_load(self, core) -> Dict:
+        """
+        Load snapshot taken right before a job is sent to the worker pinned to `core`. Waits while the core is busier
+        than `max_load`.
+        """
+        busy = None
+        if self.max_load is not None:
+            deadline = time.monotonic() + self.load_patience
+            busy = SandboxPool.core_load(core, self.load_window)
+            while busy > self.max_load and time.monotonic() < deadline:
+                busy = SandboxPool.core_load(core, self.load_window)
+        return dict(loadavg=psutil.getloadavg()[0], core_busy=busy)
+
+    @staticmethod
+    def worker(conn, max_jobs, core=None, workdir=None):
+        import os
+        import shutil
+
+        if core is not None:
+            os.sched_setaffinity(0, {core})
+        # Created and removed by the parent, which may kill the worker
+        Sandbox.workdir = workdir
+
+        # Pay the import cost once per worker
+        Sandbox.warmup()
+
+        # The guard of a finished job leaves these disabled; the next job needs them to set up its tempdir and guard.
+        getcwd, chdir, rmdir, putenv, rmtree = os.getcwd, os.chdir, os.rmdir, os.putenv, shutil.rmtree
+        kill, popen = os.kill, subprocess.Popen
+
+        for _ in range(max_jobs):
+            try:
+                kind, sample, dispatch_time = Channel.recv(conn)
+            except EOFError:
+                break
+
+            os.getcwd, os.chdir, os.rmdir, os.putenv, shutil.rmtree = getcwd, chdir, rmdir, putenv, rmtree
+            os.kill, subprocess.Popen = kill, popen
+            start_time = time.time()
+            Sandbox.interrupted = False
+            outputs, info = Sandbox.execute(kind, sample, dispatch_time)
+            tracemalloc.stop()
+            
+            # A timed-out job (or pass) may have been interrupted anywhere, so its worker is not reused either. Neither is
+            # a worker whose job left files behind, which the guard keeps it from deleting.
+            healthy = Sandbox.guard_intact() and not Sandbox.interrupted and time.time() - start_time < Sandbox.job_timeout(kind, sample)
+            healthy = healthy and not (workdir and os.listdir(workdir))
+            Channel.send(conn, (outputs, info, healthy, Sandbox.code_cache.stats()))
+            if not healthy:
+                break
+        conn.close()
+
+    def start_worker(self, core=None):
+        Channel.prepare()
+        parent_conn, child_conn = Pipe()
+        workdir = tempfile.mkdtemp(prefix="venus-worker-")
+        process = Process(target=SandboxPool.worker, args=(child_conn, self.max_jobs, core, workdir), daemon=True)
+        process.start()
+        child_conn.close()
+        return parent_conn, process, workdir
+
+    def stop_worker(self, conn, process, workdir):
+        conn.close()
+        if process.is_alive():
+            process.kill()
+        process.join()
+        shutil.rmtree(workdir, ignore_errors=True)
+        with self.lock:
+            self.recycled += 1
+
+    def dispatch(self, core=None):
+        worker, job_count = None, 0
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+
+            future, kind, sample = job
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            if worker is None:
+                worker, job_count = self.start_worker(core), 0
+            conn, process, workdir = worker
+
+            (outputs, info), healthy = Sandbox.no_outputs(kind), False
+            load = self.check_load(core) if core is not None else None
+            try:
+                Channel.send(conn, (kind, sample, time.monotonic()))
+                ready, samples = MemoryMeter.wait(conn, process.pid, Sandbox.job_timeout(kind, sample)+1, sample.get('memory'))
+                if ready:
+                    outputs, info, healthy, cache_stats = Channel.recv(conn)
+                    info['memory_samples'] = samples
+                    with self.lock:
+                        self.cache_stats[process.pid] = cache_stats
+            except (EOFError, OSError) as e:
+                # The worker crashed
+                pass
+            job_count += 1
+            if core is not None:
+                info.update(core=core, load=load)
+            if not healthy:
+                # Retired before collecting, so that the memory group of a killed worker can be read
+                self.stop_worker(conn, process, workdir)
+                worker = None
+                info.update(MemoryCap.reap(process.pid))
+
+            try:
+                future.set_result(Sandbox.collect(kind, outputs, info))
+            except Exception as e:
+                future.set_exception(e)
+
+            if worker is not None and job_count >= self.max_jobs:
+                self.stop_worker(conn, process, workdir)
+                worker = None
+
+        if worker is not None:
+            self.stop_worker(*worker)
+
+    def stats(self) -> Dict:
+        """
+        Pool counters, including the code cache counters summed over all current and retired workers.
+        """
+        with self.lock:
+            code_cache = dict(hits=0, disk_hits=0, misses=0)
+            for cache_stats in self.cache_stats.values():
+                for key in code_cache:
+                    code_cache[key] += cache_stats[key]
+        return dict(workers=self.n_workers, cores=self.cores[:self.n_workers], pending=self.jobs.qsize(), recycled=self.recycled, code_cache=code_cache)
+
+
+class Zygote(object):
+    """
+    A fork server. It imports and builds the sandbox preludes once, then forks a fresh copy-on-write child per job,
+    so every job still starts from a pristine interpreter without paying the import cost.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start()
+
+    def start(self):
+        Channel.prepare()
+        self.conn, child_conn = Pipe()
+        self.process = Process(target=Zygote.serve, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    @staticmethod
+    def serve(conn):
+        Sandbox.warmup()
+        Sandbox.preload()
+
+        # Forked children are reaped automatically
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+        while True:
+            try:
+                kind, sample, dispatch_time, result_conn = Channel.recv(conn)
+            except EOFError:
+                break
+
+            pid = os.fork()
+            if pid == 0:
+                conn.close()
+                try:
+                    Sandbox.launch(kind, sample, dispatch_time, result_conn)
+                finally:
+                    os._exit(0)
+
+            result_conn.close()
+            conn.send(pid)
+
+    def run(self, kind, sample):
+        """
+        Runs a job in a forked child, returning its raw output lists and job information.
+        """
+        reader, writer = Pipe(duplex=False)
+        with self.lock:
+            if not self.process.is_alive():
+                self.start()
+            Channel.send(self.conn, (kind, sample, time.monotonic(), writer))
+            pid = self.conn.recv()
+        writer.close()
+
+        try:
+            ready, samples = MemoryMeter.wait(reader, pid, Sandbox.job_timeout(kind, sample)+1, sample.get('memory'))
+            if ready:
+                outputs, info = Channel.recv(reader)
+                info['memory_samples'] = samples
+                return outputs, info
+        except EOFError as e:
+            # The child crashed
+            pass
+        finally:
+            reader.close()
+
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError as e:
+            pass
+        outputs, info = Sandbox.no_outputs(kind)
+        info.update(MemoryCap.reap(pid))
+        return outputs, info
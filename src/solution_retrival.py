@@ -10,12 +10,17 @@
 
 import time
 import json
-import requests
 import pandas as pd
 from tqdm import tqdm
 from multiprocessing import Pool, Manager
 from datasets import Dataset, load_dataset
 
+try:
+    from src.graphql_transport import GraphQLTransport
+except ImportError:
+    # Running from inside src/
+    from graphql_transport import GraphQLTransport
+
 
 class LeetCodeRetrival:
     def __init__(self, lang, headers) -> None:
@@ -23,6 +28,7 @@ class LeetCodeRetrival:
         self.instances = list()
         self.url = "https://leetcode.com/graphql/"
         self.headers = headers
+        self.transport = GraphQLTransport(headers, url=self.url, method="POST")
         
     def runtime_retrieval(self, question_id, lang, index, runtime):
         runtime_payload = json.dumps({
@@ -84,12 +90,10 @@ class LeetCodeRetrival:
             return None
 
     def retrieval(self, payload):
-        try:
-            response = requests.request("POST", self.url, headers=self.headers, data=payload)
-            return response.json()
-        except Exception as e:
-            print(f"Retrieval Error: {e} Response: {response}")
-            return None
+        response = self.transport.query(payload, allow_null=True)
+        if response is None:
+            print(f"Retrieval Error: {self.transport.stats()}")
+        return response
     
     def runtime_range(self, instance):
         instance['rt_list'] = list()
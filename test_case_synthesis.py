@@ -3,6 +3,7 @@
 # Date: 2024 / 09 / 21
 
 import os
+import re
 import uuid
 import random
 import argparse
@@ -10,13 +11,18 @@ from tqdm import tqdm
 import src.prompts as prompts
 import src.sandbox as sandbox
 from src.utils import OpenAIClient
+from src.result_store import ResultStore
 from datasets import load_dataset, Dataset
 
 
 class TestCasesSynthesizer:
+    # Problems with several correct outputs, on which correct solutions disagree
+    MULTIPLE_ANSWERS = re.compile(r"in any order|return any|any of them|any valid|any possible|multiple (?:valid |possible )?(?:answers|solutions)", re.IGNORECASE)
+
     def __init__(self, lang):
         self.lang = lang
         self.sandbox = sandbox.Sandbox()
+        self.store = ResultStore()
         self.from_ds = load_dataset("Elfsong/venus", self.lang, download_mode="force_redownload")
         self.to_ds = load_dataset("Elfsong/venus_case", self.lang, download_mode="force_redownload")
         self.to_ds_id = set([i['question_id'] for i in self.to_ds['train']])
@@ -33,72 +39,26 @@ class TestCasesSynthesizer:
         response = self.client.inference(messages)
         return response
     
-    def function_validation(self, solutions, test_case_functions):
-        namespace = dict()
-        
-        exec("import re", namespace)
-        exec("import sys", namespace)
-        exec("import json", namespace)
-        exec("import math", namespace)
-        exec("import copy", namespace)
-        exec("import heapq", namespace)
-        exec("import heapq", namespace)
-        exec("import bisect", namespace)
-        exec("import string", namespace)
-        exec("import string", namespace)
-        exec("import random", namespace)
-        exec("import itertools", namespace)
-        exec("import functools", namespace)
-        exec("import collections", namespace)
-        exec("from json import loads", namespace)
-        exec("from sys import maxsize, stdin", namespace)
-        exec("from functools import lru_cache, cache", namespace)
-        exec("from typing import List, Optional, Tuple", namespace)
-        exec("from typing import Tuple, List, Optional", namespace)
-        exec("from heapq import heappush, heappop, heapify", namespace)
-        exec("from bisect import bisect_left, bisect_right", namespace)
-        exec("from itertools import permutations, zip_longest", namespace)
-        exec("from math import floor, ceil, factorial, sqrt, inf", namespace)
-        exec("from collections import defaultdict, Counter, deque", namespace)
-        exec("from collections import deque, defaultdict, OrderedDict", namespace)
-        
-        exec("class ListNode:\n\tdef __init__(self, val=0, next=None):\n\t\tself.val=val\n\t\tself.next=next", namespace)
-        exec("class TreeNode:\n\tdef __init__(self, val=0, left=None, right=None):\n\t\tself.val=val\n\t\tself.left=left\n\t\tself.right=right", namespace)
-        
-        test_cases = list()
-        canonical_solution = random.choice(solutions)
-        try:
-            exec(canonical_solution, namespace)
-            exec(test_case_functions['serialize_input'], namespace)
-            exec(test_case_functions['deserialize_input'], namespace)
-            exec(test_case_functions['serialize_output'], namespace)
-            exec(test_case_functions['deserialize_output'], namespace)
-            exec(test_case_functions['generate_test_case_input'], namespace)
+    @staticmethod
+    def min_agreement(instance):
+        # Share of solutions that must agree on every generated case, none when the problem accepts several outputs
+        return None if TestCasesSynthesizer.MULTIPLE_ANSWERS.search(instance['content'] or "") else 0.9
 
-            for _ in range(64):
-                exec("test_case_input = generate_test_case_input()", namespace)
-                exec("test_case_input_serialized = serialize_input(test_case_input)", namespace)
-                exec("test_case_input = deserialize_input(test_case_input_serialized)", namespace)
-                exec("solution = Solution()", namespace)
-                exec("test_case_output = solution.{}(*test_case_input)".format(test_case_functions['entry_point']), namespace)
-                exec("test_case_output_serialized = serialize_output(test_case_output)", namespace)
-                exec("test_case_output = deserialize_output(test_case_output_serialized)", namespace)
-                
-                for index in range(min(32, len(solutions))):
-                    exec("solution = Solution()", namespace)
-                    exec("test_case_output_ = solution.{}(*test_case_input)".format(test_case_functions['entry_point']), namespace)
-                    exec("test_case_output_serialized_ = serialize_output(test_case_output)", namespace)
-                    exec("test_case_output_ = deserialize_output(test_case_output_serialized)", namespace)
-                    if namespace['test_case_output'] != namespace['test_case_output_']:
-                        raise Exception(f"Test case output mismatch")
-                
-                print("✅", end=" ", flush=True)
-                test_cases.append({"input": namespace['test_case_input_serialized'], "output": namespace['test_case_output_serialized']})
-        except Exception as e:
-            print(f"\n🔴 Validation Failed: {e}")
+    def function_validation(self, solutions, test_case_functions, min_agreement):
+        # Differential validation: inputs are generated once and every solution runs once over all of them
+        sample = {
+            "timeout": 120,
+            "test_case_functions": test_case_functions,
+            "solutions": solutions,
+            "min_agreement": min_agreement,
+        }
+        result = self.sandbox.run_test_case_validation(sample)
+        if result['status'] != "success":
+            print(f"\n🔴 Validation Failed: {result['status']}")
             return False
-            
-        print("\n🟢 Validation Passed")
+
+        agreement = result['agreement']
+        print(f"\n🟢 Validation Passed: {sum(rate == 1.0 for rate in agreement)}/{len(agreement)} solutions agree on every case")
         return True
     
     def pipeline(self, sub_dl):
@@ -125,6 +85,15 @@ class TestCasesSynthesizer:
                     print(f"🔴 Failed")
                     continue
                 print(f"[+] Found [{len(solution_candidates)}] solutions")
+
+                # Problems validated by a previous (crashed) run are not generated and validated again
+                key = ResultStore.key("synthesis", self.lang, instance['question_id'], solution_candidates)
+                stored = self.store.get("synthesis", key)
+                if stored is not None:
+                    instance.update(stored)
+                    new_dl.append(instance)
+                    print(f"Found the case in the result store. Reused ✅")
+                    continue
                 
                 # 2. Select a canonical solution
                 canonical_solution = random.choice(solution_candidates)
@@ -139,13 +108,21 @@ class TestCasesSynthesizer:
                     "timeout": 120, 
                     "test_case_functions": test_case_functions,
                     "solutions": solution_candidates,
+                    "min_agreement": TestCasesSynthesizer.min_agreement(instance),
                 }
                 result = self.sandbox.run_test_case_validation(sample)
+                if result['agreement'] is not None:
+                    print(f"[+] Agreement: {sum(rate == 1.0 for rate in result['agreement'])}/{len(result['agreement'])} solutions agree on every case")
                 
                 # 5. Save the test cases
                 if result['status'] == "success":
                     instance['test_case_functions'] = test_case_functions
                     instance['test_cases'] = result['test_cases']
+
+                    # Per-problem timeout for later evaluations, from the runtime of a few validated solutions (seeded per problem)
+                    problem = {"timeout": 120, "functions": test_case_functions, "test_cases": result['test_cases']}
+                    instance['adaptive_timeout'] = self.sandbox.calibrate_timeout(problem, solution_candidates, seed=instance['question_id'])
+                    self.store.put("synthesis", key, {key_: instance[key_] for key_ in ['test_case_functions', 'test_cases', 'adaptive_timeout']})
                     new_dl.append(instance)
                     print(f"🟢 Success")
                 else:
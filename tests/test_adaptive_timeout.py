@@ -0,0 +1,61 @@
+# coding: utf-8
+
+# Per-problem timeouts calibrated from reference solutions (Sandbox.calibrate_timeout).
+
+import random
+import pytest
+from src.sandbox import Sandbox
+from benchmarks.bulk_benchmark import make_sample
+
+# Allocation-heavy reference: tracemalloc slows it down several times over
+SORT_SOLUTION = """class Solution:
+    def twoSum(self, nums, target):
+        ordered = sorted([(x % 1000, x) for x in range(100000, 0, -1)])
+        seen = {}
+        for i, x in enumerate(nums):
+            if target - x in seen:
+                return [seen[target - x], i]
+            seen[x] = i
+"""
+
+
+@pytest.fixture(scope="module")
+def problem():
+    random.seed(5)
+    return make_sample(8, 100)
+
+
+def test_calibrated_limit_follows_untraced_run(problem):
+    sandbox = Sandbox()
+    limit = sandbox.calibrate_timeout(problem, [SORT_SOLUTION], config=dict(factor=1, floor=0))
+    untraced = sandbox.run_code_execution(dict(problem, solution=SORT_SOLUTION, memory="rusage"))
+    traced = sandbox.run_code_execution(dict(problem, solution=SORT_SOLUTION))
+    assert untraced[0] == traced[0] == "pass"
+    # The traced runtime is several times the untraced one; the limit must not follow it
+    assert limit * 10**3 < 2 * untraced[1] < traced[1]
+
+
+def test_adaptive_limit_only_bounds_correctness_run(problem):
+    sandbox = Sandbox()
+    adaptive_timeout = sandbox.calibrate_timeout(problem, [SORT_SOLUTION])
+    results = sandbox.run_code_execution_batch(dict(problem, adaptive_timeout=adaptive_timeout, measure=Sandbox.MEASURE_CONFIG), [SORT_SOLUTION] * 2)
+    for result in results:
+        assert result[0] == "pass"
+        assert result[-1]['adaptive_kill'] is False
+        assert result[-1]['runtime']['runs'] >= Sandbox.MEASURE_CONFIG['min_runs']
+
+
+def test_calibration_runs_a_seeded_sample_of_references(problem, monkeypatch):
+    sandbox = Sandbox()
+    batches = list()
+    run_batch = sandbox.run_code_execution_batch
+    def spy(problem, solutions):
+        batches.append(solutions)
+        return run_batch(problem, solutions)
+    monkeypatch.setattr(sandbox, "run_code_execution_batch", spy)
+
+    references = [problem['solution'] + f"\n# reference {index}\n" for index in range(50)]
+    assert sandbox.calibrate_timeout(problem, references, seed=1) == Sandbox.ADAPTIVE_TIMEOUT['floor']
+    sandbox.calibrate_timeout(problem, references, seed=1)
+    assert len(batches[0]) == Sandbox.ADAPTIVE_TIMEOUT['references']
+    assert batches[0] == batches[1]
@@ -0,0 +1,124 @@
+# coding: utf-8
+
+# Checkpoint journal of retrieval crawls (src/crawl_journal.py).
+
+import json
+import os
+import pytest
+from src.crawl_journal import CrawlJournal
+from src.crawler import SolutionCrawler, IncompleteCrawl
+from tests.test_crawler import ScriptedTransport, payload
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = CrawlJournal("python3", directory=str(tmp_path))
+    yield journal
+    journal.file.close()
+
+
+def reopen(journal):
+    journal.file.close()
+    return CrawlJournal("python3", directory=os.path.dirname(journal.path))
+
+
+def test_records_survive_a_restart(journal):
+    journal.record_bucket(1, "runtime", 40, ["a", "b"])
+    journal.record_bucket(1, "runtime", 44, [])
+    journal.record_bucket(1, "memory", 16000, ["c"])
+    journal.record_instance({"question_id": 2, "rt_list": []})
+
+    journal = reopen(journal)
+    # The empty bucket is crawled again
+    assert journal.buckets(1, "runtime") == {40: ["a", "b"]}
+    assert journal.buckets(1, "memory") == {16000: ["c"]}
+    assert journal.buckets(3, "runtime") == {}
+    assert journal.pending() == [{"question_id": 2, "rt_list": []}]
+    journal.file.close()
+
+
+def test_torn_last_record_is_cut_off(journal):
+    journal.record_bucket(1, "runtime", 40, ["a"])
+    valid_size = os.path.getsize(journal.path)
+    journal.file.write('{"type": "bucket", "question_id": 1, "ki')
+    journal.file.flush()
+
+    journal = reopen(journal)
+    assert os.path.getsize(journal.path) == valid_size
+    assert journal.buckets(1, "runtime") == {40: ["a"]}
+
+    # Records appended after the recovery are intact
+    journal.record_bucket(1, "runtime", 44, ["b"])
+    journal = reopen(journal)
+    assert journal.buckets(1, "runtime") == {40: ["a"], 44: ["b"]}
+    with open(journal.path) as f:
+        assert [json.loads(line)['bucket'] for line in f] == [40, 44]
+    journal.file.close()
+
+
+def test_corrupt_record_ends_the_journal(journal):
+    journal.record_bucket(1, "runtime", 40, ["a"])
+    journal.file.write("not json\n")
+    journal.file.flush()
+    journal.record_bucket(1, "runtime", 44, ["b"])
+
+    journal = reopen(journal)
+    assert journal.buckets(1, "runtime") == {40: ["a"]}
+    journal.file.close()
+
+
+def test_later_records_win(journal):
+    journal.record_bucket(1, "runtime", 40, ["a"])
+    journal.record_bucket(1, "runtime", 40, ["a", "b"])
+    journal.record_instance({"question_id": 1, "version": 1})
+    journal.record_instance({"question_id": 1, "version": 2})
+    assert journal.buckets(1, "runtime") == {40: ["a", "b"]}
+    assert journal.pending() == [{"question_id": 1, "version": 2}]
+
+
+def test_compaction_drops_uploaded_questions(journal):
+    journal.record_bucket(1, "runtime", 40, ["a"])
+    journal.record_instance({"question_id": 1})
+    journal.record_bucket(2, "memory", 16000, ["b"])
+    journal.record_instance({"question_id": 3})
+
+    journal.compact([1, 3])
+    assert journal.pending() == []
+    assert journal.buckets(1, "runtime") == {}
+    assert journal.buckets(2, "memory") == {16000: ["b"]}
+    assert not os.path.exists(journal.path + ".tmp")
+
+    # Appends go to the compacted file
+    journal.record_bucket(2, "memory", 16500, ["c"])
+    journal = reopen(journal)
+    assert journal.buckets(2, "memory") == {16000: ["b"], 16500: ["c"]}
+    assert journal.pending() == []
+    with open(journal.path) as f:
+        assert len(f.readlines()) == 2
+    journal.file.close()
+
+
+def test_null_only_crawl_leaves_the_question_unfinished(journal):
+    def retrieve(transport):
+        # As LeetCodeRetrieval.runtime_range and construct_instance do
+        try:
+            pages = SolutionCrawler(transport).crawl(
+                [40, 44], payload, "code", 4,
+                done=journal.buckets(1, "runtime"), on_bucket=lambda rt, codes: journal.record_bucket(1, "runtime", rt, codes)
+            )
+        except IncompleteCrawl as e:
+            return None
+        journal.record_instance({"question_id": 1, "rt_list": pages})
+        return pages
+
+    # An expired cookie: null data only
+    assert retrieve(ScriptedTransport(null=[40, 44])) is None
+    journal = reopen(journal)
+    assert journal.buckets(1, "runtime") == {}
+    assert journal.pending() == []
+
+    transport = ScriptedTransport()
+    assert retrieve(transport) == [["40-0", "40-1"], ["44-0", "44-1"]]
+    assert {bucket for bucket, _ in transport.queries} == {40, 44}
+    assert journal.pending() == [{"question_id": 1, "rt_list": [["40-0", "40-1"], ["44-0", "44-1"]]}]
+    journal.file.close()
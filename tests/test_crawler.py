@@ -0,0 +1,97 @@
+# coding: utf-8
+
+# Concurrent solution crawler (src/crawler.py), on a scripted transport.
+
+import json
+import pytest
+from src.crawler import SolutionCrawler, TokenBucket, IncompleteCrawl
+
+
+class ScriptedTransport(object):
+    """
+    Buckets of two solutions each. Pages in `failing` cannot be retrieved, buckets in `null` have null data only.
+    """
+    def __init__(self, failing=(), null=()):
+        self.failing = set(failing)
+        self.null = set(null)
+        self.queries = list()
+        self.failures = 0
+
+    async def query_async(self, payload, allow_null=False):
+        variables = json.loads(payload)
+        self.queries.append((variables['bucket'], variables['index']))
+        if (variables['bucket'], variables['index']) in self.failing:
+            return None
+        if variables['index'] >= 2 or variables['bucket'] in self.null:
+            return {"data": {"code": None}}
+        return {"data": {"code": {"code": f"{variables['bucket']}-{variables['index']}", "hasNext": variables['index'] < 1}}}
+
+    def backoff(self, attempt, retry_after=None):
+        return 0
+
+    def throttled(self):
+        pass
+
+    def failed(self):
+        self.failures += 1
+
+
+def payload(bucket, index):
+    return json.dumps({"bucket": bucket, "index": index})
+
+
+def test_pages_come_back_in_bucket_order():
+    finished = dict()
+    pages = SolutionCrawler(ScriptedTransport(), concurrency=3).crawl([5, 1, 3], payload, "code", 4, on_bucket=finished.__setitem__)
+    assert pages == [["5-0", "5-1"], ["1-0", "1-1"], ["3-0", "3-1"]]
+    assert finished == {5: ["5-0", "5-1"], 1: ["1-0", "1-1"], 3: ["3-0", "3-1"]}
+
+
+def test_done_buckets_are_not_crawled_again():
+    transport = ScriptedTransport()
+    pages = SolutionCrawler(transport).crawl([1, 2], payload, "code", 4, done={1: ["cached"]})
+    assert pages == [["cached"], ["2-0", "2-1"]]
+    assert {bucket for bucket, _ in transport.queries} == {2}
+
+
+def test_failed_page_makes_the_crawl_incomplete():
+    finished = dict()
+    with pytest.raises(IncompleteCrawl) as error:
+        SolutionCrawler(ScriptedTransport(failing=[(2, 1)])).crawl([1, 2, 3], payload, "code", 4, on_bucket=finished.__setitem__)
+    assert error.value.buckets == [2]
+    # Only complete buckets are reported, so a resumed crawl only fetches the failed one
+    assert sorted(finished) == [1, 3]
+
+    transport = ScriptedTransport()
+    pages = SolutionCrawler(transport).crawl([1, 2, 3], payload, "code", 4, done=finished)
+    assert pages == [["1-0", "1-1"], ["2-0", "2-1"], ["3-0", "3-1"]]
+    assert {bucket for bucket, _ in transport.queries} == {2}
+
+
+def test_null_first_page_fails_the_bucket():
+    finished = dict()
+    transport = ScriptedTransport(null=[2])
+    crawler = SolutionCrawler(transport)
+    with pytest.raises(IncompleteCrawl) as error:
+        crawler.crawl([1, 2], payload, "code", 4, on_bucket=finished.__setitem__)
+    assert error.value.buckets == [2]
+    assert sorted(finished) == [1]
+    assert crawler.stats['failed'] == 1 and transport.failures == 1
+    assert transport.queries.count((2, 0)) == crawler.max_retries
+
+
+def test_null_later_page_ends_the_bucket():
+    # Pages 0, 2: the second one is null, though the first one has a next page
+    pages = SolutionCrawler(ScriptedTransport()).crawl([1], lambda bucket, index: payload(bucket, 2 * index), "code", 4)
+    assert pages == [["1-0"]]
+
+
+def test_token_bucket_adapts_between_bounds():
+    limiter = TokenBucket(8, burst=2, min_rate=1)
+    assert limiter.reserve() == 0
+    for _ in range(10):
+        limiter.slow_down()
+    assert limiter.rate == 1
+    for _ in range(100):
+        limiter.speed_up()
+    assert limiter.rate == 8
@@ -0,0 +1,81 @@
+# coding: utf-8
+
+# Majority outputs and per-solution agreement of differential test case validation (Sandbox.differential_consensus).
+
+from src.sandbox import Sandbox
+
+INPUTS = [{"input": "a"}, {"input": "b"}, {"input": "c"}]
+
+
+def test_majority_output_per_case():
+    vectors = [
+        ["1", "2", "3"],
+        ["1", "2", "4"],
+        ["1", "5", "4"],
+        ["9", "2", "4"],
+    ]
+    test_cases, agreement = Sandbox.differential_consensus(INPUTS, vectors)
+    assert test_cases == [{"input": "a", "output": "1"}, {"input": "b", "output": "2"}, {"input": "c", "output": "4"}]
+    assert agreement == [2/3, 1.0, 2/3, 2/3]
+
+
+def test_missing_outputs_do_not_vote():
+    # A solution that crashed or timed out on a case has no output there
+    vectors = [
+        [None, "2", None],
+        [None, "2", "3"],
+        ["7", None, None],
+    ]
+    test_cases, agreement = Sandbox.differential_consensus(INPUTS, vectors)
+    assert [case['output'] for case in test_cases] == ["7", "2", "3"]
+    assert agreement == [1/3, 2/3, 1/3]
+
+
+def test_case_without_any_output():
+    test_cases, agreement = Sandbox.differential_consensus(INPUTS[:1], [[None], [None]])
+    assert test_cases == [{"input": "a", "output": None}]
+    # No output is not an agreement
+    assert agreement == [0.0, 0.0]
+
+
+def test_no_cases():
+    assert Sandbox.differential_consensus([], [[], []]) == ([], [0.0, 0.0])
+
+
+# Any pair of indices summing to the target is correct: the solutions return the first or the last one
+TWO_SUM_FUNCTIONS = {
+    "serialize_input": "def serialize_input(i):\n    nums, target = i\n    return f'{nums}\\n{target}'\n",
+    "deserialize_input": "def deserialize_input(s):\n    nums, target = s.strip().split('\\n')\n    return eval(nums), int(target)\n",
+    "serialize_output": "def serialize_output(o):\n    return str(o)\n",
+    "deserialize_output": "def deserialize_output(s):\n    return eval(s)\n",
+    "generate_test_case_input": "def generate_test_case_input():\n    return [1, 2, 3, 4], 5\n",
+    "entry_point": "anyPair",
+}
+
+def pair_solution(which):
+    return f"""class Solution:
+    def anyPair(self, nums, target):
+        pairs = [[i, j] for i in range(len(nums)) for j in range(i+1, len(nums)) if nums[i] + nums[j] == target]
+        return pairs[{which}]
+"""
+
+
+def test_multiple_answers_disagree():
+    vectors = [["[0, 3]"], ["[0, 3]"], ["[1, 2]"]]
+    test_cases, agreement = Sandbox.differential_consensus(INPUTS[:1], vectors)
+    assert test_cases == [{"input": "a", "output": "[0, 3]"}]
+    assert agreement == [1.0, 1.0, 0.0]
+
+
+def test_multiple_answers_validate_without_min_agreement():
+    sample = {
+        "timeout": 30, "test_case_functions": TWO_SUM_FUNCTIONS, "case_count": 4,
+        "solutions": [pair_solution(0), pair_solution(0), pair_solution(-1)],
+    }
+    result = Sandbox().run_test_case_validation(sample)
+    assert result['status'] == "success"
+    assert [case['output'] for case in result['test_cases']] == ["[0, 3]"] * 4
+    assert result['agreement'] == [1.0, 1.0, 0.0]
+
+    result = Sandbox().run_test_case_validation(dict(sample, min_agreement=0.9))
+    assert result['status'] == "failed@Test case output mismatch: 2/3 solutions agree on every case"
@@ -0,0 +1,51 @@
+# coding: utf-8
+
+# GraphQL transport (src/graphql_transport.py): outcomes and circuit breaker, on a scripted session.
+
+import json
+import pytest
+from src.graphql_transport import GraphQLTransport, CircuitOpen
+from src.crawler import TokenBucket
+
+
+class Reply(object):
+    def __init__(self, body, status_code=200):
+        self.body, self.status_code, self.headers = body, status_code, dict()
+
+    def json(self):
+        return self.body
+
+
+PAYLOAD = json.dumps({"query": "query codeWithRuntime($runtime: Int!) {codeWithRuntime(runtime: $runtime) {code}}"})
+
+
+def scripted(transport, *bodies):
+    replies = iter(bodies)
+    transport.session.request = lambda *args, **kwargs: Reply(next(replies))
+    return transport
+
+
+def test_allowed_null_neither_resets_the_breaker_nor_speeds_up():
+    limiter = TokenBucket(8)
+    transport = GraphQLTransport({}, limiter=limiter, breaker_threshold=2, base_delay=0)
+    scripted(transport, {"data": {"codeWithRuntime": None}}, {"data": {"codeWithRuntime": None}})
+    limiter.slow_down()
+
+    transport.failed()
+    assert transport.query(PAYLOAD, allow_null=True) == {"data": {"codeWithRuntime": None}}
+    assert transport.failures == 1 and limiter.rate == 4
+    # Null data that persisted over the caller's retries opens the breaker
+    transport.failed()
+    with pytest.raises(CircuitOpen):
+        transport.query(PAYLOAD, allow_null=True)
+
+    stats = transport.stats()['codeWithRuntime']
+    assert (stats['requests'], stats['ok'], stats['null'], stats['null_allowed']) == (1, 0, 0, 1)
+
+
+def test_data_resets_the_breaker():
+    transport = GraphQLTransport({}, breaker_threshold=2, base_delay=0, max_retries=2)
+    scripted(transport, {"data": {"codeWithRuntime": None}}, {"data": {"codeWithRuntime": {"code": "pass"}}})
+    assert transport.query(PAYLOAD) == {"data": {"codeWithRuntime": {"code": "pass"}}}
+    assert transport.failures == 0
+    assert transport.stats()['codeWithRuntime']['null'] == 1
@@ -0,0 +1,122 @@
+# coding: utf-8
+
+# Local question catalog with incremental refresh (src/question_catalog.py).
+
+import pytest
+from src.question_catalog import QuestionCatalog
+
+
+class Listing(object):
+    """
+    A problem set listing in the shape of LeetCodeOperation.question_id_retrieval and question_retrieval.
+    """
+    def __init__(self, count):
+        self.questions = [Listing.question(index * 3, f"question-{index}") for index in range(count)]
+        self.calls = list()
+        self.broken = set()
+
+    @staticmethod
+    def question(question_id, title_slug):
+        return {"questionId": str(question_id), "titleSlug": title_slug, "codeSnippets": [{"langSlug": "python3", "code": f"# {title_slug}"}]}
+
+    def list_ids(self, skip, limit):
+        self.calls.append(("ids", skip, limit))
+        if "ids" in self.broken:
+            return None
+        page = self.questions[skip:skip+limit]
+        return len(self.questions), [(int(question['questionId']), question['titleSlug']) for question in page]
+
+    def list_questions(self, skip, limit):
+        self.calls.append(("questions", skip, limit))
+        if "questions" in self.broken:
+            return None
+        return self.questions[skip:skip+limit]
+
+    def full_pages(self):
+        return [call for call in self.calls if call[0] == "questions"]
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = QuestionCatalog(path=str(tmp_path / "catalog.sqlite"))
+    yield catalog
+    catalog.close()
+
+
+def test_first_refresh_fetches_everything(catalog):
+    listing = Listing(2500)
+    assert catalog.refresh(listing.list_ids, listing.list_questions) == 2500
+    assert len(catalog) == 2500
+    # The listing in id pages, the questions in full pages
+    assert [call for call in listing.calls if call[0] == "ids"] == [("ids", 0, 1000), ("ids", 1000, 1000), ("ids", 2000, 1000)]
+    assert len(listing.full_pages()) == 2500 // QuestionCatalog.page_size
+
+
+def test_refresh_only_fetches_new_questions(catalog):
+    listing = Listing(250)
+    catalog.refresh(listing.list_ids, listing.list_questions)
+    listing.calls.clear()
+
+    listing.questions.insert(5, Listing.question(10**5, "inserted"))
+    listing.questions.append(Listing.question(10**5 + 1, "appended"))
+    assert catalog.refresh(listing.list_ids, listing.list_questions) == 2
+    assert listing.full_pages() == [("questions", 5, QuestionCatalog.page_size), ("questions", 251, QuestionCatalog.page_size)]
+    assert len(catalog) == 252
+    assert [question['titleSlug'] for question in catalog.questions(4, 3)] == ["question-4", "inserted", "question-5"]
+
+    listing.calls.clear()
+    assert catalog.refresh(listing.list_ids, listing.list_questions) == 0
+    assert listing.full_pages() == []
+
+
+def test_removed_questions_leave_the_slices(catalog):
+    listing = Listing(10)
+    catalog.refresh(listing.list_ids, listing.list_questions)
+    del listing.questions[0]
+    catalog.refresh(listing.list_ids, listing.list_questions)
+    assert len(catalog) == 9
+    assert [question['titleSlug'] for question in catalog.questions(0, 2)] == ["question-1", "question-2"]
+    # Still known by id
+    assert catalog.get(0)['titleSlug'] == "question-0"
+
+
+def test_lookups(catalog):
+    listing = Listing(10)
+    catalog.refresh(listing.list_ids, listing.list_questions)
+    assert catalog.get(6)['titleSlug'] == "question-2"
+    assert catalog.get("6") == catalog.get_by_slug("question-2")
+    assert catalog.get(7) is None and catalog.get_by_slug("missing") is None
+    assert QuestionCatalog.code_prompts(catalog.get(6)) == {"python3": "# question-2"}
+    assert QuestionCatalog.code_prompts({"codeSnippets": None}) == {}
+
+
+def test_failed_listing_keeps_the_catalog(catalog):
+    listing = Listing(10)
+    catalog.refresh(listing.list_ids, listing.list_questions)
+    listing.questions.append(Listing.question(999, "new"))
+
+    listing.broken = {"ids"}
+    with pytest.raises(LookupError):
+        catalog.refresh(listing.list_ids, listing.list_questions)
+    assert len(catalog) == 10
+
+    listing.broken = {"questions"}
+    with pytest.raises(LookupError):
+        catalog.refresh(listing.list_ids, listing.list_questions)
+    assert catalog.get(999) is None
+
+    # Fetched on the next successful refresh
+    listing.broken = set()
+    assert catalog.refresh(listing.list_ids, listing.list_questions) == 1
+    assert catalog.get(999)['titleSlug'] == "new"
+
+
+def test_persists_across_connections(catalog):
+    listing = Listing(10)
+    catalog.refresh(listing.list_ids, listing.list_questions)
+    reopened = QuestionCatalog(path=catalog.path)
+    try:
+        assert len(reopened) == 10
+        assert reopened.questions(0, 10) == listing.questions
+    finally:
+        reopened.close()
@@ -0,0 +1,115 @@
+# coding: utf-8
+
+# On-disk GraphQL response cache (src/response_cache.py).
+
+import json
+import os
+import time
+import pytest
+from src.response_cache import ResponseCache
+
+
+def payload(query="query questionEditorData($titleSlug: String!) {question(titleSlug: $titleSlug) {questionId}}", **variables):
+    return json.dumps({"query": query, "variables": variables or {"titleSlug": "two-sum"}})
+
+RESPONSE = {"data": {"question": {"questionId": "1"}}}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(directory=str(tmp_path))
+
+
+def test_round_trip(cache):
+    assert cache.get("questionEditorData", payload()) is None
+    cache.put("questionEditorData", payload(), RESPONSE)
+    assert cache.get("questionEditorData", payload()) == RESPONSE
+    assert cache.stats() == {"questionEditorData": {"misses": 1, "writes": 1, "hits": 1}}
+
+
+def test_key_is_canonical():
+    spaced = json.dumps({"variables": {"titleSlug": "two-sum"}, "query": json.loads(payload())['query']}, indent=2)
+    assert ResponseCache.key(payload()) == ResponseCache.key(spaced) == ResponseCache.key(json.loads(payload()))
+    assert ResponseCache.key(payload()) != ResponseCache.key(payload(titleSlug="add-two-numbers"))
+
+
+def test_entries_are_sharded_per_query_type(cache):
+    cache.put("questionEditorData", payload(), RESPONSE)
+    key = ResponseCache.key(payload())
+    path = cache.path("questionEditorData", key)
+    assert path == os.path.join(cache.directory, "questionEditorData", key[:2], key[2:] + ".json.gz")
+    assert os.path.exists(path)
+
+
+def test_null_data_is_not_stored(cache):
+    # Null data may be throttling
+    cache.put("codeWithRuntime", payload(), {"data": {"codeWithRuntime": None}})
+    cache.put("codeWithRuntime", payload(), {"errors": ["rate limited"]})
+    assert cache.get("codeWithRuntime", payload()) is None
+    assert not os.path.exists(os.path.join(cache.directory, "codeWithRuntime"))
+
+
+def test_ttl_expiry(cache):
+    cache.put("problemsetQuestionList", payload(), RESPONSE)
+    path = cache.path("problemsetQuestionList", ResponseCache.key(payload()))
+    expired = time.time() - ResponseCache.ttls['problemsetQuestionList'] - 60
+    os.utime(path, (expired, expired))
+    assert cache.get("problemsetQuestionList", payload()) is None
+
+
+def test_entries_without_ttl_never_expire(cache):
+    cache.put("submissionDetails", payload(), RESPONSE)
+    path = cache.path("submissionDetails", ResponseCache.key(payload()))
+    os.utime(path, (0, 0))
+    assert cache.get("submissionDetails", payload()) == RESPONSE
+
+
+def test_submission_lists_are_never_cached(cache):
+    # They depend on the account and change with every submission
+    empty = {"data": {"questionSubmissionList": {"submissions": []}}}
+    cache.put("submissionList", payload(), empty)
+    assert cache.get("submissionList", payload()) is None
+    assert not os.path.exists(os.path.join(cache.directory, "submissionList"))
+
+
+def test_truncated_entry_is_a_miss(cache):
+    cache.put("questionEditorData", payload(), RESPONSE)
+    path = cache.path("questionEditorData", ResponseCache.key(payload()))
+    with open(path, "r+b") as f:
+        f.truncate(10)
+    assert cache.get("questionEditorData", payload()) is None
+
+
+def test_purge(cache):
+    cache.put("problemsetQuestionList", payload(), RESPONSE)
+    cache.put("problemsetQuestionList", payload(titleSlug="fresh"), RESPONSE)
+    cache.put("submissionDetails", payload(), RESPONSE)
+    expired = time.time() - ResponseCache.ttls['problemsetQuestionList'] - 60
+    for path in [cache.path("problemsetQuestionList", ResponseCache.key(payload())), cache.path("submissionDetails", ResponseCache.key(payload()))]:
+        os.utime(path, (expired, expired))
+    leftover = cache.path("submissionDetails", ResponseCache.key(payload())) + ".123.456.tmp"
+    open(leftover, "w").close()
+
+    assert cache.purge() == 2
+    assert cache.get("problemsetQuestionList", payload()) is None
+    assert cache.get("problemsetQuestionList", payload(titleSlug="fresh")) == RESPONSE
+    assert cache.get("submissionDetails", payload()) == RESPONSE
+    assert not os.path.exists(leftover)
+
+
+def test_ttl_overrides(tmp_path):
+    cache = ResponseCache(directory=str(tmp_path), ttls={"questionEditorData": 0})
+    cache.put("questionEditorData", payload(), RESPONSE)
+    assert cache.get("questionEditorData", payload()) is None
+    assert cache.ttl("unknownQuery") == ResponseCache.default_ttl
+
+
+def test_offline_transport_never_queries(tmp_path):
+    from src.graphql_transport import GraphQLTransport
+    cache = ResponseCache(directory=str(tmp_path), offline=True)
+    cache.put("questionEditorData", payload(), RESPONSE)
+    # Nothing listens there: any request would fail
+    transport = GraphQLTransport({}, url="http://127.0.0.1:9/", cache=cache, max_retries=1)
+    assert transport.query(payload()) == RESPONSE
+    assert transport.query(payload(titleSlug="add-two-numbers")) is None
+    assert transport.stats() == {}
@@ -0,0 +1,95 @@
+# coding: utf-8
+
+# Persistent sandbox result store (src/result_store.py).
+
+import pytest
+from src.result_store import ResultStore
+
+PASS = ["pass", 12.5, 1024.0, {"startup_ms": 3.0}]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultStore(path=str(tmp_path / "results.sqlite"), version="v1")
+    yield store
+    store.close()
+
+
+def test_round_trip(store):
+    key = ResultStore.key("execution", "solution", "suite", {"timeout": 120})
+    assert store.get("execution", key) is None
+    store.put("execution", key, PASS)
+    assert store.get("execution", key) == PASS
+    # Kinds do not share keys
+    assert store.get("evaluation", key) is None
+
+
+def test_keys_are_deterministic():
+    assert ResultStore.key("a", {"x": 1, "y": 2}) == ResultStore.key("a", {"y": 2, "x": 1})
+    assert ResultStore.key("a", "b") != ResultStore.key("b", "a")
+    assert ResultStore.suite_key([{"input": "1", "output": "2"}], {"entry_point": "f"}) == ResultStore.key([{"input": "1", "output": "2"}], {"entry_point": "f"})
+
+
+def test_get_many_in_chunks(store, monkeypatch):
+    monkeypatch.setattr(ResultStore, "chunk_size", 3)
+    store.put_many("execution", [(f"key-{index}", ["pass", index, 0]) for index in range(10)])
+    found = store.get_many("execution", [f"key-{index}" for index in range(12)] + ["key-0"])
+    assert found == {f"key-{index}": ["pass", index, 0] for index in range(10)}
+    stats = store.stats()
+    assert stats['hits'] == {"execution": 10} and stats['misses'] == {"execution": 2}
+    assert stats['entries'] == {"execution": 10}
+
+
+def test_transient_results_are_not_stored(store):
+    store.put_many("execution", [
+        ("timeout", ["failed@timeout"]),
+        ("sandbox", ["failed@sandbox_error:broken pipe"]),
+        ("generation", {"status": "failed@timeout"}),
+        ("code_error", ["failed@code_error:Test case output mismatch"]),
+    ])
+    assert set(store.get_many("execution", ["timeout", "sandbox", "generation", "code_error"])) == {"code_error"}
+    assert store.stats()['writes'] == {"execution": 1}
+
+
+def test_other_versions_are_invisible_and_purged(store, tmp_path):
+    store.put("execution", "key", PASS)
+    newer = ResultStore(path=store.path, version="v2")
+    try:
+        assert newer.get("execution", "key") is None
+        assert newer.stats()['stale'] == 1
+        assert newer.purge() == 1
+        assert store.get("execution", "key") is None
+    finally:
+        newer.close()
+
+
+def test_expired_results(tmp_path):
+    store = ResultStore(path=str(tmp_path / "results.sqlite"), ttl=60, version="v1")
+    try:
+        store.put_many("execution", [("old", PASS), ("new", PASS)])
+        with store.lock:
+            store.connection.execute("UPDATE results SET created = created - 3600 WHERE key = 'old'")
+            store.connection.commit()
+        assert set(store.get_many("execution", ["old", "new"])) == {"new"}
+        assert store.purge() == 1
+    finally:
+        store.close()
+
+
+def test_invalidate(store):
+    store.put("execution", "a", PASS)
+    store.put("evaluation", "b", {"status": "success"})
+    store.invalidate("execution")
+    assert store.get("execution", "a") is None
+    assert store.get("evaluation", "b") == {"status": "success"}
+    store.invalidate()
+    assert store.get("evaluation", "b") is None
+
+
+def test_persists_across_connections(store):
+    store.put("execution", "key", PASS)
+    reopened = ResultStore(path=store.path, version="v1")
+    try:
+        assert reopened.get("execution", "key") == PASS
+    finally:
+        reopened.close()